@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+JSON 修复解析基准测试
+
+从 logs/ 中提取真实的 LLM 原始响应，拼成约 20KB 的 JSON，在多个位置截断
+(以及删除逗号、删除 ] 的变体)，比较单遍修复解析器与旧的六策略正则解析的最坏耗时。
+
+用法:
+    python benchmarks/bench_json_repair.py [--cuts 50] [--legacy-timeout 10]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.json_repair import parse_json_with_repairs
+
+CONTENT_LINE = re.compile(r' - \[logger\.py:\d+\] -\s+"content": (".*?"),?\s*$')
+TARGET_SIZE = 20 * 1024
+
+
+def load_llm_contents(log_dir: str):
+    """从日志中提取 LLM 原始响应里的 content 字段"""
+    contents = []
+    for name in sorted(os.listdir(log_dir)):
+        if not name.endswith(".log"):
+            continue
+        with open(os.path.join(log_dir, name), encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                match = CONTENT_LINE.search(line)
+                if not match:
+                    continue
+                try:
+                    content = json.loads(match.group(1))
+                except ValueError:
+                    continue
+                if "{" in content:
+                    contents.append(content)
+    return contents
+
+
+def build_document(contents):
+    """把多段响应拼成一个约 20KB、带代码块标记的 JSON 文本"""
+    sections = []
+    size = 0
+    for content in contents:
+        try:
+            value, _ = parse_json_with_repairs(content)
+        except ValueError:
+            continue
+        sections.append(value)
+        size += len(json.dumps(value, ensure_ascii=False, indent=4).encode("utf-8"))
+        if size >= TARGET_SIZE:
+            break
+    body = json.dumps({"sections": sections}, ensure_ascii=False, indent=4)
+    return "以下是分析结果：\n```json\n" + body + "\n```"
+
+
+def make_cases(document: str, cuts: int):
+    """
+    在文档后半段均匀截断；另外两组分别删除换行前的逗号 (LLM 漏写逗号)
+    和所有 ] (LLM 忘记闭合列表)
+    """
+    variants = (
+        ("truncated", document),
+        ("truncated+missing_commas", re.sub(r",\n", "\n", document)),
+        ("truncated+unclosed_arrays", document.replace("]", "")),
+    )
+    cases = []
+    for label, doc in variants:
+        start = len(doc) // 2
+        for k in range(cuts):
+            cases.append((label, doc[:start + (len(doc) - start) * k // cuts]))
+    return cases
+
+
+def legacy_parse_llm_json_content(content: str):
+    """旧版 parse_llm_json_content (六种策略依次尝试)，仅用于对比"""
+    content = content.strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
+    match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL | re.IGNORECASE)
+    if match:
+        try:
+            return json.loads(match.group(1).strip())
+        except json.JSONDecodeError:
+            pass
+    match = re.search(r'```\s*(.*?)\s*```', content, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(1).strip())
+        except json.JSONDecodeError:
+            pass
+    if '{' in content and '}' in content:
+        try:
+            return json.loads(content[content.find('{'):content.rfind('}') + 1])
+        except json.JSONDecodeError:
+            pass
+    json_lines, in_json, brace_count = [], False, 0
+    for line in content.split('\n'):
+        stripped_line = line.strip()
+        if '{' in stripped_line and not in_json:
+            in_json = True
+            json_lines.append(line)
+            brace_count += stripped_line.count('{') - stripped_line.count('}')
+        elif in_json:
+            json_lines.append(line)
+            brace_count += stripped_line.count('{') - stripped_line.count('}')
+            if brace_count == 0:
+                break
+    if json_lines:
+        try:
+            return json.loads('\n'.join(json_lines))
+        except json.JSONDecodeError:
+            pass
+    try:
+        start = content.find('{')
+        if start != -1:
+            json_part = re.sub(r'```.*$', '', content[start:], flags=re.DOTALL).strip()
+            json_part = re.sub(r'(\[[^\]]*?)\s*\n\s*(\s*\"[\w_]+\"\s*:\s*)', r'\1], \n \2', json_part)
+            json_part = re.sub(r'(\"(?:[^\"\\]|\\.)*\"\s*:\s*(?:\"(?:[^\"\\]|\\.)*\"|\d+|true|false|null|\[(?:[^\[\]]|\[[^\[\]]*\])*\]|\{(?:[^{}]|\{[^{}]*\})*\}))\s*\n\s*(\"(?:[^\"\\]|\\.)*\"\s*:\s*)', r'\1, \n \2', json_part)
+            last_quote = json_part.rfind('"')
+            if last_quote != -1:
+                remaining = json_part[last_quote + 1:].strip()
+                if remaining and not any(c in remaining for c in [',', '}', ']', ':']):
+                    json_part += '"'
+            fixed_json = json_part
+            fixed_json += ']' * max(0, json_part.count('[') - json_part.count(']'))
+            fixed_json += '}' * max(0, json_part.count('{') - json_part.count('}'))
+            return json.loads(fixed_json)
+    except Exception:
+        pass
+    raise json.JSONDecodeError("无法解析JSON内容", content, 0)
+
+
+def _time_parser(parse, text: str):
+    started = time.perf_counter()
+    try:
+        parse(text)
+        ok = True
+    except ValueError:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def _legacy_worker(text, conn):
+    conn.send(_time_parser(legacy_parse_llm_json_content, text))
+
+
+def time_legacy(text: str, timeout: float):
+    """在子进程中运行旧解析器，正则回溯失控时按超时记录"""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_legacy_worker, args=(text, child))
+    proc.start()
+    if parent.poll(timeout):
+        result = parent.recv()
+        proc.join()
+        return result
+    proc.terminate()
+    proc.join()
+    return None, False
+
+
+def summarize(name: str, timings, successes: int, total: int, timeouts: int = 0):
+    timings = sorted(timings)
+    if timings:
+        p50 = timings[len(timings) // 2] * 1000
+        worst = timings[-1] * 1000
+        line = f"p50={p50:8.2f}ms  max={worst:9.2f}ms"
+    else:
+        line = "无有效计时"
+    if timeouts:
+        line += f"  超时={timeouts}"
+    print(f"   {name:<8} {line}  成功解析 {successes}/{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 修复解析基准测试")
+    parser.add_argument("--log-dir", default=os.path.join(PROJECT_ROOT, "logs"))
+    parser.add_argument("--cuts", type=int, default=50, help="每组截断位置数量")
+    parser.add_argument("--legacy-timeout", type=float, default=10.0, help="旧解析器单次超时(秒)")
+    parser.add_argument("--skip-legacy", action="store_true", help="只测新解析器")
+    args = parser.parse_args()
+
+    contents = load_llm_contents(args.log_dir)
+    if not contents:
+        print(f"❌ 在 {args.log_dir} 中没有找到 LLM 响应")
+        return
+    document = build_document(contents)
+    cases = make_cases(document, args.cuts)
+    print(f"📄 从日志提取 {len(contents)} 段响应，拼接文档 {len(document.encode('utf-8')) / 1024:.1f}KB，"
+          f"{len(cases)} 个截断用例")
+
+    for label in dict.fromkeys(label for label, _ in cases):
+        group = [text for l, text in cases if l == label]
+        print(f"\n📊 {label} ({len(group)} 个用例)")
+
+        results = [_time_parser(parse_json_with_repairs, text) for text in group]
+        summarize("repair", [t for t, _ in results], sum(ok for _, ok in results), len(group))
+
+        if not args.skip_legacy:
+            results = [time_legacy(text, args.legacy_timeout) for text in group]
+            timed = [t for t, _ in results if t is not None]
+            summarize("legacy", timed, sum(ok for _, ok in results), len(group),
+                      timeouts=len(group) - len(timed))
+
+
+if __name__ == "__main__":
+    main()
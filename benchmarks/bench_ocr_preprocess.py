@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+OCR 图片预处理基准测试
+
+对 uploads/ 中的样例简历 (按内容去重) 分别应用几组预处理配置，在同一个常驻的 PaddleOCR MCP 会话中识别，
+比较预处理耗时、OCR 耗时，以及识别文本与原图识别结果的相似度 (没有人工标注时以原图结果为参照)。
+
+用法:
+    python benchmarks/bench_ocr_preprocess.py [--repeat 3] [--no-ocr] [--upload-dir uploads]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import hashlib
+import argparse
+import difflib
+import contextlib
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from mcp_app.image_preprocess import ImagePreprocessor, IMAGE_EXTENSIONS
+
+# (名称, 预处理参数)，第一组为参照
+VARIANTS = [
+    ("raw", dict(enabled=False)),
+    ("gray", dict(max_dimension=0, grayscale=True)),
+    ("gray+max1600", dict(max_dimension=1600, grayscale=True)),
+    ("gray+max1280", dict(max_dimension=1280, grayscale=True)),
+    ("gray+max960", dict(max_dimension=960, grayscale=True)),
+    ("gray+max960+deskew", dict(max_dimension=960, grayscale=True, deskew=True)),
+]
+
+
+def load_images(upload_dir: str):
+    """按内容去重的样例图片"""
+    images, seen = [], set()
+    for name in sorted(os.listdir(upload_dir)):
+        path = os.path.join(upload_dir, name)
+        if name.startswith(".") or os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest not in seen:
+            seen.add(digest)
+            images.append(path)
+    return images
+
+
+def similarity(reference: str, text: str) -> float:
+    """去掉空白后的字符级相似度"""
+    a, b = "".join(reference.split()), "".join(text.split())
+    if not a and not b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+class OCRSession:
+    """单个常驻的 PaddleOCR MCP 会话，避免把服务器启动和模型加载计入 OCR 耗时"""
+
+    async def __aenter__(self):
+        from mcp import ClientSession
+        from mcp.client.stdio import stdio_client
+        from mcp_app.ocr_pool import server_parameters, resolve_ocr_tool
+        self._stack = contextlib.AsyncExitStack()
+        read, write = await self._stack.enter_async_context(
+            stdio_client(server_parameters("OCR", "local"), errlog=sys.__stderr__)
+        )
+        self.session = await self._stack.enter_async_context(ClientSession(read, write))
+        await self.session.initialize()
+        self.tool, self.arg_name = resolve_ocr_tool((await self.session.list_tools()).tools)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._stack.aclose()
+
+    async def ocr(self, path: str) -> str:
+        result = await self.session.call_tool(self.tool, arguments={self.arg_name: path})
+        return "\n".join(getattr(item, "text", "") for item in result.content or []).strip()
+
+
+async def run(args):
+    images = load_images(args.upload_dir)
+    if not images:
+        print(f"❌ 在 {args.upload_dir} 中没有找到图片")
+        return
+    print(f"🖼️  {len(images)} 张样例图片 (已按内容去重)，每组重复 {args.repeat} 次")
+
+    async with contextlib.AsyncExitStack() as stack:
+        session = None
+        if not args.no_ocr:
+            session = await stack.enter_async_context(OCRSession())
+            # 预热: 首次推理包含模型加载
+            await session.ocr(os.path.abspath(images[0]))
+        await benchmark(images, args.repeat, session)
+
+
+async def benchmark(images, repeat: int, session):
+    """逐组配置预处理并识别，打印汇总表"""
+    references = {}
+    print(f"\n{'配置':<22}{'尺寸':>12}{'预处理ms':>10}{'OCR秒':>9}{'相似度':>9}{'文本长度':>9}")
+    for name, options in VARIANTS:
+        preprocessor = ImagePreprocessor(**options)
+        prep_times, ocr_times, scores, lengths, sizes = [], [], [], [], set()
+        for image in images:
+            for _ in range(repeat):
+                prepared = preprocessor.process(os.path.abspath(image))
+                prep_times.append(prepared.seconds)
+                if prepared.size:
+                    sizes.add(f"{prepared.size[0]}x{prepared.size[1]}")
+                if session is None:
+                    prepared.cleanup()
+                    continue
+                try:
+                    started = time.perf_counter()
+                    text = await session.ocr(prepared.path)
+                    ocr_times.append(time.perf_counter() - started)
+                finally:
+                    prepared.cleanup()
+                references.setdefault(image, text)
+                scores.append(similarity(references[image], text))
+                lengths.append(len(text))
+        size = sizes.pop() if len(sizes) == 1 else ("多种" if sizes else "-")
+        line = f"{name:<22}{size:>12}{_avg(prep_times) * 1000:>10.1f}"
+        if session is not None:
+            line += f"{_avg(ocr_times):>9.2f}{_avg(scores):>9.3f}{_avg(lengths):>9.0f}"
+        print(line)
+
+
+def _avg(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 图片预处理基准测试")
+    parser.add_argument("--upload-dir", default=os.path.join(PROJECT_ROOT, "uploads"))
+    parser.add_argument("--repeat", type=int, default=1, help="每张图片每组配置的重复次数")
+    parser.add_argument("--no-ocr", action="store_true", help="只测预处理耗时 (不需要 PaddleOCR)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 """
 
 import os
+import json
 from typing import Optional
 
 
@@ -17,6 +18,191 @@ class BaseConfig:
     # 兼容旧配置名
     DASHSCOPE_API_KEY = SPARK_API_KEY
     
+    # LLM HTTP连接池配置 (所有节点、所有会话共享同一个连接池)
+    LLM_POOL_CONNECTIONS = int(os.environ.get('LLM_POOL_CONNECTIONS', '4'))    # 缓存的主机连接池数量
+    LLM_POOL_MAXSIZE = int(os.environ.get('LLM_POOL_MAXSIZE', '32'))           # 每个主机保持的最大连接数
+    LLM_POOL_BLOCK = os.environ.get('LLM_POOL_BLOCK', 'true').lower() == 'true'  # 连接耗尽时等待而不是新建临时连接
+    LLM_KEEP_ALIVE = os.environ.get('LLM_KEEP_ALIVE', 'true').lower() == 'true'
+    LLM_KEEP_ALIVE_IDLE = int(os.environ.get('LLM_KEEP_ALIVE_IDLE', '60'))     # TCP keep-alive 空闲探测间隔(秒)
+    LLM_CONNECT_TIMEOUT = float(os.environ.get('LLM_CONNECT_TIMEOUT', '10'))
+    LLM_READ_TIMEOUT = float(os.environ.get('LLM_READ_TIMEOUT', '120'))
+    
+    # LLM响应缓存配置
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '512'))
+    LLM_CACHE_DEFAULT_TTL = int(os.environ.get('LLM_CACHE_DEFAULT_TTL', '3600'))
+    LLM_CACHE_SQLITE_PATH = os.environ.get('LLM_CACHE_SQLITE_PATH', '')  # 例如 cache/llm_cache.sqlite3，多个 worker 进程共享
+    # 按服务方法配置缓存时间(秒)，可通过 JSON 格式的环境变量覆盖
+    LLM_CACHE_METHOD_TTLS = {
+        "research_industry_trends": 6 * 3600,       # 行业研究与用户无关，可长时间复用
+        "analyze_career_goal_clarity": 3600,
+        "create_analysis_strategy": 3600,
+        "analyze_user_profile": 3600,
+        "analyze_career_opportunities": 3600,
+        **json.loads(os.environ.get('LLM_CACHE_METHOD_TTLS', '{}'))
+    }
+    # 不参与缓存的方法 (用户不满意时需要重新生成不同结果)
+    LLM_CACHE_DISABLED_METHODS = [
+        m for m in os.environ.get(
+            'LLM_CACHE_DISABLED_METHODS',
+            'generate_integrated_report,decompose_career_goals,create_action_schedule'
+        ).split(',') if m
+    ]
+    
+    # 并发的相同LLM请求合并为一次上游请求 (single-flight)
+    LLM_SINGLE_FLIGHT_ENABLED = os.environ.get('LLM_SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+
+    # LLM重试策略: 指数退避 + 抖动，只重试可恢复的错误
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', '3'))
+    LLM_RETRY_BASE_DELAY = float(os.environ.get('LLM_RETRY_BASE_DELAY', '1.0'))
+    LLM_RETRY_MAX_DELAY = float(os.environ.get('LLM_RETRY_MAX_DELAY', '20'))
+    LLM_RETRY_BUDGET = float(os.environ.get('LLM_RETRY_BUDGET', '90'))          # 单次调用(含所有重试)的总耗时上限(秒)
+    LLM_RETRYABLE_STATUS_CODES = [
+        int(code) for code in os.environ.get(
+            'LLM_RETRYABLE_STATUS_CODES', '408,425,429,500,502,503,504'
+        ).split(',') if code
+    ]
+
+    # LLM熔断器: 窗口内错误率超过阈值后快速失败，等待恢复后半开探测
+    LLM_BREAKER_FAILURE_THRESHOLD = float(os.environ.get('LLM_BREAKER_FAILURE_THRESHOLD', '0.5'))
+    LLM_BREAKER_MIN_CALLS = int(os.environ.get('LLM_BREAKER_MIN_CALLS', '5'))
+    LLM_BREAKER_WINDOW = float(os.environ.get('LLM_BREAKER_WINDOW', '60'))
+    LLM_BREAKER_RECOVERY_TIMEOUT = float(os.environ.get('LLM_BREAKER_RECOVERY_TIMEOUT', '30'))
+    # 熔断期间使用已过期的缓存结果降级返回，过期超过该时长(秒)的缓存不再使用
+    LLM_CACHE_STALE_GRACE = int(os.environ.get('LLM_CACHE_STALE_GRACE', str(24 * 3600)))
+
+    # LLM全局限流: 所有会话共享，等待的调用按会话轮转放行
+    LLM_RATE_LIMIT_ENABLED = os.environ.get('LLM_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    LLM_RATE_LIMIT_RPS = float(os.environ.get('LLM_RATE_LIMIT_RPS', '4'))       # 每秒请求数，0 表示不限制
+    LLM_RATE_LIMIT_BURST = int(os.environ.get('LLM_RATE_LIMIT_BURST', '8'))      # 允许的突发请求数
+    LLM_RATE_LIMIT_TPM = int(os.environ.get('LLM_RATE_LIMIT_TPM', '120000'))    # 每分钟 token 数，0 表示不限制
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '8'))        # 同时进行的上游请求数上限
+
+    # LLM请求对冲: 流式调用的首个分块超过该方法 TTFT 分位数仍未到达时，再发出一路请求，先输出者胜出
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+    LLM_HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', '95'))
+    LLM_HEDGE_MIN_DELAY = float(os.environ.get('LLM_HEDGE_MIN_DELAY', '1.0'))     # 对冲延迟下限(秒)
+    LLM_HEDGE_MAX_DELAY = float(os.environ.get('LLM_HEDGE_MAX_DELAY', '30'))      # 对冲延迟上限(秒)
+    LLM_HEDGE_MIN_SAMPLES = int(os.environ.get('LLM_HEDGE_MIN_SAMPLES', '20'))    # TTFT 样本数达到后才开始对冲
+    LLM_HEDGE_MAX_RATIO = float(os.environ.get('LLM_HEDGE_MAX_RATIO', '0.1'))     # 对冲请求占调用数的上限
+    LLM_HEDGE_URL = os.environ.get('LLM_HEDGE_URL', '')      # 对冲请求的备用地址，为空时使用主地址
+    LLM_HEDGE_MODEL = os.environ.get('LLM_HEDGE_MODEL', '')  # 对冲请求使用的模型，为空时与主请求相同
+
+    # LLM调用指标: 保留最近多少次调用的明细，是否为每次调用输出一行结构化日志
+    LLM_CALL_METRICS_RECENT = int(os.environ.get('LLM_CALL_METRICS_RECENT', '200'))
+    LLM_CALL_METRICS_LOG = os.environ.get('LLM_CALL_METRICS_LOG', 'true').lower() == 'true'
+
+    # 输出被 max_tokens 截断时的最大续写次数，0 表示不续写
+    LLM_MAX_CONTINUATIONS = int(os.environ.get('LLM_MAX_CONTINUATIONS', '2'))
+
+    # token 预算: 发送前离线估算输入 token，把 max_tokens 调整到模型上下文窗口以内
+    LLM_MODEL_CONTEXT_WINDOWS = {
+        "lite": 4096,
+        "generalv3": 8192,
+        "pro-128k": 131072,
+        "generalv3.5": 8192,
+        "max-32k": 32768,
+        "4.0Ultra": 32768,
+        **json.loads(os.environ.get('LLM_MODEL_CONTEXT_WINDOWS', '{}'))
+    }
+    LLM_MODEL_MAX_OUTPUT_TOKENS = {
+        "lite": 4096,
+        "generalv3": 8192,
+        "pro-128k": 4096,
+        "generalv3.5": 8192,
+        "max-32k": 8192,
+        "4.0Ultra": 8192,
+        **json.loads(os.environ.get('LLM_MODEL_MAX_OUTPUT_TOKENS', '{}'))
+    }
+    LLM_DEFAULT_CONTEXT_WINDOW = int(os.environ.get('LLM_DEFAULT_CONTEXT_WINDOW', '8192'))
+    LLM_PROMPT_TOKEN_BUDGET = int(os.environ.get('LLM_PROMPT_TOKEN_BUDGET', '12000'))      # 提示词 token 上限，0 表示只受窗口限制
+    LLM_PROMPT_OVERFLOW_ACTION = os.environ.get('LLM_PROMPT_OVERFLOW_ACTION', 'compact')  # compact: 压缩提示词; reject: 拒绝请求
+    LLM_MIN_OUTPUT_TOKENS = int(os.environ.get('LLM_MIN_OUTPUT_TOKENS', '1024'))          # 为输出保留的最少 token 数
+
+    # 模型路由: 按服务方法或工作流节点 ("node:节点名") 选择模型档位、温度和 max_tokens
+    LLM_MODEL_TIERS = {
+        "fast": {"model": "lite"},          # 简单判断、短文本
+        "ultra": {"model": "4.0Ultra"},     # 重度综合分析
+        **json.loads(os.environ.get('LLM_MODEL_TIERS', '{}'))
+    }
+    LLM_MODEL_ROUTES = {
+        "analyze_career_goal_clarity": {"tier": "fast", "temperature": 0.3, "max_tokens": 1024},
+        "create_analysis_strategy": {"tier": "fast", "max_tokens": 2048},
+        "analyze_user_profile": {"tier": "ultra", "max_tokens": 5000},
+        "research_industry_trends": {"tier": "ultra", "max_tokens": 5000},
+        "analyze_career_opportunities": {"tier": "ultra", "max_tokens": 5000},
+        "generate_integrated_report": {"tier": "ultra", "max_tokens": 5000},
+        "decompose_career_goals": {"tier": "ultra", "cascade_from": "fast"},
+        "create_action_schedule": {"tier": "ultra", "cascade_from": "fast"},
+        **json.loads(os.environ.get('LLM_MODEL_ROUTES', '{}'))
+    }
+    LLM_MODEL_ROUTES_FILE = os.environ.get('LLM_MODEL_ROUTES_FILE', '')  # JSON 路由文件，修改后自动生效
+    # 管理接口 (/model-routes) 的口令，请求头 X-Admin-Token 需与之一致；未配置时管理接口关闭
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+    # 模型级联: 路由配置了 cascade_from 且节点声明了必需字段时，先用快速模型，输出不合格再升级
+    LLM_CASCADE_ENABLED = os.environ.get('LLM_CASCADE_ENABLED', 'true').lower() == 'true'
+
+    # 分析节点的外部检索 (Tavily) 与 LLM 生成并发执行
+    RETRIEVAL_MAX_WORKERS = int(os.environ.get('RETRIEVAL_MAX_WORKERS', '8'))
+    # 检索结果在截止时间(秒)内返回时注入提示词作为参考资料；开启后提示词随检索结果变化，会降低LLM缓存命中率
+    RETRIEVAL_INJECT_SNIPPETS = os.environ.get('RETRIEVAL_INJECT_SNIPPETS', 'false').lower() == 'true'
+    RETRIEVAL_INJECT_DEADLINE = float(os.environ.get('RETRIEVAL_INJECT_DEADLINE', '3'))
+
+    # 外部搜索结果缓存: 查询语句是确定的，相同查询在有效期内直接复用
+    SEARCH_CACHE_ENABLED = os.environ.get('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+    SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', '256'))
+    SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', str(6 * 3600)))
+    SEARCH_CACHE_NEGATIVE_TTL = int(os.environ.get('SEARCH_CACHE_NEGATIVE_TTL', '60'))  # 失败结果的缓存时间(秒)，避免故障期间每个会话都重试
+    SEARCH_CACHE_SQLITE_PATH = os.environ.get('SEARCH_CACHE_SQLITE_PATH', '')  # 例如 cache/search_cache.sqlite3
+
+    # /start 创建会话后立即预取行业和职位市场数据，分析节点执行时直接取用
+    PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'true').lower() == 'true'
+    PREFETCH_TTL = int(os.environ.get('PREFETCH_TTL', '600'))  # 预取结果保留时间(秒)，超时未取用则丢弃
+
+    # 综合报告上下文打包: 各节点分析结果压缩到 token 预算内，搜索结果只保留相关度最高的摘要
+    REPORT_CONTEXT_TOKEN_BUDGET = int(os.environ.get('REPORT_CONTEXT_TOKEN_BUDGET', '3000'))
+    REPORT_CONTEXT_MAX_SNIPPETS = int(os.environ.get('REPORT_CONTEXT_MAX_SNIPPETS', '3'))
+    REPORT_CONTEXT_SNIPPET_CHARS = int(os.environ.get('REPORT_CONTEXT_SNIPPET_CHARS', '200'))
+
+    # 工作流执行模式: 开启后 /stream 在共享事件循环中以 astream 运行工作流，而不是每个请求一个线程
+    # 默认关闭: SQLite 响应缓存、日志输出、token 估算和 JSON 修复仍在事件循环线程中同步执行，一个慢会话会拖住所有会话
+    WORKFLOW_ASYNC_MODE = os.environ.get('WORKFLOW_ASYNC_MODE', 'false').lower() == 'true'
+    # 简历 OCR 工作进程池: 常驻已初始化的 PaddleOCR MCP 会话，避免每次上传都启动服务器和加载模型
+    OCR_POOL_ENABLED = os.environ.get('OCR_POOL_ENABLED', 'true').lower() == 'true'
+    OCR_POOL_PREWARM = os.environ.get('OCR_POOL_PREWARM', 'true').lower() == 'true'  # 应用启动时预热
+    OCR_POOL_SIZE = int(os.environ.get('OCR_POOL_SIZE', '2'))
+    OCR_POOL_MAX_JOBS = int(os.environ.get('OCR_POOL_MAX_JOBS', '200'))          # 处理多少个任务后重启工作进程
+    OCR_POOL_QUEUE_SIZE = int(os.environ.get('OCR_POOL_QUEUE_SIZE', '16'))       # 排队请求上限，超出时拒绝
+    OCR_JOB_TIMEOUT = float(os.environ.get('OCR_JOB_TIMEOUT', '120'))            # 单次 OCR 超时(秒)
+    OCR_POOL_HEALTH_INTERVAL = float(os.environ.get('OCR_POOL_HEALTH_INTERVAL', '60'))  # 空闲时健康检查间隔(秒)
+    # OCR 前的图片预处理: EXIF 方向纠正、按最长边缩小、转灰度，可选倾斜纠正 (需要 Pillow)
+    OCR_PREPROCESS_ENABLED = os.environ.get('OCR_PREPROCESS_ENABLED', 'true').lower() == 'true'
+    OCR_PREPROCESS_MAX_DIMENSION = int(os.environ.get('OCR_PREPROCESS_MAX_DIMENSION', '2000'))  # 0 表示不缩放
+    OCR_PREPROCESS_GRAYSCALE = os.environ.get('OCR_PREPROCESS_GRAYSCALE', 'true').lower() == 'true'
+    OCR_PREPROCESS_DESKEW = os.environ.get('OCR_PREPROCESS_DESKEW', 'false').lower() == 'true'
+    OCR_PREPROCESS_MAX_SKEW = float(os.environ.get('OCR_PREPROCESS_MAX_SKEW', '5'))         # 倾斜检测的最大角度(度)
+    OCR_PREPROCESS_JPEG_QUALITY = int(os.environ.get('OCR_PREPROCESS_JPEG_QUALITY', '95'))
+    # 多页 PDF 逐页渲染后分发到进程池中的多个工作进程并行识别，结果按页码拼接 (需要 pypdfium2)
+    OCR_PDF_PAGE_PARALLEL = os.environ.get('OCR_PDF_PAGE_PARALLEL', 'true').lower() == 'true'
+    OCR_PDF_RENDER_SCALE = float(os.environ.get('OCR_PDF_RENDER_SCALE', '2.0'))  # 渲染倍率，1.0 对应 72 DPI
+    OCR_PDF_MAX_PAGES = int(os.environ.get('OCR_PDF_MAX_PAGES', '10'))           # 最多识别的页数，0 表示不限制
+    OCR_PDF_PAGE_TIMEOUT = float(os.environ.get('OCR_PDF_PAGE_TIMEOUT', '60'))   # 单页超时(秒，不含排队)，失败的页在结果中留下标记
+    OCR_TIMEOUT = float(os.environ.get('OCR_TIMEOUT', '300'))                    # 一份简历的 OCR 总超时(秒)，含排队和预处理
+
+    # 简历解析任务: 上传后在后台线程池中执行 OCR 和 LLM 解析
+    RESUME_JOB_WORKERS = int(os.environ.get('RESUME_JOB_WORKERS', '4'))
+    RESUME_JOB_MAX_PENDING = int(os.environ.get('RESUME_JOB_MAX_PENDING', '32'))  # 未完成任务数上限
+    RESUME_JOB_TTL = int(os.environ.get('RESUME_JOB_TTL', '3600'))                # 完成的任务保留时长(秒)
+    # 简历解析结果缓存: 文件哈希 -> OCR 文本 -> 用户画像，重复上传直接返回
+    RESUME_CACHE_ENABLED = os.environ.get('RESUME_CACHE_ENABLED', 'true').lower() == 'true'
+    RESUME_CACHE_MAX_ENTRIES = int(os.environ.get('RESUME_CACHE_MAX_ENTRIES', '256'))
+    RESUME_CACHE_TTL = int(os.environ.get('RESUME_CACHE_TTL', str(30 * 24 * 3600)))
+    RESUME_CACHE_SQLITE_PATH = os.environ.get('RESUME_CACHE_SQLITE_PATH', 'cache/resume_cache.sqlite3')  # 为空则只使用进程内缓存
+    RESUME_CACHE_SQLITE_MAX_ENTRIES = int(os.environ.get('RESUME_CACHE_SQLITE_MAX_ENTRIES', '2000'))
+
+    # /stream 无事件时发送心跳的间隔(秒)，用于及时发现客户端断开并取消工作流
+    SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', '15'))
+    
     # 日志配置
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
     LOG_DIR = os.environ.get('LOG_DIR', 'logs')
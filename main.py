@@ -7,6 +7,7 @@ from flask import Flask, send_from_directory, request, g
 from flask_cors import CORS
 from datetime import datetime
 import time
+import atexit
 
 # 导入配置和日志
 from config.config import get_config, validate_config
@@ -77,6 +78,20 @@ def after_request(response):
 app.register_blueprint(career_bp, url_prefix='/api/career')
 main_logger.info("📚 API蓝图注册完成")
 
+def is_reloader_parent() -> bool:
+    """debug 模式下 `python main.py` 的父进程只负责监视文件变化并重启子进程，实际处理请求的是子进程"""
+    return __name__ == '__main__' and app.config['DEBUG'] and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+
+# OCR 工作进程池: 进程退出时关闭工作进程 (未启动时为空操作)；
+# 预热后第一份简历上传时不必再等待 OCR 服务启动和模型加载，重载器的父进程不处理请求，不预热
+if app.config.get('OCR_POOL_ENABLED'):
+    from mcp_app.ocr_pool import ocr_pool
+    atexit.register(ocr_pool.shutdown)
+    if app.config.get('OCR_POOL_PREWARM') and not is_reloader_parent():
+        ocr_pool.start()
+        main_logger.info(f"🔥 OCR 工作进程池预热中 (size={ocr_pool.size})")
+
 main_logger.info("� 无数据库模式，跳过数据库初始化")
 
 @app.route('/', defaults={'path': ''})
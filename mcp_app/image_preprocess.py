@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 前的图片预处理
+手机拍摄的简历照片分辨率高，CPU 上 OCR 耗时主要取决于图片尺寸；
+识别前按 EXIF 纠正方向、按最长边缩小、转灰度，可选纠正小角度倾斜，结果写入临时文件交给 OCR
+"""
+
+import os
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 未安装时跳过预处理
+    Image = ImageOps = None
+
+from config.config import BaseConfig
+from src.utils.logger import workflow_logger
+
+# 只处理这些格式，PDF 等直接交给 OCR
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+
+# 倾斜检测使用的缩略图最长边
+_DESKEW_THUMBNAIL = 800
+
+
+class PreprocessResult:
+    """一次预处理的结果"""
+
+    def __init__(self, path: str, source: str, original_size=None, size=None,
+                 steps: Optional[List[str]] = None, angle: float = 0.0, seconds: float = 0.0):
+        self.path = path
+        self.source = source
+        self.original_size = original_size
+        self.size = size
+        self.steps = steps or []
+        self.angle = angle
+        self.seconds = seconds
+
+    @property
+    def changed(self) -> bool:
+        """是否生成了新的临时文件"""
+        return self.path != self.source
+
+    def cleanup(self):
+        """删除预处理生成的临时文件"""
+        if self.changed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "steps": self.steps,
+            "original_size": list(self.original_size) if self.original_size else None,
+            "size": list(self.size) if self.size else None,
+            "angle": self.angle,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class ImagePreprocessor:
+    """OCR 前的图片预处理 (需要 Pillow)"""
+
+    def __init__(self, enabled: bool = True, max_dimension: int = 2000, grayscale: bool = True,
+                 deskew: bool = False, max_skew: float = 5.0, jpeg_quality: int = 95):
+        """
+        Args:
+            enabled: 是否启用预处理
+            max_dimension: 最长边超过该值时等比缩小，0 表示不缩放
+            grayscale: 是否转为灰度图
+            deskew: 是否检测并纠正小角度倾斜
+            max_skew: 倾斜检测的最大角度(度)
+            jpeg_quality: 输出 JPEG 的质量
+        """
+        self.enabled = enabled and Image is not None
+        self.max_dimension = max_dimension
+        self.grayscale = grayscale
+        self.deskew = deskew
+        self.max_skew = max_skew
+        self.jpeg_quality = jpeg_quality
+        if enabled and Image is None:
+            workflow_logger.warning("未安装 Pillow，跳过 OCR 图片预处理: pip install pillow")
+
+    def applies_to(self, file_path: str) -> bool:
+        return self.enabled and os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS
+
+    def process(self, file_path: str) -> PreprocessResult:
+        """
+        预处理图片，没有任何变化时直接返回原文件
+
+        Args:
+            file_path: 图片路径
+
+        Returns:
+            预处理结果，path 为交给 OCR 的文件 (临时文件用完后调用 cleanup 删除)
+        """
+        started = time.perf_counter()
+        if not self.applies_to(file_path):
+            return PreprocessResult(file_path, file_path)
+
+        steps = []
+        with Image.open(file_path) as original:
+            original_size = original.size
+            image = original
+            if original.getexif().get(0x0112, 1) != 1:  # EXIF Orientation
+                image = ImageOps.exif_transpose(original)
+                steps.append("exif")
+
+            if self.max_dimension and max(image.size) > self.max_dimension:
+                scale = self.max_dimension / max(image.size)
+                image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                     Image.LANCZOS)
+                steps.append("downscale")
+
+            if self.grayscale and image.mode != "L":
+                image = image.convert("L")
+                steps.append("grayscale")
+
+            angle = 0.0
+            if self.deskew:
+                angle = self.detect_skew(image)
+                if angle:
+                    fill = 255 if image.mode == "L" else (255,) * len(image.getbands())
+                    image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+                    steps.append("deskew")
+
+            if not steps:
+                return PreprocessResult(file_path, file_path, original_size, original_size,
+                                        seconds=time.perf_counter() - started)
+
+            if image.mode not in ("L", "RGB"):
+                image = image.convert("RGB")
+            directory = os.path.dirname(os.path.abspath(file_path))
+            output_path = os.path.join(directory, f".ocr-{uuid.uuid4().hex}.jpg")
+            image.save(output_path, "JPEG", quality=self.jpeg_quality)
+
+        result = PreprocessResult(output_path, file_path, original_size, image.size, steps, angle,
+                                  time.perf_counter() - started)
+        workflow_logger.info(
+            f"OCR 预处理: {original_size[0]}x{original_size[1]} -> {image.size[0]}x{image.size[1]} "
+            f"[{','.join(steps)}] 耗时 {result.seconds:.3f}s"
+        )
+        return result
+
+    def detect_skew(self, image) -> float:
+        """
+        投影法检测倾斜角度: 在 ±max_skew 内旋转缩略图，行投影方差最大的角度即文本行水平时的角度
+
+        Returns:
+            需要旋转的角度(度，逆时针为正)，无明显倾斜时为 0
+        """
+        gray = image.convert("L")
+        gray.thumbnail((_DESKEW_THUMBNAIL, _DESKEW_THUMBNAIL))
+        # 反色二值化: 文字为亮，背景为 0，旋转时补 0 不影响投影
+        ink = gray.point(lambda v: 255 if v < 128 else 0)
+
+        def score(angle: float) -> float:
+            # 灰度图每个像素一个字节，tobytes 即各行的平均值
+            rows = list(ink.rotate(angle, resample=Image.NEAREST).resize((1, ink.height), Image.BOX).tobytes())
+            mean = sum(rows) / len(rows)
+            return sum((r - mean) ** 2 for r in rows)
+
+        step = 0.5
+        candidates = [i * step for i in range(-int(self.max_skew / step), int(self.max_skew / step) + 1)]
+        best = max(candidates, key=lambda a: (score(a), -abs(a)))
+        # 粗搜后在相邻区间细化
+        fine = [best + i * 0.1 for i in range(-4, 5)]
+        best = max(fine, key=lambda a: (score(a), -abs(a)))
+        return round(best, 1) if abs(best) >= 0.2 else 0.0
+
+
+# 全局预处理器
+image_preprocessor = ImagePreprocessor(
+    enabled=BaseConfig.OCR_PREPROCESS_ENABLED,
+    max_dimension=BaseConfig.OCR_PREPROCESS_MAX_DIMENSION,
+    grayscale=BaseConfig.OCR_PREPROCESS_GRAYSCALE,
+    deskew=BaseConfig.OCR_PREPROCESS_DESKEW,
+    max_skew=BaseConfig.OCR_PREPROCESS_MAX_SKEW,
+    jpeg_quality=BaseConfig.OCR_PREPROCESS_JPEG_QUALITY
+)
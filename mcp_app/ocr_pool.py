@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PaddleOCR MCP 工作进程池
+常驻若干个已完成 initialize() 和 list_tools() 的 PaddleOCR MCP 会话，
+上传的简历只需排队等待一次 OCR 推理；工作进程定期做健康检查，处理一定数量的任务后重启以回收内存
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import concurrent.futures
+from typing import Dict, Any, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from config.config import BaseConfig
+from src.utils.async_runtime import async_runtime, BackgroundEventLoop
+from src.utils.logger import workflow_logger
+
+
+class OCRPoolBusy(RuntimeError):
+    """OCR 请求队列已满"""
+
+
+def server_parameters(pipeline: str, ppocr_source: str) -> StdioServerParameters:
+    """PaddleOCR MCP 服务器的启动参数"""
+    env = os.environ.copy()
+    env["PADDLEOCR_MCP_PPOCR_SOURCE"] = ppocr_source
+    env["PADDLEOCR_MCP_PIPELINE"] = pipeline
+    return StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "paddleocr_mcp", "--pipeline", pipeline, "--ppocr_source", ppocr_source],
+        env=env
+    )
+
+
+def resolve_ocr_tool(tools: List[Any]) -> Tuple[str, str]:
+    """
+    从 list_tools() 的结果中确定 OCR 工具名和文件参数名
+
+    Returns:
+        (工具名, 参数名)
+    """
+    tool_names = [t.name for t in tools]
+    target_tool = "OCR"
+    if "OCR" not in tool_names:
+        if "ocr" in tool_names:
+            target_tool = "ocr"
+        elif tool_names:
+            target_tool = tool_names[0]
+            print(f"⚠️ 未找到 'OCR' 或 'ocr' 工具，尝试使用第一个可用工具: {target_tool}")
+        else:
+            raise RuntimeError("MCP 服务器未提供任何工具")
+
+    target_tool_obj = next((t for t in tools if t.name == target_tool), None)
+    arg_name = "image"  # 默认值
+    if target_tool_obj and target_tool_obj.inputSchema:
+        properties = target_tool_obj.inputSchema.get("properties", {})
+        # 优先检查 input_data，因为 paddleocr-mcp 0.4.1 使用这个
+        if "input_data" in properties:
+            arg_name = "input_data"
+        elif "image" in properties:
+            arg_name = "image"
+    return target_tool, arg_name
+
+
+class _Job:
+    """
+    一次排队中的 OCR 请求
+
+    future 遵循 concurrent.futures 的约定: 工作进程取到任务时把它标记为运行中，
+    之后调用方无法再取消，只能等工作进程处理结束 (调用方据此判断何时可以删除文件)
+    """
+
+    def __init__(self, file_path: str, timeout: Optional[float]):
+        self.file_path = file_path
+        self.timeout = timeout
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.enqueued = time.monotonic()
+
+
+class OCRWorkerPool:
+    """常驻的 PaddleOCR MCP 会话池，运行在共享事件循环中"""
+
+    def __init__(self, size: int = 2, pipeline: str = "OCR", ppocr_source: str = "local",
+                 max_jobs_per_worker: int = 200, queue_size: int = 16, job_timeout: float = 120.0,
+                 health_interval: float = 60.0, enabled: bool = True,
+                 runtime: Optional[BackgroundEventLoop] = None):
+        """
+        Args:
+            size: 工作进程数 (每个进程各自加载一份模型)
+            pipeline: 产线名称
+            ppocr_source: 能力来源
+            max_jobs_per_worker: 每个工作进程处理多少个任务后重启，0 表示不重启
+            queue_size: 排队请求的上限，队列满时直接拒绝
+            job_timeout: 单次 OCR 的超时时间(秒)，超时的工作进程被重启
+            health_interval: 空闲多久(秒)做一次 ping 健康检查
+            enabled: 是否启用进程池 (关闭时每次上传单独启动 MCP 服务器)
+            runtime: 运行工作进程的事件循环，默认使用共享的 async_runtime
+        """
+        self.size = size
+        self.pipeline = pipeline
+        self.ppocr_source = ppocr_source
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.queue_size = queue_size
+        self.job_timeout = job_timeout
+        self.health_interval = health_interval
+        self.enabled = enabled
+        self.runtime = runtime or async_runtime
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[concurrent.futures.Future] = []
+        self._start_lock = threading.Lock()
+        self._ready = 0
+        self._failing = set()
+        self._last_error: Optional[str] = None
+        self._stats = {
+            "jobs": 0, "failed": 0, "rejected": 0, "timeouts": 0,
+            "started": 0, "recycled": 0, "restarts": 0, "health_failures": 0,
+            "ocr_seconds": 0.0, "queue_seconds": 0.0,
+        }
+
+    def serves(self, pipeline: str, ppocr_source: str) -> bool:
+        """进程池能否处理该产线和能力来源的请求"""
+        return self.enabled and (pipeline, ppocr_source) == (self.pipeline, self.ppocr_source)
+
+    def start(self):
+        """启动工作进程 (幂等、不阻塞，也可在共享事件循环内调用)，可在应用启动时调用以预热"""
+        with self._start_lock:
+            if self._queue is None:
+                # 队列在首次使用时才绑定事件循环，之前到达的请求排队等待工作进程就绪
+                self._queue = asyncio.Queue(maxsize=self.queue_size)
+                self._workers = [self.runtime.submit(self._worker(i)) for i in range(self.size)]
+                workflow_logger.info(f"OCR 工作进程池启动: size={self.size}, pipeline={self.pipeline}")
+
+    def submit(self, file_path: str, timeout: Optional[float] = None) -> concurrent.futures.Future:
+        """
+        提交 OCR 请求 (线程安全)
+
+        Args:
+            file_path: 图片或 PDF 的绝对路径
+            timeout: 本次 OCR 的超时(秒)，从工作进程开始处理时计时 (不含排队时间)，
+                     不超过 job_timeout，为空时使用 job_timeout
+
+        Returns:
+            结果为 MCP call_tool 返回值的 Future；队列已满时以 OCRPoolBusy 结束。
+            排队中的请求可以取消，工作进程开始处理后 cancel() 返回 False
+        """
+        self.start()
+        job = _Job(file_path, timeout)
+        self.runtime.loop.call_soon_threadsafe(self._enqueue, job)
+        return job.future
+
+    async def call(self, file_path: str, timeout: Optional[float] = None) -> Any:
+        """
+        在任意事件循环中等待 OCR 结果 (参数见 submit)
+
+        调用方被取消时，排队中的请求直接丢弃；工作进程已在处理的请求要等它结束才把取消交给调用方，
+        保证调用方在 finally 中删除文件时工作进程已不再读取该文件
+        """
+        future = self.submit(file_path, timeout)
+        try:
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            if not future.cancel():
+                await asyncio.wait([asyncio.wrap_future(future)])
+            raise
+
+    def _enqueue(self, job: _Job):
+        """把请求放入队列 (在共享事件循环中执行)"""
+        if job.future.cancelled():
+            return
+        if self._queue is None:
+            job.future.set_exception(RuntimeError("OCR 工作进程池已关闭"))
+        elif self._ready == 0 and len(self._failing) >= self.size:
+            # 所有工作进程都启动失败 (如未安装 paddleocr-mcp) 时直接报错，而不是让请求一直排队
+            job.future.set_exception(RuntimeError(f"OCR 工作进程不可用: {self._last_error}"))
+        else:
+            try:
+                self._queue.put_nowait(job)
+            except asyncio.QueueFull:
+                self._stats["rejected"] += 1
+                job.future.set_exception(OCRPoolBusy(f"OCR 请求排队已达上限 ({self.queue_size})，请稍后重试"))
+
+    async def _worker(self, index: int):
+        """工作进程主循环: 启动 MCP 会话并持续处理任务，出错或达到任务上限后重启"""
+        backoff = 1.0
+        while True:
+            ready = False
+            try:
+                # 错误输出直接写到原始 stderr，避免被重定向的 sys.stderr 缺少 fileno
+                async with stdio_client(server_parameters(self.pipeline, self.ppocr_source),
+                                        errlog=sys.__stderr__ or sys.stderr) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        tool, arg_name = resolve_ocr_tool((await session.list_tools()).tools)
+                        self._ready += 1
+                        ready = True
+                        self._failing.discard(index)
+                        self._stats["started"] += 1
+                        backoff = 1.0
+                        workflow_logger.info(f"OCR 工作进程 #{index} 就绪: tool={tool}, arg={arg_name}")
+                        try:
+                            await self._serve(session, tool, arg_name)
+                        finally:
+                            self._ready -= 1
+                self._stats["recycled"] += 1
+                workflow_logger.info(f"OCR 工作进程 #{index} 已处理 {self.max_jobs_per_worker} 个任务，重启回收")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._last_error = str(e) or type(e).__name__
+                if not ready:
+                    self._failing.add(index)
+                self._stats["restarts"] += 1
+                workflow_logger.warning(f"OCR 工作进程 #{index} 异常，{backoff:.0f}s 后重启: {self._last_error}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def _serve(self, session: ClientSession, tool: str, arg_name: str):
+        """在一个会话上处理任务，直到达到任务上限；会话异常时抛出以触发重启"""
+        jobs = 0
+        while not self.max_jobs_per_worker or jobs < self.max_jobs_per_worker:
+            try:
+                job = await asyncio.wait_for(self._queue.get(), self.health_interval)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(session.send_ping(), self.job_timeout)
+                except Exception:
+                    self._stats["health_failures"] += 1
+                    raise
+                continue
+            if not job.future.set_running_or_notify_cancel():
+                continue  # 排队期间已被调用方取消
+            started = time.monotonic()
+            self._stats["queue_seconds"] += started - job.enqueued
+            timeout = min(job.timeout or self.job_timeout, self.job_timeout)
+            try:
+                result = await asyncio.wait_for(
+                    session.call_tool(tool, arguments={arg_name: job.file_path}), timeout
+                )
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                self._fail(job, TimeoutError(f"OCR 超时 ({timeout:g}s): {job.file_path}"))
+                # 超时的会话状态未知，重启工作进程
+                raise
+            except asyncio.CancelledError:
+                self._fail(job, RuntimeError("OCR 工作进程已停止"))
+                raise
+            except Exception as e:
+                self._fail(job, e)
+                raise
+            jobs += 1
+            self._stats["jobs"] += 1
+            self._stats["ocr_seconds"] += time.monotonic() - started
+            job.future.set_result(result)
+
+    def _fail(self, job: _Job, error: Exception):
+        self._stats["failed"] += 1
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = dict(self._stats)
+        jobs = stats["jobs"]
+        stats.update({
+            "enabled": self.enabled,
+            "size": self.size,
+            "ready": self._ready,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "avg_ocr_seconds": round(stats.pop("ocr_seconds") / jobs, 3) if jobs else None,
+            "avg_queue_seconds": round(stats.pop("queue_seconds") / jobs, 3) if jobs else None,
+            "last_error": self._last_error,
+        })
+        return stats
+
+    def shutdown(self):
+        """停止所有工作进程"""
+        with self._start_lock:
+            if self._queue is None:
+                return
+            for worker in self._workers:
+                worker.cancel()
+            self._workers = []
+            self._queue = None
+
+
+# 全局 OCR 进程池
+ocr_pool = OCRWorkerPool(
+    size=BaseConfig.OCR_POOL_SIZE,
+    max_jobs_per_worker=BaseConfig.OCR_POOL_MAX_JOBS,
+    queue_size=BaseConfig.OCR_POOL_QUEUE_SIZE,
+    job_timeout=BaseConfig.OCR_JOB_TIMEOUT,
+    health_interval=BaseConfig.OCR_POOL_HEALTH_INTERVAL,
+    enabled=BaseConfig.OCR_POOL_ENABLED
+)
@@ -22,24 +22,36 @@ try:
     from mcp.client.stdio import stdio_client
     from src.services.llm_service import llm_service
     from src.utils.logger import workflow_logger
+    from mcp_app.ocr_pool import ocr_pool, server_parameters, resolve_ocr_tool
+    from mcp_app.image_preprocess import ImagePreprocessor, PreprocessResult, image_preprocessor
+    from mcp_app import pdf_pages
+    from config.config import BaseConfig
 except ImportError as e:
     print(f"导入失败: {e}")
     print("请确保已安装 mcp 和 paddleocr-mcp: pip install mcp paddleocr-mcp[local-cpu]")
     sys.exit(1)
 
+# 多页 PDF 中识别失败的页在结果文本里的占位标记
+PAGE_FAILED_MARKER = "[第 {page} 页识别失败]"
+
 class PaddleOCRClient:
     """PaddleOCR MCP 客户端类"""
     
-    def __init__(self, pipeline: str = "OCR", ppocr_source: str = "local"):
+    def __init__(self, pipeline: str = "OCR", ppocr_source: str = "local",
+                 preprocessor: Optional[ImagePreprocessor] = None):
         """
         初始化客户端
         
         Args:
             pipeline: 产线名称 (OCR, PP-StructureV3, PaddleOCR-VL)
             ppocr_source: 能力来源 (local, aistudio, qianfan, self_hosted)
+            preprocessor: OCR 前的图片预处理，默认使用全局配置
         """
         self.pipeline = pipeline
         self.ppocr_source = ppocr_source
+        self.preprocessor = preprocessor or image_preprocessor
+        # 最近一次识别的预处理与 OCR 耗时
+        self.timings: Dict[str, Any] = {}
         # 获取 python 解释器路径，确保在 conda 环境中运行
         self.python_exe = sys.executable
         
@@ -57,17 +69,116 @@ class PaddleOCRClient:
         abs_file_path = os.path.abspath(file_path)
         if not os.path.exists(abs_file_path):
             raise FileNotFoundError(f"找不到文件: {abs_file_path}")
+        
+        if self._splits_pages(abs_file_path):
+            text = await self._extract_pdf_pages(abs_file_path)
+            if text is not None:
+                return text
             
-        # 设置 MCP 服务器参数
-        env = os.environ.copy()
-        env["PADDLEOCR_MCP_PPOCR_SOURCE"] = self.ppocr_source
-        env["PADDLEOCR_MCP_PIPELINE"] = self.pipeline
+        prepared = await self._preprocess(abs_file_path)
+        started = time.perf_counter()
+        try:
+            if ocr_pool.serves(self.pipeline, self.ppocr_source):
+                # 常驻进程池中的会话已完成初始化，只需排队等待 OCR 推理
+                print(f"正在对文件进行 OCR 识别 (进程池): {abs_file_path}")
+                return self._result_text(await ocr_pool.call(prepared.path))
+            return await self._extract_with_new_server(prepared.path)
+        finally:
+            prepared.cleanup()
+            self.timings["ocr_seconds"] = round(time.perf_counter() - started, 3)
+    
+    def _splits_pages(self, abs_file_path: str) -> bool:
+        """PDF 是否逐页分发到进程池 (单独启动的服务器只有一个会话，无法并行)"""
+        return (BaseConfig.OCR_PDF_PAGE_PARALLEL and pdf_pages.available()
+                and abs_file_path.lower().endswith(".pdf")
+                and ocr_pool.serves(self.pipeline, self.ppocr_source))
+    
+    async def _extract_pdf_pages(self, abs_file_path: str) -> Optional[str]:
+        """
+        逐页渲染 PDF 并在进程池中并行识别，按页码拼接结果
         
-        server_params = StdioServerParameters(
-            command=self.python_exe,
-            args=["-m", "paddleocr_mcp", "--pipeline", self.pipeline, "--ppocr_source", self.ppocr_source],
-            env=env
-        )
+        Returns:
+            拼接后的文本；PDF 无法渲染时返回 None，由调用方整份识别
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            pages = await loop.run_in_executor(
+                None, lambda: pdf_pages.render_pages(
+                    abs_file_path, scale=BaseConfig.OCR_PDF_RENDER_SCALE, max_pages=BaseConfig.OCR_PDF_MAX_PAGES,
+                    grayscale=self.preprocessor.enabled and self.preprocessor.grayscale
+                )
+            )
+        except Exception as e:
+            workflow_logger.warning(f"PDF 分页渲染失败，整份识别: {str(e)}")
+            return None
+        self.timings = {"render_seconds": round(time.perf_counter() - started, 3), "pages": []}
+        print(f"正在对 PDF 的 {len(pages)} 页并行进行 OCR 识别 (进程池): {abs_file_path}")
+        
+        # 同时识别的页数不超过工作进程数，避免一份长简历占满共享的请求队列
+        limit = asyncio.Semaphore(max(1, ocr_pool.size))
+        
+        async def ocr_page(number: int, page_path: str) -> Optional[str]:
+            async with limit:
+                page_started = time.perf_counter()
+                prepared = None
+                try:
+                    try:
+                        prepared = await loop.run_in_executor(None, self.preprocessor.process, page_path)
+                    except Exception as e:
+                        workflow_logger.warning(f"PDF 第 {number} 页预处理失败，使用原始页面: {str(e)}")
+                        prepared = PreprocessResult(page_path, page_path)
+                    # 超时从工作进程开始处理时计时，排队时间不计入；call 返回 (包括被取消) 时工作进程已不再读取页面文件
+                    result = await ocr_pool.call(prepared.path, timeout=BaseConfig.OCR_PDF_PAGE_TIMEOUT)
+                    return self._result_text(result)
+                except TimeoutError:
+                    raise TimeoutError(f"第 {number} 页 OCR 超时 ({BaseConfig.OCR_PDF_PAGE_TIMEOUT:g}s)")
+                finally:
+                    if prepared is not None:
+                        prepared.cleanup()
+                    pdf_pages.remove_pages([page_path])
+                    self.timings["pages"].append({
+                        "page": number, "seconds": round(time.perf_counter() - page_started, 3)
+                    })
+        
+        try:
+            results = await asyncio.gather(
+                *(ocr_page(number, path) for number, path in enumerate(pages, 1)), return_exceptions=True
+            )
+        finally:
+            pdf_pages.remove_pages(pages)
+            self.timings["pages"].sort(key=lambda p: p["page"])
+            self.timings["ocr_seconds"] = round(time.perf_counter() - started, 3)
+        
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        texts = []
+        for number, result in enumerate(results, 1):
+            if isinstance(result, BaseException):
+                # 失败的页在原位置留下标记，解析时能看出该页内容缺失，而不是把前后两页误认为相邻
+                workflow_logger.warning(f"PDF 第 {number} 页识别失败: {str(result) or type(result).__name__}")
+                texts.append(PAGE_FAILED_MARKER.format(page=number))
+            elif result:
+                texts.append(result)
+        self.timings["failed_pages"] = [n for n, r in enumerate(results, 1) if isinstance(r, BaseException)]
+        return "\n\n".join(texts)
+    
+    async def _preprocess(self, abs_file_path: str) -> PreprocessResult:
+        """在线程中预处理图片 (不阻塞事件循环)，失败时使用原图"""
+        try:
+            prepared = await asyncio.get_running_loop().run_in_executor(
+                None, self.preprocessor.process, abs_file_path
+            )
+        except Exception as e:
+            workflow_logger.warning(f"OCR 图片预处理失败，使用原图: {str(e)}")
+            prepared = PreprocessResult(abs_file_path, abs_file_path)
+        self.timings = {"preprocess": prepared.to_dict()}
+        return prepared
+    
+    async def _extract_with_new_server(self, abs_file_path: str) -> str:
+        """单独启动一个 PaddleOCR MCP 服务器完成一次识别 (未启用进程池或产线不同时使用)"""
+        server_params = server_parameters(self.pipeline, self.ppocr_source)
         
         print(f"正在启动 PaddleOCR MCP 服务器 (pipeline={self.pipeline})...")
         
@@ -88,61 +199,16 @@ class PaddleOCRClient:
                     # 初始化会话
                     await session.initialize()
                     
-                    # 获取可用工具列表
+                    # 获取可用工具列表，确定 OCR 工具名和参数名
                     tools_result = await session.list_tools()
-                    tool_names = [t.name for t in tools_result.tools]
-                    print(f"可用 MCP 工具: {tool_names}")
-                    
-                    # 确定要使用的工具名称（优先匹配 OCR 或 ocr）
-                    target_tool = "OCR"
-                    if "OCR" not in tool_names:
-                        if "ocr" in tool_names:
-                            target_tool = "ocr"
-                        elif tool_names:
-                            target_tool = tool_names[0]
-                            print(f"⚠️ 未找到 'OCR' 或 'ocr' 工具，尝试使用第一个可用工具: {target_tool}")
-                        else:
-                            raise RuntimeError("MCP 服务器未提供任何工具")
-                    
-                    # 获取工具详情以确定参数名称
-                    target_tool_obj = next((t for t in tools_result.tools if t.name == target_tool), None)
-                    arg_name = "image" # 默认值
-                    if target_tool_obj and target_tool_obj.inputSchema:
-                        schema = target_tool_obj.inputSchema
-                        properties = schema.get("properties", {})
-                        # 优先检查 input_data，因为 paddleocr-mcp 0.4.1 使用这个
-                        if "input_data" in properties:
-                            arg_name = "input_data"
-                        elif "image" in properties:
-                            arg_name = "image"
-                        print(f"工具 '{target_tool}' 使用参数名: {arg_name}")
+                    print(f"可用 MCP 工具: {[t.name for t in tools_result.tools]}")
+                    target_tool, arg_name = resolve_ocr_tool(tools_result.tools)
+                    print(f"工具 '{target_tool}' 使用参数名: {arg_name}")
                     
                     # 调用 OCR 工具
                     print(f"正在对文件进行 OCR 识别: {abs_file_path}")
                     result = await session.call_tool(target_tool, arguments={arg_name: abs_file_path})
-                    
-                    # 调试：打印原始结果类型
-                    print(f"MCP 返回结果类型: {type(result)}")
-                    
-                    # 处理结果
-                    if hasattr(result, 'content') and result.content:
-                        text_content = ""
-                        for i, item in enumerate(result.content):
-                            # print(f"内容项 {i} 类型: {type(item)}")
-                            if hasattr(item, 'text'):
-                                text_content += item.text + "\n"
-                            elif isinstance(item, dict) and 'text' in item:
-                                text_content += item['text'] + "\n"
-                            else:
-                                # 尝试将整个 item 转为字符串，看看里面有什么
-                                print(f"内容项 {i} 详情: {str(item)[:200]}")
-                        
-                        final_text = text_content.strip()
-                        print(f"提取到的总文本长度: {len(final_text)}")
-                        return final_text
-                    else:
-                        print(f"⚠️ OCR 识别未返回 content 字段或为空: {result}")
-                        return ""
+                    return self._result_text(result)
         except Exception as e:
             print(f"❌ 调用 MCP 服务出错: {e}")
             raise
@@ -150,6 +216,29 @@ class PaddleOCRClient:
             # 恢复标准输出和标准错误
             sys.stdout = old_stdout
             sys.stderr = old_stderr
+    
+    @staticmethod
+    def _result_text(result: Any) -> str:
+        """拼接 OCR 工具返回的文本内容"""
+        # 调试：打印原始结果类型
+        print(f"MCP 返回结果类型: {type(result)}")
+        
+        if hasattr(result, 'content') and result.content:
+            text_content = ""
+            for i, item in enumerate(result.content):
+                if hasattr(item, 'text'):
+                    text_content += item.text + "\n"
+                elif isinstance(item, dict) and 'text' in item:
+                    text_content += item['text'] + "\n"
+                else:
+                    # 尝试将整个 item 转为字符串，看看里面有什么
+                    print(f"内容项 {i} 详情: {str(item)[:200]}")
+            
+            final_text = text_content.strip()
+            print(f"提取到的总文本长度: {len(final_text)}")
+            return final_text
+        print(f"⚠️ OCR 识别未返回 content 字段或为空: {result}")
+        return ""
 
     def parse_to_user_profile(self, ocr_text: str) -> Dict[str, Any]:
         """
@@ -240,6 +329,10 @@ OCR 文本内容：
         ocr_start = time.time()
         ocr_text = await self.extract_text_from_file(file_path)
         ocr_end = time.time()
+        preprocess = self.timings.get("preprocess", {})
+        if preprocess.get("steps"):
+            print(f"图片预处理 {preprocess['original_size']} -> {preprocess['size']} "
+                  f"{preprocess['steps']}，耗时: {preprocess['seconds']:.2f}s")
         print(f"OCR 识别完成，耗时: {ocr_end - ocr_start:.2f}s")
         
         if not ocr_text:
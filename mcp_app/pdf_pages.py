@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 分页渲染
+把多页 PDF 简历逐页渲染为图片，各页可以分发到不同的 OCR 工作进程并行识别
+"""
+
+import os
+import uuid
+from typing import List
+
+try:
+    import pypdfium2 as pdfium  # paddleocr 的依赖，读取 PDF 时已安装
+except ImportError:
+    pdfium = None
+
+
+def available() -> bool:
+    """是否可以分页渲染 PDF"""
+    return pdfium is not None
+
+
+def render_pages(file_path: str, scale: float = 2.0, max_pages: int = 0,
+                 grayscale: bool = False, jpeg_quality: int = 95) -> List[str]:
+    """
+    把 PDF 的每一页渲染为临时 JPEG 文件 (与 PDF 位于同一目录)
+
+    Args:
+        file_path: PDF 路径
+        scale: 渲染倍率 (1.0 对应 72 DPI)
+        max_pages: 最多渲染多少页，0 表示不限制
+        grayscale: 是否渲染为灰度图
+        jpeg_quality: 输出 JPEG 的质量
+
+    Returns:
+        按页码排序的图片路径，调用方负责删除
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    prefix = os.path.join(directory, f".ocr-{uuid.uuid4().hex}")
+    paths: List[str] = []
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        count = len(pdf) if not max_pages else min(len(pdf), max_pages)
+        for index in range(count):
+            page = pdf[index]
+            try:
+                image = page.render(scale=scale, grayscale=grayscale).to_pil()
+                path = f"{prefix}-p{index + 1}.jpg"
+                image.save(path, "JPEG", quality=jpeg_quality)
+                paths.append(path)
+            finally:
+                page.close()
+    except Exception:
+        remove_pages(paths)
+        raise
+    finally:
+        pdf.close()
+    return paths
+
+
+def remove_pages(paths: List[str]):
+    """删除渲染出的页面图片"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -3,18 +3,26 @@
 提供RESTful API接口供前端调用
 """
 
+import hmac
 import json
 import queue
+import functools
 import threading
 import os
 import uuid
 import asyncio
-from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from datetime import datetime
 
 from src.models.career_state import UserProfile, UserSatisfactionLevel
 from src.services.career_graph import career_graph
+from src.services.career_nodes import prefetch_market_data, prefetch_store
+from src.services.cancellation import cancellation_registry
+from src.services.resume_jobs import resume_jobs, ResumeJobError, JobQueueFull, DONE, FAILED
+from src.services.resume_cache import resume_cache
+from src.utils.async_runtime import async_runtime
 from mcp_app.paddle_ocr_client import PaddleOCRClient
+from mcp_app.ocr_pool import ocr_pool, OCRPoolBusy
 
 career_bp = Blueprint('career', __name__)
 
@@ -22,55 +30,131 @@ career_bp = Blueprint('career', __name__)
 session_store = {}
 
 
+def admin_required(view):
+    """管理接口: 请求头 X-Admin-Token 必须与配置的 ADMIN_TOKEN 一致，未配置口令时接口关闭"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if not expected:
+            return jsonify({"error": "管理接口未启用"}), 403
+        provided = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+            return jsonify({"error": "管理口令无效"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
 @career_bp.route('/stream', methods=['GET'])
 def stream_career_planning():
     """
     流式获取职业规划进度
-    使用 SSE (Server-Sent Events)
+    使用 SSE (Server-Sent Events)；客户端断开或调用 /cancel 时取消工作流
     """
     session_id = request.args.get('session_id')
     if not session_id or session_id not in session_store:
         return jsonify({"error": "无效的会话ID"}), 400
 
     initial_state = session_store[session_id]
+    async_mode = current_app.config.get('WORKFLOW_ASYNC_MODE', False)
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_INTERVAL', 15)
     
     def generate():
         q = queue.Queue()
+        token = cancellation_registry.start(session_id)
         
         def callback(data):
-            q.put(data)
+            # 取消后不再堆积无人读取的事件
+            if not token.cancelled:
+                q.put(data)
+        
+        def handle_result(result):
+            if result.get('cancelled'):
+                q.put(json.dumps({"status": "cancelled", "session_id": session_id}))
+            elif result['success']:
+                session_store[session_id] = result['final_state']
+                # 发送完成信号
+                q.put(json.dumps({"status": "completed", "session_id": session_id}))
+            else:
+                q.put(json.dumps({"status": "error", "message": result.get('error', '未知错误')}))
             
         def run_graph():
             try:
-                result = career_graph.run_workflow(initial_state, stream_callback=callback)
-                if result['success']:
-                    session_store[session_id] = result['final_state']
-                    # 发送完成信号
-                    q.put(json.dumps({"status": "completed", "session_id": session_id}))
-                else:
-                    q.put(json.dumps({"status": "error", "message": result.get('error', '未知错误')}))
+                handle_result(career_graph.run_workflow(initial_state, stream_callback=callback, cancel_token=token))
             except Exception as e:
                 q.put(json.dumps({"status": "error", "message": str(e)}))
             finally:
+                cancellation_registry.finish(session_id, token)
                 q.put(None) # 结束信号
+        
+        async def arun_graph():
+            # 取消时直接取消协程，进行中的请求随之关闭；回调在协程开始运行后才登记，
+            # 保证下面的 finally 一定执行 (协程首次运行前被取消时 finally 不会执行)
+            task = asyncio.current_task()
 
-        # 在后台线程运行工作流
-        thread = threading.Thread(target=run_graph)
-        thread.start()
+            def cancel_task():
+                task.get_loop().call_soon_threadsafe(task.cancel)
 
-        while True:
-            data = q.get()
-            if data is None:
-                break
-            yield f"data: {data}\n\n"
+            try:
+                token.add_callback(cancel_task)
+                handle_result(await career_graph.arun_workflow(initial_state, stream_callback=callback, cancel_token=token))
+            except asyncio.CancelledError:
+                q.put(json.dumps({"status": "cancelled", "session_id": session_id}))
+            except Exception as e:
+                q.put(json.dumps({"status": "error", "message": str(e)}))
+            finally:
+                token.remove_callback(cancel_task)
+                cancellation_registry.finish(session_id, token)
+                q.put(None) # 结束信号
+
+        if async_mode:
+            # 在共享事件循环中运行工作流，多个会话共用一个线程
+            async_runtime.submit(arun_graph())
+        else:
+            # 在后台线程运行工作流
+            thread = threading.Thread(target=run_graph)
+            thread.start()
+
+        finished = False
+        try:
+            while True:
+                try:
+                    data = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    # SSE 注释行作为心跳，客户端已断开时写入失败，生成器随即被关闭
+                    yield ": keep-alive\n\n"
+                    continue
+                if data is None:
+                    finished = True
+                    break
+                yield f"data: {data}\n\n"
+        finally:
+            if not finished and token.cancel("client_disconnected"):
+                print(f"🛑 客户端已断开，取消会话 {session_id} 的工作流")
 
     return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
 
+@career_bp.route('/cancel/<session_id>', methods=['POST'])
+def cancel_career_planning(session_id):
+    """
+    取消会话正在运行的工作流 (与客户端断开 /stream 的效果相同)
+    """
+    if session_id not in session_store:
+        return jsonify({"error": "会话不存在"}), 404
+    # 工作流可能尚未开始，创建会话时提交的预取任务也一并丢弃
+    prefetch_store.discard(session_id)
+    if not cancellation_registry.cancel(session_id, "user_cancelled"):
+        return jsonify({"session_id": session_id, "cancelled": False, "message": "会话没有正在运行的工作流"}), 409
+    return jsonify({"session_id": session_id, "cancelled": True})
+
+
 @career_bp.route('/upload-resume', methods=['POST'])
 def upload_resume():
     """
-    上传简历图片并使用 OCR 提取信息
+    上传简历图片或 PDF，创建后台解析任务 (OCR + LLM)
+    
+    立即返回任务ID (202)，进度通过 /resume-jobs/<job_id> 轮询，
+    或通过 /resume-jobs/<job_id>/events (SSE) 订阅
     """
     try:
         if 'file' not in request.files:
@@ -80,58 +164,33 @@ def upload_resume():
         if file.filename == '':
             return jsonify({"error": "未选择文件"}), 400
         
-        if file:
-            # 确保上传目录存在
-            # 路径相对于项目根目录
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            upload_dir = os.path.join(project_root, 'uploads')
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-                
-            # 生成唯一文件名
-            ext = os.path.splitext(file.filename)[1]
-            filename = f"{uuid.uuid4()}{ext}"
-            file_path = os.path.join(upload_dir, filename)
-            file.save(file_path)
-            print(f"文件已保存至: {file_path}")
+        # 确保上传目录存在
+        # 路径相对于项目根目录
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        upload_dir = os.path.join(project_root, 'uploads')
+        if not os.path.exists(upload_dir):
+            os.makedirs(upload_dir)
             
-            try:
-                # 调用 OCR 客户端
-                print("正在初始化 PaddleOCRClient...")
-                client = PaddleOCRClient()
-                
-                # 运行异步任务处理简历
-                print("正在启动异步任务处理简历...")
-                try:
-                    # 尝试获取当前事件循环
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    # 如果没有当前循环，创建一个新的
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                result = loop.run_until_complete(client.process_file(file_path))
-                print(f"简历解析完成，结果长度: {len(str(result))}")
-                
-                # 删除临时文件
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    
-                if not result:
-                    return jsonify({"error": "未能从简历中提取有效信息，请确保图片清晰"}), 422
-                    
-                return jsonify(result)
-            except Exception as e:
-                # 发生错误也尝试删除临时文件
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
-                print(f"OCR 处理过程中发生错误: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                return jsonify({"error": f"解析失败: {str(e)}"}), 500
+        # 生成唯一文件名
+        ext = os.path.splitext(file.filename)[1]
+        filename = f"{uuid.uuid4()}{ext}"
+        file_path = os.path.join(upload_dir, filename)
+        file.save(file_path)
+        print(f"文件已保存至: {file_path}")
+        
+        try:
+            job = resume_jobs.submit(_process_resume, file_path, current_app.config.get('OCR_TIMEOUT', 300),
+                                     filename=file.filename)
+        except JobQueueFull as e:
+            _remove_upload(file_path)
+            return jsonify({"error": str(e)}), 503
+        
+        return jsonify({
+            "job_id": job.id,
+            "stage": job.stage,
+            "status_url": f"/api/career/resume-jobs/{job.id}",
+            "events_url": f"/api/career/resume-jobs/{job.id}/events"
+        }), 202
     except Exception as e:
         print(f"上传简历接口发生未捕获错误: {str(e)}")
         import traceback
@@ -139,6 +198,104 @@ def upload_resume():
         return jsonify({"error": f"服务器内部错误: {str(e)}"}), 500
 
 
+def _process_resume(file_path: str, ocr_timeout: float, progress) -> dict:
+    """
+    简历解析任务: OCR 识别 + LLM 解析 (在任务线程池中执行)
+    
+    先按文件内容哈希查缓存，重复上传的文件跳过 OCR；OCR 文本相同的简历跳过 LLM 解析
+    
+    Args:
+        file_path: 已保存的上传文件
+        ocr_timeout: OCR 总超时(秒)，超时后任务失败
+        progress: 进度回调 progress(stage, detail=None)
+        
+    Returns:
+        用户画像字典
+    """
+    client = PaddleOCRClient()
+    try:
+        file_hash = resume_cache.file_hash(file_path)
+        ocr_text = resume_cache.get_text(file_hash)
+        if ocr_text is None:
+            progress("ocr")
+            # OCR 在共享事件循环中执行 (进程池模式下只是排队等待工作进程)，任务线程阻塞等待结果；
+            # 超时在事件循环内取消，等 OCR 协程真正结束后才返回，之后再删除上传文件
+            try:
+                ocr_text = async_runtime.run(asyncio.wait_for(client.extract_text_from_file(file_path), ocr_timeout))
+            except asyncio.TimeoutError:
+                raise ResumeJobError(f"简历识别超时 ({ocr_timeout:g} 秒)，请稍后重试或上传页数更少的文件", 504)
+            progress("ocr_done", {"text_length": len(ocr_text), **client.timings})
+            resume_cache.set_text(file_hash, ocr_text)
+        else:
+            progress("ocr_done", {"text_length": len(ocr_text), "cached": True})
+        if not ocr_text:
+            raise ResumeJobError("未能从简历中提取有效信息，请确保图片清晰")
+        
+        result = resume_cache.get_profile(ocr_text)
+        if result is not None:
+            progress("parsing", {"cached": True})
+            return result
+        progress("parsing")
+        result = client.parse_to_user_profile(ocr_text)
+        if not result:
+            raise ResumeJobError("未能从简历中提取有效信息，请确保图片清晰")
+        resume_cache.set_profile(ocr_text, result)
+        print(f"简历解析完成，结果长度: {len(str(result))}")
+        return result
+    except OCRPoolBusy as e:
+        raise ResumeJobError(str(e), 503)
+    finally:
+        _remove_upload(file_path)
+
+
+def _remove_upload(file_path: str):
+    """删除上传的临时文件"""
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    except OSError:
+        pass
+
+
+@career_bp.route('/resume-jobs/<job_id>', methods=['GET'])
+def get_resume_job(job_id):
+    """
+    查询简历解析任务的进度和结果
+    """
+    job = resume_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在或已过期"}), 404
+    return jsonify(job.snapshot())
+
+
+@career_bp.route('/resume-jobs/<job_id>/events', methods=['GET'])
+def stream_resume_job(job_id):
+    """
+    以 SSE 推送简历解析任务的进度，最后一个事件 (done / failed) 附带结果或错误信息
+    """
+    job = resume_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在或已过期"}), 404
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_INTERVAL', 15)
+    
+    def generate():
+        sent = 0
+        while True:
+            events = job.wait_events(sent, heartbeat)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            sent += len(events)
+            for event in events:
+                if event["stage"] in (DONE, FAILED):
+                    event = dict(event, result=job.result, error=job.error)
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if job.finished:
+                break
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+
 @career_bp.route('/start', methods=['POST'])
 def start_career_planning():
     """
@@ -198,6 +355,9 @@ def start_career_planning():
         # 存储会话状态
         session_store[session_id] = initial_state
         
+        # 在用户打开进度流之前就开始检索市场数据，分析节点执行时直接取用
+        prefetch_market_data(session_id, user_profile)
+        
         # 立即返回，不在这里运行工作流
         return jsonify({
             "success": True,
@@ -382,3 +542,86 @@ def health_check():
         "active_sessions": len(session_store)
     })
 
+
+
+@career_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """
+    运行指标 (缓存命中率、熔断与限流状态)，供监控采集 (需要管理口令)
+    """
+    from src.services.llm_service import llm_service, search_cache
+    
+    return jsonify({
+        "timestamp": datetime.now().isoformat(),
+        "active_sessions": len(session_store),
+        "llm_cache": llm_service.response_cache.stats(),
+        "llm_single_flight": llm_service.single_flight.stats(),
+        "llm_circuit_breaker": llm_service.circuit_breaker.stats(),
+        "llm_rate_limiter": llm_service.rate_limiter.stats(),
+        "search_cache": search_cache.stats(),
+        "report_context_packer": llm_service.context_packer.stats(),
+        "prompt_tokens": llm_service.prompts.report(),
+        "llm_tokens": llm_service.token_budget.stats(),
+        "llm_cascade": llm_service.cascade_stats.stats(),
+        "llm_hedging": llm_service.hedging.stats(),
+        "llm_calls": llm_service.call_metrics.stats(),
+        "prefetch": prefetch_store.stats(),
+        "ocr_pool": ocr_pool.stats(),
+        "resume_jobs": resume_jobs.stats(),
+        "resume_cache": resume_cache.stats()
+    })
+
+
+@career_bp.route('/llm-calls', methods=['GET'])
+@admin_required
+def get_llm_calls():
+    """
+    LLM 调用指标: 按模型/节点/服务方法汇总的直方图，以及最近的调用明细 (需要管理口令)
+    
+    查询参数: session_id (只看该会话的调用), limit (明细条数，默认 50)
+    """
+    from src.services.llm_service import llm_service
+    
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        "timestamp": datetime.now().isoformat(),
+        "summary": llm_service.call_metrics.stats(),
+        "recent": llm_service.call_metrics.recent(request.args.get('session_id'), limit)
+    })
+
+
+@career_bp.route('/model-routes', methods=['GET'])
+@admin_required
+def get_model_routes():
+    """
+    获取当前的模型路由表 (需要管理口令)
+    """
+    from src.services.llm_service import llm_service
+    
+    return jsonify(llm_service.model_router.routes())
+
+
+@career_bp.route('/model-routes', methods=['PUT'])
+@admin_required
+def update_model_routes():
+    """
+    运行时更新模型路由 (需要管理口令，请求头 X-Admin-Token)
+    
+    请求体:
+    {
+        "routes": {"analyze_career_goal_clarity": {"tier": "fast"}, "node:reporter": {"model": "4.0Ultra"}},
+        "replace": false
+    }
+    路由值为 null 时删除该路由
+    """
+    from src.services.llm_service import llm_service
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('routes'), dict):
+        return jsonify({"error": "缺少必要字段: routes"}), 400
+    try:
+        llm_service.model_router.update(data['routes'], replace=bool(data.get('replace', False)))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"路由配置错误: {str(e)}"}), 400
+    return jsonify(llm_service.model_router.routes())
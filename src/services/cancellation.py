@@ -0,0 +1,119 @@
+"""
+工作流取消
+每次会话运行持有一个取消令牌，经工作流配置传入节点和 LLM 调用上下文：
+取消后正在进行的上游 HTTP 流被关闭，工作流在下一个节点边界停止
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+from src.utils.logger import llm_logger
+
+
+class WorkflowCancelled(Exception):
+    """工作流已被取消"""
+
+    def __init__(self, reason: Optional[str] = None):
+        super().__init__(f"工作流已取消: {reason or 'cancelled'}")
+        self.reason = reason
+
+
+class CancellationToken:
+    """一次会话运行的取消令牌 (线程安全)"""
+
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """
+        取消运行并执行已登记的回调
+
+        Returns:
+            是否为首次取消
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                llm_logger.warning(f"取消回调执行失败: {str(e)}")
+        return True
+
+    def add_callback(self, callback: Callable[[], None]):
+        """登记取消时执行的回调 (如关闭上游响应)，已取消时立即执行"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 WorkflowCancelled"""
+        if self._event.is_set():
+            raise WorkflowCancelled(self.reason)
+
+
+class CancellationRegistry:
+    """会话ID -> 正在运行的工作流的取消令牌"""
+
+    def __init__(self):
+        self._tokens: Dict[str, CancellationToken] = {}
+        self._lock = threading.Lock()
+
+    def start(self, session_id: str) -> CancellationToken:
+        """为一次新的运行创建令牌 (同一会话仍在运行的旧令牌被取消)"""
+        token = CancellationToken(session_id)
+        with self._lock:
+            previous = self._tokens.get(session_id)
+            self._tokens[session_id] = token
+        if previous is not None:
+            previous.cancel("superseded")
+        return token
+
+    def cancel(self, session_id: str, reason: str = "cancelled") -> bool:
+        """
+        取消会话正在进行的运行
+
+        Returns:
+            会话是否有正在进行的运行
+        """
+        with self._lock:
+            token = self._tokens.get(session_id)
+        if token is None:
+            return False
+        if token.cancel(reason):
+            llm_logger.info(f"🛑 会话 {session_id} 的工作流已取消: {reason}")
+        return True
+
+    def finish(self, session_id: str, token: CancellationToken):
+        """运行结束后移除令牌 (只移除本次运行的令牌)"""
+        with self._lock:
+            if self._tokens.get(session_id) is token:
+                del self._tokens[session_id]
+
+    def running(self) -> int:
+        """正在运行的工作流数"""
+        with self._lock:
+            return len(self._tokens)
+
+
+# 全局注册表
+cancellation_registry = CancellationRegistry()
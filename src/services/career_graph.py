@@ -6,21 +6,25 @@ CareerNavigator LangGraph 工作流构建
 import uuid
 import json
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import HumanMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 from src.models.career_state import (
     CareerNavigatorState, WorkflowStage, UserProfile, StateUpdater, 
     UserSatisfactionLevel, create_initial_state
 )
+from src.services.cancellation import CancellationToken, WorkflowCancelled
 from src.services.career_nodes import (
     coordinator_node, planner_node, supervisor_node, 
     user_profiler_node, industry_researcher_node, job_analyzer_node, 
-    reporter_node, goal_decomposer_node, scheduler_node
+    reporter_node, goal_decomposer_node, scheduler_node,
+    acoordinator_node, aplanner_node, asupervisor_node,
+    auser_profiler_node, aindustry_researcher_node, ajob_analyzer_node,
+    areporter_node, agoal_decomposer_node, ascheduler_node, prefetch_store
 )
 
 
@@ -38,16 +42,20 @@ class CareerNavigatorGraph:
         # 创建状态图
         self.workflow = StateGraph(CareerNavigatorState)
         
-        # 添加节点
-        self.workflow.add_node("coordinator", coordinator_node)
-        self.workflow.add_node("planner", planner_node)
-        self.workflow.add_node("supervisor", supervisor_node)
-        self.workflow.add_node("user_profiler", user_profiler_node)
-        self.workflow.add_node("industry_researcher", industry_researcher_node)
-        self.workflow.add_node("job_analyzer", job_analyzer_node)
-        self.workflow.add_node("reporter", reporter_node)
-        self.workflow.add_node("goal_decomposer", goal_decomposer_node)
-        self.workflow.add_node("scheduler", scheduler_node)
+        # 添加节点 (同时注册同步和异步实现，stream/invoke 与 astream/ainvoke 均可运行)
+        nodes = {
+            "coordinator": (coordinator_node, acoordinator_node),
+            "planner": (planner_node, aplanner_node),
+            "supervisor": (supervisor_node, asupervisor_node),
+            "user_profiler": (user_profiler_node, auser_profiler_node),
+            "industry_researcher": (industry_researcher_node, aindustry_researcher_node),
+            "job_analyzer": (job_analyzer_node, ajob_analyzer_node),
+            "reporter": (reporter_node, areporter_node),
+            "goal_decomposer": (goal_decomposer_node, agoal_decomposer_node),
+            "scheduler": (scheduler_node, ascheduler_node),
+        }
+        for name, (func, afunc) in nodes.items():
+            self.workflow.add_node(name, RunnableLambda(func, afunc=afunc, name=name))
         
         # 设置入口点
         self.workflow.set_entry_point("coordinator")
@@ -206,76 +214,90 @@ class CareerNavigatorGraph:
         initial_state["messages"] = [HumanMessage(content=user_message)]
         return initial_state
     
-    def run_workflow(self, initial_state: Dict[str, Any], stream_callback=None) -> Dict[str, Any]:
+    def run_workflow(self, initial_state: Dict[str, Any], stream_callback=None,
+                     cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         """
         运行工作流
         
         Args:
             initial_state: 初始状态或更新的状态字典
             stream_callback: 流式回调函数
+            cancel_token: 取消令牌，取消后关闭进行中的 LLM 请求并在下一个节点边界停止
             
         Returns:
             工作流执行结果
         """
+        # 获取 session_id 作为 thread_id
+        session_id = initial_state.get("session_id")
         try:
-            # 获取 session_id 作为 thread_id
-            session_id = initial_state.get("session_id")
             if not session_id:
                 return {"success": False, "error": "缺少 session_id"}
 
-            # 配置运行参数
-            config = RunnableConfig(
-                recursion_limit=50,
-                configurable={
-                    "stream_callback": stream_callback,
-                    "thread_id": session_id
-                }
-            )
+            config = self._build_run_config(session_id, stream_callback, cancel_token)
             
             # 检查当前图的状态，判断是新开始还是恢复执行
             snapshot = self.app.get_state(config)
-            
-            if snapshot.next:
-                # 如果有 next 节点，说明工作流处于暂停状态（interrupt）
-                print(f"⏭️ 恢复工作流执行，当前暂停在: {snapshot.next}")
-                # 如果 initial_state 包含更新（如用户反馈），则更新状态
-                # 注意：我们只更新非元数据字段
-                update_data = {k: v for k, v in initial_state.items() if k not in ["session_id"]}
-                if update_data:
-                    print(f"📝 更新工作流状态: {list(update_data.keys())}")
-                    self.app.update_state(config, update_data)
-                
-                # 恢复执行时，输入应为 None
-                workflow_input = None
-            else:
-                # 如果没有 next 节点，说明是新开始或已结束
-                print("🚀 开始新的工作流执行")
-                workflow_input = initial_state
+            workflow_input, update_data = self._resolve_workflow_input(snapshot, initial_state)
+            if update_data:
+                self.app.update_state(config, update_data)
             
             # 使用 stream 模式运行
             # 注意：在 stream 模式下，如果遇到 interrupt，循环会正常结束
             for state_update in self.app.stream(workflow_input, config=config):
                 print(f"工作流状态更新: {list(state_update.keys())}")
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
             
             # 无论是否中断，都从 checkpointer 获取完整的最新状态
-            new_snapshot = self.app.get_state(config)
-            final_state = new_snapshot.values
+            return self._build_run_result(self.app.get_state(config), session_id)
+        
+        except WorkflowCancelled as e:
+            return self._cancelled_result(session_id, e)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return {
+                "success": False,
+                "error": f"工作流执行异常: {str(e)}"
+            }
+        finally:
+            # 本次运行没有取走的预取任务 (运行被取消、出错或未走到对应节点) 不再保留
+            prefetch_store.discard(session_id)
+    
+    async def arun_workflow(self, initial_state: Dict[str, Any], stream_callback=None,
+                            cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        """
+        异步运行工作流 (基于 astream，LLM 调用不占用线程)
+        
+        Args:
+            initial_state: 初始状态或更新的状态字典
+            stream_callback: 流式回调函数
+            cancel_token: 取消令牌 (见 run_workflow)
+            
+        Returns:
+            工作流执行结果，结构与 run_workflow 相同
+        """
+        session_id = initial_state.get("session_id")
+        try:
+            if not session_id:
+                return {"success": False, "error": "缺少 session_id"}
 
-            # 检查是否成功执行并获得了状态
-            if final_state:
-                print(f"✅ 工作流执行结束/暂停，当前阶段: {final_state.get('current_stage')}")
-                return {
-                    "success": True,
-                    "final_state": final_state,
-                    "session_id": session_id,
-                    "is_interrupted": bool(new_snapshot.next)
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "工作流执行失败，未获得最终状态"
-                }
-                
+            config = self._build_run_config(session_id, stream_callback, cancel_token)
+            
+            snapshot = await self.app.aget_state(config)
+            workflow_input, update_data = self._resolve_workflow_input(snapshot, initial_state)
+            if update_data:
+                await self.app.aupdate_state(config, update_data)
+            
+            async for state_update in self.app.astream(workflow_input, config=config):
+                print(f"工作流状态更新: {list(state_update.keys())}")
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+            
+            return self._build_run_result(await self.app.aget_state(config), session_id)
+        
+        except WorkflowCancelled as e:
+            return self._cancelled_result(session_id, e)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -283,6 +305,73 @@ class CareerNavigatorGraph:
                 "success": False,
                 "error": f"工作流执行异常: {str(e)}"
             }
+        finally:
+            prefetch_store.discard(session_id)
+    
+    def _build_run_config(self, session_id: str, stream_callback=None,
+                          cancel_token: Optional[CancellationToken] = None) -> RunnableConfig:
+        """构建工作流运行配置"""
+        return RunnableConfig(
+            recursion_limit=50,
+            configurable={
+                "stream_callback": stream_callback,
+                "cancel_token": cancel_token,
+                "thread_id": session_id
+            }
+        )
+    
+    @staticmethod
+    def _cancelled_result(session_id: str, error: WorkflowCancelled) -> Dict[str, Any]:
+        """工作流被取消时的返回结果 (检查点保留在最后完成的节点)"""
+        print(f"🛑 工作流已停止: {error.reason}")
+        return {
+            "success": False,
+            "cancelled": True,
+            "error": str(error),
+            "session_id": session_id
+        }
+    
+    def _resolve_workflow_input(self, snapshot, initial_state: Dict[str, Any]):
+        """
+        根据当前快照判断是新开始还是恢复执行
+        
+        Returns:
+            (工作流输入, 恢复执行前需要写入的状态更新)
+        """
+        if snapshot.next:
+            # 如果有 next 节点，说明工作流处于暂停状态（interrupt）
+            print(f"⏭️ 恢复工作流执行，当前暂停在: {snapshot.next}")
+            # 如果 initial_state 包含更新（如用户反馈），则更新状态
+            # 注意：我们只更新非元数据字段
+            update_data = {k: v for k, v in initial_state.items() if k not in ["session_id"]}
+            if update_data:
+                print(f"📝 更新工作流状态: {list(update_data.keys())}")
+            
+            # 恢复执行时，输入应为 None
+            return None, update_data
+        
+        # 如果没有 next 节点，说明是新开始或已结束
+        print("🚀 开始新的工作流执行")
+        return initial_state, None
+    
+    def _build_run_result(self, new_snapshot, session_id: str) -> Dict[str, Any]:
+        """根据执行后的快照构建返回结果"""
+        final_state = new_snapshot.values
+
+        # 检查是否成功执行并获得了状态
+        if final_state:
+            print(f"✅ 工作流执行结束/暂停，当前阶段: {final_state.get('current_stage')}")
+            return {
+                "success": True,
+                "final_state": final_state,
+                "session_id": session_id,
+                "is_interrupted": bool(new_snapshot.next)
+            }
+        else:
+            return {
+                "success": False,
+                "error": "工作流执行失败，未获得最终状态"
+            }
     
     def update_user_feedback(self, state: CareerNavigatorState, 
                            satisfaction_level: UserSatisfactionLevel,
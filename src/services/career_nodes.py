@@ -5,15 +5,25 @@ CareerNavigator LangGraph 节点实现
 
 import uuid
 import json
-import re
+import asyncio
+import inspect
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Tuple, Optional
 
 from src.models.career_state import (
     CareerNavigatorState, AgentTask, AgentOutput, AgentStatus, 
     WorkflowStage, StateUpdater, UserFeedback, UserSatisfactionLevel
 )
 from src.services.llm_service import llm_service, call_mcp_api
+from src.services.llm_context import llm_call_context, current_cancel_token
+from src.services.cancellation import CancellationToken, WorkflowCancelled
+from src.services.prefetch_store import PrefetchStore
+from src.utils.json_stream import StreamingJSONParser
+from src.utils.json_repair import parse_json_with_repairs
+from config.config import BaseConfig
 
 
 def parse_llm_json_content(content: str) -> Dict[str, Any]:
@@ -27,127 +37,292 @@ def parse_llm_json_content(content: str) -> Dict[str, Any]:
         解析后的字典对象
         
     Raises:
-        json.JSONDecodeError: 当所有解析方法都失败时
+        json.JSONDecodeError: 修复后仍无法解析时
     """
     if not content or not isinstance(content, str):
         raise json.JSONDecodeError("内容为空或格式错误", content or "", 0)
     
-    content = content.strip()
-    
-    # 方法1: 直接解析JSON
+    # 单遍扫描修复: 去除代码块标记、补齐截断的字符串和括号、补充缺失的逗号等
     try:
-        return json.loads(content)
+        parsed, repairs = parse_json_with_repairs(content.strip())
     except json.JSONDecodeError:
-        pass
+        raise json.JSONDecodeError(f"无法解析JSON内容。原始内容: {content[:200]}...", content, 0)
+    
+    if repairs:
+        print(f"🔧 LLM返回的JSON已修复: {', '.join(repairs)}")
+    return parsed
+
+
+from langchain_core.runnables import RunnableConfig
+
+
+# --- 节点驱动 ---
+# 节点逻辑写成生成器: 需要调用 LLM 或阻塞 I/O 时 yield 一个请求对象，
+# 由同步驱动器 (_run_node) 或异步驱动器 (_arun_node) 执行后把结果送回。
+# 这样同一份节点逻辑既可用于 app.stream/invoke，也可用于 app.astream/ainvoke。
+
+class _LLMCall:
+    """节点发起的一次 LLM 服务调用 (llm_service 的方法名及参数)"""
+    
+    def __init__(self, method: str, *args, **kwargs):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+
+class _BlockingCall:
+    """节点发起的一次阻塞调用 (如外部搜索API)，异步模式下在线程池中执行"""
     
-    # 方法2: 提取```json代码块中的内容
-    json_block_pattern = r'```json\s*(.*?)\s*```'
-    json_match = re.search(json_block_pattern, content, re.DOTALL | re.IGNORECASE)
-    if json_match:
+    def __init__(self, func: Callable, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+
+class _BackgroundCall:
+    """
+    节点在后台发起的阻塞调用 (如外部搜索API)，与之后的 LLM 调用并发执行
+    
+    yield 后立即得到一个句柄，稍后通过 _AwaitCall 取结果
+    """
+    
+    def __init__(self, func: Callable, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+
+class _AwaitCall:
+    """等待 _BackgroundCall 的结果；timeout 为空时一直等待，超时返回 None (后台调用继续执行)"""
+    
+    def __init__(self, handle: Any, timeout: Optional[float] = None):
+        self.handle = handle
+        self.timeout = timeout
+
+
+# 后台调用共用的线程池 (同步与异步驱动器共享)
+_background_executor = ThreadPoolExecutor(
+    max_workers=BaseConfig.RETRIEVAL_MAX_WORKERS, thread_name_prefix="node-background"
+)
+
+# /start 时提交的市场数据预取，分析节点执行时取走
+prefetch_store = PrefetchStore(
+    _background_executor, ttl=BaseConfig.PREFETCH_TTL, enabled=BaseConfig.PREFETCH_ENABLED
+)
+
+
+def _stop_if_cancelled(gen, result: Any):
+    """
+    LLM 调用因运行取消而返回时结束节点: 取消结果不能当作普通失败写入状态，
+    否则检查点会保存一份错误的分析结果，下次恢复时直接沿用
+    """
+    if isinstance(result, dict) and result.get("cancelled"):
+        gen.close()
+        token = current_cancel_token.get()
+        raise WorkflowCancelled(token.reason if token else None)
+
+
+def _run_node(steps: Callable, state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+    """同步执行节点步骤"""
+    gen = steps(state, config)
+    if not inspect.isgenerator(gen):
+        return gen
+    
+    result, error = None, None
+    while True:
         try:
-            json_content = json_match.group(1).strip()
-            return json.loads(json_content)
-        except json.JSONDecodeError:
-            pass
-    
-    # 方法3: 提取任意代码块中的内容（可能是```没有指定语言）
-    code_block_pattern = r'```\s*(.*?)\s*```'
-    code_match = re.search(code_block_pattern, content, re.DOTALL)
-    if code_match:
+            op = gen.throw(error) if error is not None else gen.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
         try:
-            json_content = code_match.group(1).strip()
-            return json.loads(json_content)
-        except json.JSONDecodeError:
-            pass
-    
-    # 方法4: 提取{}包围的JSON内容
-    if '{' in content and '}' in content:
+            if isinstance(op, _LLMCall):
+                result = getattr(llm_service, op.method)(*op.args, **op.kwargs)
+                _stop_if_cancelled(gen, result)
+            elif isinstance(op, _BackgroundCall):
+                result = _background_executor.submit(
+                    contextvars.copy_context().run, op.func, *op.args, **op.kwargs
+                )
+            elif isinstance(op, _AwaitCall):
+                try:
+                    result = op.handle.result(timeout=op.timeout)
+                except FutureTimeoutError:
+                    result = None
+            else:
+                result = op.func(*op.args, **op.kwargs)
+        except WorkflowCancelled:
+            raise
+        except Exception as e:
+            error = e
+
+
+async def _arun_node(steps: Callable, state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+    """异步执行节点步骤: LLM 调用走 llm_service 的 a* 协程，阻塞调用放到线程池"""
+    gen = steps(state, config)
+    if not inspect.isgenerator(gen):
+        return gen
+    
+    result, error = None, None
+    while True:
         try:
-            # 找到第一个{和最后一个}
-            start = content.find('{')
-            end = content.rfind('}') + 1
-            json_content = content[start:end]
-            return json.loads(json_content)
-        except json.JSONDecodeError:
-            pass
-    
-    # 方法5: 尝试移除可能的前后缀文本，提取JSON部分
-    lines = content.split('\n')
-    json_lines = []
-    in_json = False
-    brace_count = 0
-    
-    for line in lines:
-        stripped_line = line.strip()
-        if '{' in stripped_line and not in_json:
-            in_json = True
-            json_lines.append(line)
-            brace_count += stripped_line.count('{') - stripped_line.count('}')
-        elif in_json:
-            json_lines.append(line)
-            brace_count += stripped_line.count('{') - stripped_line.count('}')
-            if brace_count == 0:
-                break
-    
-    if json_lines:
+            op = gen.throw(error) if error is not None else gen.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
         try:
-            json_content = '\n'.join(json_lines)
-            return json.loads(json_content)
-        except json.JSONDecodeError:
-            pass
+            if isinstance(op, _LLMCall):
+                result = await getattr(llm_service, f"a{op.method}")(*op.args, **op.kwargs)
+                _stop_if_cancelled(gen, result)
+            elif isinstance(op, _BackgroundCall):
+                result = asyncio.get_running_loop().run_in_executor(
+                    _background_executor,
+                    functools.partial(contextvars.copy_context().run, op.func, *op.args, **op.kwargs)
+                )
+            elif isinstance(op, _AwaitCall):
+                try:
+                    # 句柄也可能是预取得到的 concurrent.futures.Future
+                    result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(op.handle)), op.timeout)
+                except asyncio.TimeoutError:
+                    result = None
+            else:
+                result = await asyncio.to_thread(op.func, *op.args, **op.kwargs)
+        except WorkflowCancelled:
+            raise
+        except Exception as e:
+            error = e
+
+
+def prefetch_market_data(session_id: str, user_profile: Dict[str, Any]):
+    """
+    会话创建后立即在后台预取行业和职位市场数据，
+    参数与 industry_researcher / job_analyzer 节点的任务输入一致
     
-    # 方法6: 处理截断的JSON (尝试补齐括号)
-    try:
-        # 提取最外层的 { } 内容
-        start = content.find('{')
-        if start != -1:
-            json_part = content[start:]
-            # 移除末尾的非JSON字符（如 ```）
-            json_part = re.sub(r'```.*$', '', json_part, flags=re.DOTALL).strip()
-            
-            # 修复常见的列表未闭合问题: "key": ["val" \n "next_key": -> "key": ["val"], \n "next_key":
-            # 这种错误常出现在LLM输出中，它开启了一个列表但忘记关闭就直接写下一个键值对了
-            json_part = re.sub(r'(\[[^\]]*?)\s*\n\s*(\s*\"[\w_]+\"\s*:\s*)', r'\1], \n \2', json_part)
-            
-            # 修复缺失逗号的问题: "key1": "val1" \n "key2": "val2" -> "key1": "val1", \n "key2": "val2"
-            # 匹配模式：一个值后面紧跟换行和下一个键名，但中间没有逗号
-            json_part = re.sub(r'(\"(?:[^\"\\]|\\.)*\"\s*:\s*(?:\"(?:[^\"\\]|\\.)*\"|\d+|true|false|null|\[(?:[^\[\]]|\[[^\[\]]*\])*\]|\{(?:[^{}]|\{[^{}]*\})*\}))\s*\n\s*(\"(?:[^\"\\]|\\.)*\"\s*:\s*)', r'\1, \n \2', json_part)
-
-            # 尝试修复被截断的字符串（如果最后一行没有闭合引号）
-            # 查找最后一个未闭合的引号
-            last_quote = json_part.rfind('"')
-            if last_quote != -1:
-                # 检查这个引号是否是闭合引号
-                # 简单逻辑：如果引号后面紧跟的是 , } ] 或空白，则认为是闭合的
-                remaining = json_part[last_quote+1:].strip()
-                if remaining and not any(c in remaining for c in [',', '}', ']', ':']):
-                    # 可能是截断在字符串中间，尝试补齐引号
-                    json_part += '"'
-            
-            # 统计括号
-            open_braces = json_part.count('{')
-            close_braces = json_part.count('}')
-            open_brackets = json_part.count('[')
-            close_brackets = json_part.count(']')
-            
-            # 补齐缺失的括号
-            fixed_json = json_part
-            if open_brackets > close_brackets:
-                fixed_json += ']' * (open_brackets - close_brackets)
-            if open_braces > close_braces:
-                fixed_json += '}' * (open_braces - close_braces)
-                
-            return json.loads(fixed_json)
-    except:
-        pass
+    Args:
+        session_id: 会话ID
+        user_profile: 用户画像
+    """
+    prefetches = (
+        ("industry_data", "target_industry", user_profile.get("industry")),
+        ("job_market", "target_career", user_profile.get("career_goals")),
+    )
+    for api_name, param, target in prefetches:
+        if target:
+            prefetch_store.submit(session_id, (api_name, target), contextvars.copy_context().run,
+                                  call_mcp_api, api_name, {param: target})
+
+
+def _start_retrieval(state: CareerNavigatorState, config: RunnableConfig, api_name: str,
+                     target: Any, params: Dict[str, Any]):
+    """
+    取得市场数据检索的句柄: 优先使用 /start 时的预取，没有则在后台发起检索
     
-    # 如果所有方法都失败，抛出异常
-    raise json.JSONDecodeError(f"无法解析JSON内容。原始内容: {content[:200]}...", content, 0)
+    Returns:
+        供 _AwaitCall 等待的句柄
+    """
+    prefetched = prefetch_store.take(_session_id(state, config), (api_name, target))
+    if prefetched is not None:
+        print(f"📦 使用预取的 {api_name} 数据")
+        return prefetched
+    return (yield _BackgroundCall(call_mcp_api, api_name, params))
 
 
-from langchain_core.runnables import RunnableConfig
+def _early_search_results(retrieval: Any):
+    """
+    开启检索结果注入时，在截止时间内等待后台检索，拿到的搜索结果作为提示词参考资料
+    
+    Returns:
+        搜索结果列表；未开启、超时或检索失败时为 None
+    """
+    if not BaseConfig.RETRIEVAL_INJECT_SNIPPETS:
+        return None
+    data = yield _AwaitCall(retrieval, timeout=BaseConfig.RETRIEVAL_INJECT_DEADLINE)
+    if not data:
+        print(f"⏱️ 检索未在 {BaseConfig.RETRIEVAL_INJECT_DEADLINE}s 内返回，LLM 调用不附带参考资料")
+        return None
+    return data.get("search_results") or None
 
-def coordinator_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+
+def _node_stream(stream_callback: Optional[Callable], node: str, forward_content: bool = True) -> Callable:
+    """
+    构建节点的 LLM 分块回调
+    
+    原始分块以 {"node", "content"} 事件转发；同时增量解析 JSON，
+    顶层字段或数组元素一完成就以 {"node", "partial"} 事件推送给前端。
+    
+    Args:
+        stream_callback: 工作流的 SSE 回调，为空时分块被丢弃
+        node: 节点名
+        forward_content: 是否转发原始分块
+        
+    Returns:
+        传给 llm_service 的 stream_callback
+    """
+    parser = StreamingJSONParser()
+    
+    def on_chunk(chunk: str):
+        if not stream_callback:
+            return
+        if forward_content:
+            stream_callback(json.dumps({"node": node, "content": chunk}))
+        for event in parser.feed(chunk):
+            stream_callback(json.dumps({"node": node, "partial": event}))
+    
+    return on_chunk
+
+
+def _session_id(state: CareerNavigatorState, config: RunnableConfig = None) -> Optional[str]:
+    """取当前会话ID (优先取工作流配置中的 thread_id)"""
+    if config and config.get("configurable", {}).get("thread_id"):
+        return config["configurable"]["thread_id"]
+    return state.get("session_id")
+
+
+def _cancel_token(config: RunnableConfig = None) -> Optional[CancellationToken]:
+    """取本次运行的取消令牌"""
+    return (config or {}).get("configurable", {}).get("cancel_token")
+
+
+def _make_node(steps: Callable, name: str, required_keys: Tuple[str, ...] = ()) -> Tuple[Callable, Callable]:
+    """
+    由节点步骤生成同步和异步两个节点函数，运行已取消时节点不再执行 (抛出 WorkflowCancelled)；
+    节点执行期间被取消时同样抛出，不返回状态更新，LangGraph 不会为该节点写入检查点
+    
+    Args:
+        steps: 节点步骤生成器函数
+        name: 同步节点函数名 (异步版本加 a 前缀)
+        required_keys: 节点的 LLM 输出必须包含的顶层字段，快速模型的输出缺少这些字段时自动升级模型
+        
+    Returns:
+        (同步节点函数, 异步节点函数)
+    """
+    node_name = name[:-len("_node")] if name.endswith("_node") else name
+    
+    def node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+        token = _cancel_token(config)
+        if token:
+            token.raise_if_cancelled()
+        with llm_call_context(_session_id(state, config), node_name, required_keys, token):
+            updates = _run_node(steps, state, config)
+        if token:
+            token.raise_if_cancelled()
+        return updates
+    
+    async def anode(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+        token = _cancel_token(config)
+        if token:
+            token.raise_if_cancelled()
+        with llm_call_context(_session_id(state, config), node_name, required_keys, token):
+            updates = await _arun_node(steps, state, config)
+        if token:
+            token.raise_if_cancelled()
+        return updates
+    
+    node.__name__, anode.__name__ = name, f"a{name}"
+    node.__doc__ = anode.__doc__ = steps.__doc__
+    return node, anode
+
+
+def _coordinator_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """
     协调员节点 (入口点)
     
@@ -272,10 +447,10 @@ def coordinator_node(state: CareerNavigatorState, config: RunnableConfig = None)
         }
 
     # 调用百炼API分析目标明确度
-    llm_response = llm_service.analyze_career_goal_clarity(
+    llm_response = yield _LLMCall("analyze_career_goal_clarity",
         user_request, 
         user_profile,
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "coordinator", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "coordinator")
     )
     
     if stream_callback:
@@ -332,7 +507,7 @@ def coordinator_node(state: CareerNavigatorState, config: RunnableConfig = None)
         return updates
 
 
-def planner_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _planner_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """
     计划员节点
     
@@ -358,10 +533,10 @@ def planner_node(state: CareerNavigatorState, config: RunnableConfig = None) ->
     print(f"💬 反馈历史: {len(feedback_history)} 条记录")
     
     # 调用百炼API制定分析策略
-    llm_response = llm_service.create_analysis_strategy(
+    llm_response = yield _LLMCall("create_analysis_strategy",
         user_profile, 
         feedback_history,
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "planner", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "planner")
     )
     
     if stream_callback:
@@ -395,7 +570,7 @@ def planner_node(state: CareerNavigatorState, config: RunnableConfig = None) ->
         return updates
 
 
-def supervisor_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _supervisor_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """
     管理员节点
     
@@ -514,7 +689,7 @@ def supervisor_node(state: CareerNavigatorState, config: RunnableConfig = None)
 
 
 # --- 并行分析节点 ---
-def user_profiler_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _user_profiler_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """用户建模节点 (并行)"""
     print("=" * 60)
     print("👤 正在执行: user_profiler_node")
@@ -557,10 +732,10 @@ def user_profiler_node(state: CareerNavigatorState, config: RunnableConfig = Non
     print(f"📤 分析请求: {json.dumps(analysis_request, ensure_ascii=False, indent=2, default=str)}")
     
     # 调用百炼API进行用户画像分析
-    llm_response = llm_service.analyze_user_profile(
+    llm_response = yield _LLMCall("analyze_user_profile",
         analysis_request["user_profile"],
         feedback_adjustments=analysis_request["feedback_adjustments"],
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "user_profiler", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "user_profiler")
     )
     
     if stream_callback:
@@ -610,7 +785,7 @@ def user_profiler_node(state: CareerNavigatorState, config: RunnableConfig = Non
     return updates
 
 
-def industry_researcher_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _industry_researcher_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """行业研究节点 (并行)"""
     print("=" * 60)
     print("🏢 正在执行: industry_researcher_node")
@@ -651,10 +826,15 @@ def industry_researcher_node(state: CareerNavigatorState, config: RunnableConfig
     
     print(f"📤 研究请求: {json.dumps(research_request, ensure_ascii=False, indent=2)}")
     
+    # 市场数据检索与 LLM 生成并发进行
+    retrieval = yield from _start_retrieval(state, config, "industry_data", target_industry, task["input_data"])
+    reference_snippets = yield from _early_search_results(retrieval)
+    
     # 调用百炼API进行行业研究
-    llm_response = llm_service.research_industry_trends(
+    llm_response = yield _LLMCall("research_industry_trends",
         target_industry,
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "industry_researcher", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "industry_researcher"),
+        reference_snippets=reference_snippets
     )
     
     if stream_callback:
@@ -674,8 +854,8 @@ def industry_researcher_node(state: CareerNavigatorState, config: RunnableConfig
         result = {"error": llm_response.get("error", "研究失败")}
         print(f"❌ 研究失败: {result}")
     
-    # 补充模拟的市场数据
-    mcp_data = call_mcp_api("industry_data", task["input_data"])
+    # 补充市场数据 (检索已在 LLM 调用期间进行)
+    mcp_data = yield _AwaitCall(retrieval)
     # print(f"🔗 MCP industry_data 结果: {json.dumps(mcp_data, ensure_ascii=False, indent=2)}")
     #就业市场爬取结果
     result["market_data"] = mcp_data
@@ -710,7 +890,7 @@ def industry_researcher_node(state: CareerNavigatorState, config: RunnableConfig
     return updates
 
 
-def job_analyzer_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _job_analyzer_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """职业分析节点 (并行)"""
     print("=" * 60)
     print("💼 正在执行: job_analyzer_node")
@@ -753,11 +933,16 @@ def job_analyzer_node(state: CareerNavigatorState, config: RunnableConfig = None
     
     print(f"📤 分析请求: {json.dumps(analysis_request, ensure_ascii=False, indent=2, default=str)}")
     
+    # 职位市场检索与 LLM 生成并发进行
+    retrieval = yield from _start_retrieval(state, config, "job_market", target_career, task["input_data"])
+    reference_snippets = yield from _early_search_results(retrieval)
+    
     # 调用百炼API进行职业分析
-    llm_response = llm_service.analyze_career_opportunities(
+    llm_response = yield _LLMCall("analyze_career_opportunities",
         target_career, 
         dict(user_profile),
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "job_analyzer", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "job_analyzer"),
+        reference_snippets=reference_snippets
     )
     
     if stream_callback:
@@ -777,8 +962,8 @@ def job_analyzer_node(state: CareerNavigatorState, config: RunnableConfig = None
         result = {"error": llm_response.get("error", "分析失败")}
         print(f"❌ 分析失败: {result}")
     
-    # 补充模拟的职位市场数据
-    mcp_data = call_mcp_api("job_market", task["input_data"])
+    # 补充职位市场数据 (检索已在 LLM 调用期间进行)
+    mcp_data = yield _AwaitCall(retrieval)
     #print(f"🔗 MCP job_market 结果: {json.dumps(mcp_data, ensure_ascii=False, indent=2)}")
     #职业市场爬取结果
     result["job_market_data"] = mcp_data
@@ -814,7 +999,7 @@ def job_analyzer_node(state: CareerNavigatorState, config: RunnableConfig = None
 
 
 # --- 结果汇总与规划节点 ---
-def reporter_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _reporter_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """
     汇报员节点
     
@@ -871,9 +1056,10 @@ def reporter_node(state: CareerNavigatorState, config: RunnableConfig = None) ->
     
     print(f"📤 综合报告请求: {json.dumps(analysis_results, ensure_ascii=False, indent=2, default=str)}")
     
-    # 调用百炼API生成综合报告 (Reporter节点不需要流式输出)
-    llm_response = llm_service.generate_integrated_report(
-        analysis_results
+    # 调用百炼API生成综合报告 (Reporter节点不转发原始文本，只推送已完成的报告字段)
+    llm_response = yield _LLMCall("generate_integrated_report",
+        analysis_results,
+        stream_callback=_node_stream(stream_callback, "reporter", forward_content=False)
     )
     
     print(f"🤖 LLM原始响应: {json.dumps(llm_response, ensure_ascii=False, indent=2)}")
@@ -947,7 +1133,7 @@ def reporter_node(state: CareerNavigatorState, config: RunnableConfig = None) ->
         return updated_state
 
 
-def goal_decomposer_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _goal_decomposer_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """
     目标拆分节点
     
@@ -983,10 +1169,10 @@ def goal_decomposer_node(state: CareerNavigatorState, config: RunnableConfig = N
     print(f"👤 用户画像: {json.dumps(dict(user_profile), ensure_ascii=False, indent=2)}")
     
     # 调用百炼API进行目标拆分
-    llm_response = llm_service.decompose_career_goals(
+    llm_response = yield _LLMCall("decompose_career_goals",
         career_direction, 
         user_profile,
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "goal_decomposer", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "goal_decomposer")
     )
     
     if stream_callback:
@@ -1026,7 +1212,7 @@ def goal_decomposer_node(state: CareerNavigatorState, config: RunnableConfig = N
     return updated_state
 
 
-def scheduler_node(state: CareerNavigatorState, config: RunnableConfig = None) -> Dict[str, Any]:
+def _scheduler_steps(state: CareerNavigatorState, config: RunnableConfig = None):
     """
     日程计划节点
     
@@ -1064,10 +1250,10 @@ def scheduler_node(state: CareerNavigatorState, config: RunnableConfig = None) -
     print(f"⚙️ 用户约束条件: {json.dumps(user_constraints, ensure_ascii=False, indent=2)}")
     
     # 调用百炼API制定行动计划
-    llm_response = llm_service.create_action_schedule(
+    llm_response = yield _LLMCall("create_action_schedule",
         [career_goals] if career_goals else [], 
         user_constraints,
-        stream_callback=lambda x: stream_callback(json.dumps({"node": "scheduler", "content": x})) if stream_callback else None
+        stream_callback=_node_stream(stream_callback, "scheduler")
     )
     
     if stream_callback:
@@ -1105,3 +1291,19 @@ def scheduler_node(state: CareerNavigatorState, config: RunnableConfig = None) -
     print(f"🔄 状态更新: {json.dumps(updated_state, ensure_ascii=False, indent=2, default=str)}")
     return updated_state
 
+
+# --- 节点入口 (同步版本用于 stream/invoke，a 前缀的异步版本用于 astream/ainvoke) ---
+# required_keys 只对路由配置了 cascade_from 的服务方法生效 (见 BaseConfig.LLM_MODEL_ROUTES)
+coordinator_node, acoordinator_node = _make_node(_coordinator_steps, "coordinator_node")
+planner_node, aplanner_node = _make_node(_planner_steps, "planner_node")
+supervisor_node, asupervisor_node = _make_node(_supervisor_steps, "supervisor_node")
+user_profiler_node, auser_profiler_node = _make_node(_user_profiler_steps, "user_profiler_node")
+industry_researcher_node, aindustry_researcher_node = _make_node(_industry_researcher_steps, "industry_researcher_node")
+job_analyzer_node, ajob_analyzer_node = _make_node(_job_analyzer_steps, "job_analyzer_node")
+reporter_node, areporter_node = _make_node(_reporter_steps, "reporter_node")
+goal_decomposer_node, agoal_decomposer_node = _make_node(
+    _goal_decomposer_steps, "goal_decomposer_node", required_keys=("short_term_goals",)
+)
+scheduler_node, ascheduler_node = _make_node(
+    _scheduler_steps, "scheduler_node", required_keys=("weekly_schedule",)
+)
@@ -0,0 +1,161 @@
+"""
+综合报告上下文打包
+把各节点的分析结果压缩到 token 预算内再交给 LLM: 去掉原始搜索结果和调试字段，
+搜索结果只保留相关度最高的几条摘要，紧凑序列化，超出预算时逐级截断，
+最后按优先级丢弃次要部分
+"""
+
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.utils.token_estimator import estimate_tokens
+from src.utils.logger import CustomJsonEncoder
+
+# 原始搜索结果所在的字段，打包时替换为精简摘要
+SEARCH_PAYLOAD_KEYS = ("market_data", "job_market_data")
+
+# 对报告没有帮助的调试/元数据字段
+NOISE_KEYS = ("raw_response", "iteration_info", "data_sources")
+
+# 各部分的优先级 (数值越小越重要)，超出预算时从最不重要的部分开始丢弃
+DEFAULT_PRIORITIES = {
+    "iteration_context": 0,
+    "career_analysis": 1,
+    "profile_analysis": 2,
+    "industry_research": 3,
+}
+
+# 逐级压缩: (每个来源保留的摘要数, 摘要最大字符数, 字符串最大长度, 列表最大长度)
+_LEVELS = (
+    (None, None, None, None),
+    (1, 120, None, None),
+    (0, 0, 300, None),
+    (0, 0, 150, 5),
+)
+
+
+class ContextPacker:
+    """按 token 预算打包分析结果"""
+
+    def __init__(self, token_budget: int = 3000, max_snippets: int = 3, snippet_chars: int = 200,
+                 priorities: Optional[Dict[str, int]] = None):
+        """
+        初始化打包器
+
+        Args:
+            token_budget: 打包后上下文的 token 上限
+            max_snippets: 每个搜索来源保留的摘要数量 (按相关度排序)
+            snippet_chars: 每条摘要保留的最大字符数
+            priorities: 各部分的优先级，未列出的部分最先被丢弃
+        """
+        self.token_budget = token_budget
+        self.max_snippets = max_snippets
+        self.snippet_chars = snippet_chars
+        self.priorities = dict(priorities or DEFAULT_PRIORITIES)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "original_tokens": 0, "packed_tokens": 0, "over_budget": 0}
+
+    def pack(self, sections: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        打包分析结果
+
+        Args:
+            sections: {部分名称: 分析结果}
+
+        Returns:
+            (紧凑 JSON 文本, 打包报告)
+            打包报告包含 original_tokens (原先 indent=2 序列化的 token 数)、packed_tokens、
+            saved_tokens、level (使用的压缩级别) 和 dropped (被丢弃的部分)
+        """
+        original_tokens = estimate_tokens(
+            json.dumps(sections, ensure_ascii=False, indent=2, cls=CustomJsonEncoder)
+        )
+        plain = json.loads(json.dumps(sections, ensure_ascii=False, cls=CustomJsonEncoder))
+
+        dropped: List[str] = []
+        for level, limits in enumerate(_LEVELS):
+            packed = self._compact(plain, *limits)
+            text = self._dumps(packed)
+            tokens = estimate_tokens(text)
+            if tokens <= self.token_budget:
+                break
+        else:
+            # 截断后仍超出预算: 按优先级丢弃次要部分，至少保留最重要的一部分
+            order = sorted(packed, key=lambda k: self.priorities.get(k, len(self.priorities)), reverse=True)
+            for key in order[:-1]:
+                if tokens <= self.token_budget:
+                    break
+                packed.pop(key)
+                dropped.append(key)
+                text = self._dumps(packed)
+                tokens = estimate_tokens(text)
+
+        report = {
+            "original_tokens": original_tokens,
+            "packed_tokens": tokens,
+            "saved_tokens": max(0, original_tokens - tokens),
+            "level": level,
+            "dropped": dropped,
+        }
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["original_tokens"] += original_tokens
+            self._stats["packed_tokens"] += tokens
+            self._stats["over_budget"] += tokens > self.token_budget
+        return text, report
+
+    def stats(self) -> Dict[str, Any]:
+        """获取累计打包统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["saved_tokens"] = stats["original_tokens"] - stats["packed_tokens"]
+        return stats
+
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    def _compact(self, value: Any, max_snippets: Optional[int], snippet_chars: Optional[int],
+                 max_string: Optional[int], max_items: Optional[int]) -> Any:
+        """递归精简: 去掉空值和调试字段、替换搜索结果、截断过长的字符串和列表"""
+        if isinstance(value, dict):
+            result = {}
+            for key, item in value.items():
+                if key in NOISE_KEYS:
+                    continue
+                if key in SEARCH_PAYLOAD_KEYS and isinstance(item, dict):
+                    item = self._snippets(
+                        item.get("search_results"),
+                        self.max_snippets if max_snippets is None else max_snippets,
+                        self.snippet_chars if snippet_chars is None else snippet_chars
+                    )
+                else:
+                    item = self._compact(item, max_snippets, snippet_chars, max_string, max_items)
+                if item not in (None, "", [], {}):
+                    result[key] = item
+            return result
+        if isinstance(value, list):
+            items = value[:max_items] if max_items else value
+            items = [self._compact(item, max_snippets, snippet_chars, max_string, max_items) for item in items]
+            return [item for item in items if item not in (None, "", [], {})]
+        if isinstance(value, str):
+            value = value.strip()
+            if max_string and len(value) > max_string:
+                return value[:max_string] + "…"
+        return value
+
+    @staticmethod
+    def _snippets(search_results: Any, limit: int, max_chars: int) -> List[Dict[str, str]]:
+        """按相关度 (Tavily 的 score) 保留前 limit 条搜索结果的标题和摘要"""
+        if not isinstance(search_results, list) or limit <= 0:
+            return []
+        results = [r for r in search_results if isinstance(r, dict) and r.get("content")]
+        results.sort(key=lambda r: r.get("score") or 0, reverse=True)
+        snippets = []
+        for r in results[:limit]:
+            snippet = {"content": " ".join(str(r["content"]).split())[:max_chars]}
+            if r.get("title"):
+                snippet = {"title": r["title"], **snippet}
+            snippets.append(snippet)
+        return snippets
@@ -0,0 +1,240 @@
+"""
+LLM 响应缓存
+以 (模型, 温度, max_tokens, 完整提示词) 的哈希为键缓存模型输出，
+进程内 LRU 为一级缓存，可选的 SQLite 文件为二级缓存 (多个 worker 进程共享)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from src.utils.logger import llm_logger
+
+
+class LLMResponseCache:
+    """内容寻址的 LLM 响应缓存 (LRU + TTL，可选 SQLite 持久层)"""
+
+    def __init__(self, max_entries: int = 512, default_ttl: int = 3600,
+                 method_ttls: Optional[Dict[str, int]] = None,
+                 disabled_methods: Optional[list] = None,
+                 sqlite_path: Optional[str] = None,
+                 enabled: bool = True,
+                 stale_grace: int = 0,
+                 sqlite_max_entries: int = 0):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 进程内 LRU 最大条目数
+            default_ttl: 未单独配置的方法使用的过期时间(秒)
+            method_ttls: 按服务方法配置的过期时间(秒)，0 表示不缓存
+            disabled_methods: 不参与缓存的服务方法
+            sqlite_path: SQLite 缓存文件路径，为空则只使用进程内缓存
+            enabled: 缓存总开关
+            stale_grace: 过期条目保留多久(秒)以供降级读取 (get_stale)，0 表示过期即失效
+            sqlite_max_entries: SQLite 层最大条目数，超出时淘汰最早过期的条目，0 表示不限制
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.method_ttls = dict(method_ttls or {})
+        self.disabled_methods = set(disabled_methods or [])
+        self.sqlite_path = sqlite_path or None
+        self.stale_grace = stale_grace
+        self.sqlite_max_entries = sqlite_max_entries
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "sqlite_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "stale_hits": 0,
+                       "sqlite_evictions": 0}
+
+        if self.sqlite_path:
+            self._init_sqlite()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int, full_prompt: str) -> str:
+        """
+        计算缓存键
+
+        Args:
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大token数
+            full_prompt: 发送给模型的完整提示词
+
+        Returns:
+            sha256 十六进制摘要
+        """
+        raw = json.dumps([model, temperature, max_tokens, full_prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, method: Optional[str]) -> int:
+        """获取服务方法对应的缓存时间，返回 0 表示该方法不缓存"""
+        if not self.enabled or method in self.disabled_methods:
+            return 0
+        return int(self.method_ttls.get(method, self.default_ttl))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存 (先查进程内 LRU，再查 SQLite)
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果字典，未命中或已过期返回 None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return dict(value)
+                if expires_at + self.stale_grace <= now:
+                    del self._entries[key]
+
+        if self.sqlite_path:
+            row = self._sqlite_get(key, now)
+            if row is not None:
+                expires_at, value = row
+                self._remember(key, value, expires_at)
+                with self._lock:
+                    self._stats["sqlite_hits"] += 1
+                return dict(value)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def get_stale(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存，允许返回已过期但仍在 stale_grace 内的条目 (上游不可用时降级使用)
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果字典，不存在或过期太久返回 None
+        """
+        if not self.stale_grace:
+            return None
+        oldest = time.time() - self.stale_grace
+        with self._lock:
+            entry = self._entries.get(key)
+            value = entry[1] if entry is not None and entry[0] > oldest else None
+        if value is None and self.sqlite_path:
+            row = self._sqlite_get(key, oldest)
+            value = row[1] if row is not None else None
+        if value is None:
+            return None
+        with self._lock:
+            self._stats["stale_hits"] += 1
+        return dict(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 结果字典 (需可 JSON 序列化)
+            ttl: 过期时间(秒)
+        """
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        with self._lock:
+            self._stats["sets"] += 1
+        if self.sqlite_path:
+            self._sqlite_set(key, value, expires_at)
+
+    def clear(self):
+        """清空所有缓存层"""
+        with self._lock:
+            self._entries.clear()
+        if self.sqlite_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM llm_cache")
+            except sqlite3.Error as e:
+                llm_logger.warning(f"清空SQLite缓存失败: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["sqlite_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["sqlite_enabled"] = bool(self.sqlite_path)
+        return stats
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float):
+        """写入进程内 LRU，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = (expires_at, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    # --- SQLite 持久层 ---
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.sqlite_path, timeout=5)
+
+    def _init_sqlite(self):
+        try:
+            directory = os.path.dirname(os.path.abspath(self.sqlite_path))
+            os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time() - self.stale_grace,))
+        except sqlite3.Error as e:
+            llm_logger.warning(f"SQLite缓存初始化失败，仅使用进程内缓存: {str(e)}")
+            self.sqlite_path = None
+
+    def _sqlite_get(self, key: str, now: float) -> Optional[tuple]:
+        """读取 expires_at 晚于 now 的条目"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT expires_at, value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+            if row:
+                return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            llm_logger.warning(f"读取SQLite缓存失败: {str(e)}")
+        return None
+
+    def _sqlite_set(self, key: str, value: Dict[str, Any], expires_at: float):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                if self.sqlite_max_entries > 0:
+                    evicted = conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN ("
+                        "SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                        (self.sqlite_max_entries,)
+                    ).rowcount
+                    if evicted > 0:
+                        with self._lock:
+                            self._stats["sqlite_evictions"] += evicted
+        except (sqlite3.Error, TypeError) as e:
+            llm_logger.warning(f"写入SQLite缓存失败: {str(e)}")
@@ -0,0 +1,97 @@
+"""
+模型级联
+先用快速模型生成，输出被截断、不是合法 JSON (只允许去掉代码块标记和前后说明文字)
+或缺少必需字段时再升级到路由指定的模型；
+按服务方法统计升级次数和两条路径的耗时，用于衡量级联带来的延迟收益
+"""
+
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+from src.utils.histogram import Histogram, LATENCY_BUCKETS
+from src.utils.json_repair import (
+    parse_json_with_repairs, STRIP_FENCE, STRIP_PREFIX, STRIP_SUFFIX,
+    CLOSE_STRING, CLOSE_ARRAY, CLOSE_OBJECT, DROP_INCOMPLETE_MEMBER
+)
+
+# 升级原因
+REQUEST_FAILED = "request_failed"
+TRUNCATED = "truncated"
+PARSE_ERROR = "parse_error"
+MISSING_KEYS = "missing_keys"
+
+# 不改变 JSON 内容的修复，快速模型的输出只允许这几项
+_COSMETIC_REPAIRS = {STRIP_FENCE, STRIP_PREFIX, STRIP_SUFFIX}
+# 说明输出被截断的修复
+_TRUNCATION_REPAIRS = {CLOSE_STRING, CLOSE_ARRAY, CLOSE_OBJECT, DROP_INCOMPLETE_MEMBER}
+
+
+def schema_problem(result: Dict[str, Any], required_keys: Iterable[str]) -> Optional[str]:
+    """
+    检查快速模型的输出是否可用
+
+    Args:
+        result: call_llm 的返回结果
+        required_keys: 顶层必需字段 (值为空也视为缺失)
+
+    Returns:
+        不可用的原因 (REQUEST_FAILED / TRUNCATED / PARSE_ERROR / MISSING_KEYS)，可用时返回 None
+    """
+    if not result.get("success"):
+        return REQUEST_FAILED
+    if result.get("finish_reason") == "length" or result.get("truncated"):
+        return TRUNCATED
+    try:
+        parsed, repairs = parse_json_with_repairs((result.get("content") or "").strip())
+    except ValueError:
+        return PARSE_ERROR
+    if _TRUNCATION_REPAIRS.intersection(repairs):
+        return TRUNCATED
+    if not isinstance(parsed, dict) or not _COSMETIC_REPAIRS.issuperset(repairs):
+        return PARSE_ERROR
+    if any(parsed.get(key) in (None, "", [], {}) for key in required_keys):
+        return MISSING_KEYS
+    return None
+
+
+class CascadeStats:
+    """级联统计: 每个方法的快速模型采纳次数、升级次数及原因、两条路径的耗时直方图"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, method: Optional[str], elapsed: float, reason: Optional[str] = None):
+        """
+        记录一次级联调用
+
+        Args:
+            method: 服务方法名
+            elapsed: 整个调用 (含升级) 的耗时(秒)
+            reason: 升级原因，未升级时为 None
+        """
+        with self._lock:
+            stats = self._methods.setdefault(method or "unknown", {
+                "calls": 0, "accepted": 0, "escalated": 0, "reasons": {},
+                "accepted_latency": Histogram(LATENCY_BUCKETS),
+                "escalated_latency": Histogram(LATENCY_BUCKETS),
+            })
+            stats["calls"] += 1
+            if reason is None:
+                stats["accepted"] += 1
+                hist = stats["accepted_latency"]
+            else:
+                stats["escalated"] += 1
+                stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+                hist = stats["escalated_latency"]
+        hist.observe(elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            methods = {m: dict(s, reasons=dict(s["reasons"])) for m, s in self._methods.items()}
+        for stats in methods.values():
+            stats["escalation_rate"] = round(stats["escalated"] / stats["calls"], 4) if stats["calls"] else 0.0
+            stats["accepted_latency"] = stats["accepted_latency"].snapshot()
+            stats["escalated_latency"] = stats["escalated_latency"].snapshot()
+        return methods
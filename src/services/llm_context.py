@@ -0,0 +1,54 @@
+"""
+LLM 调用上下文
+记录当前调用所属的会话和工作流节点，供限流、监控等按会话区分调用方；
+节点还可以声明其输出必须包含的字段，供模型级联判断是否需要升级；
+会话运行的取消令牌也经由上下文传给 LLM 调用，取消时关闭上游请求
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# 未绑定会话的调用 (如简历解析) 归入同一个匿名队列
+ANONYMOUS_SESSION = "_anonymous"
+
+current_session_id: ContextVar[Optional[str]] = ContextVar("llm_session_id", default=None)
+current_node: ContextVar[Optional[str]] = ContextVar("llm_node", default=None)
+current_required_keys: ContextVar[Tuple[str, ...]] = ContextVar("llm_required_keys", default=())
+# CancellationToken (见 src.services.cancellation)
+current_cancel_token: ContextVar[Optional[Any]] = ContextVar("llm_cancel_token", default=None)
+
+
+@contextmanager
+def llm_call_context(session_id: Optional[str] = None, node: Optional[str] = None,
+                     required_keys: Sequence[str] = (), cancel_token: Optional[Any] = None):
+    """
+    在上下文内绑定会话和节点
+
+    Args:
+        session_id: 会话ID
+        node: 工作流节点名
+        required_keys: 节点的 LLM 输出必须包含的顶层字段
+        cancel_token: 会话运行的取消令牌
+    """
+    session_token = current_session_id.set(session_id)
+    node_token = current_node.set(node)
+    keys_token = current_required_keys.set(tuple(required_keys))
+    cancel_token_token = current_cancel_token.set(cancel_token)
+    try:
+        yield
+    finally:
+        current_cancel_token.reset(cancel_token_token)
+        current_required_keys.reset(keys_token)
+        current_node.reset(node_token)
+        current_session_id.reset(session_token)
+
+
+def get_session_id() -> str:
+    """获取当前会话ID，未绑定时返回匿名会话"""
+    return current_session_id.get() or ANONYMOUS_SESSION
+
+
+def get_call_tags() -> Dict[str, Optional[str]]:
+    """获取当前调用的标签 (会话、节点)"""
+    return {"session_id": current_session_id.get(), "node": current_node.get()}
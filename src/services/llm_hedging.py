@@ -0,0 +1,195 @@
+"""
+LLM 请求对冲 (hedging)
+按服务方法统计流式调用的首个分块耗时 (TTFT)，首个分块在 TTFT 分位数之内仍未到达时，
+再发出一个相同的请求 (可指向备用地址或模型)，先开始输出的一路胜出，另一路被取消
+"""
+
+import time
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from src.utils.histogram import Histogram, LATENCY_BUCKETS
+
+# 竞争中的两路请求
+PRIMARY = 0
+HEDGE = 1
+
+
+class HedgeLost(Exception):
+    """落败的一路继续收到分块时抛出，用于中止其读取"""
+
+
+class HedgeRace:
+    """一次对冲调用中两路请求的竞争: 第一个送达分块的一路独占 stream_callback"""
+
+    def __init__(self, stream_callback: Optional[Callable[[str], None]] = None,
+                 on_claim: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            stream_callback: 调用方的流式回调，只接收胜出一路的分块
+            on_claim: 决出胜者或竞争结束时调用 (异步调用用于唤醒事件循环中的等待)
+        """
+        self.started = time.monotonic()
+        self.winner: Optional[int] = None
+        self.ttft: Optional[float] = None
+        self.fired = False
+        self.closed = False
+        self.hedging_stopped = False
+        self._callback = stream_callback
+        self._on_claim = on_claim
+        self._cancels: Dict[int, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    def emitter(self, lane: int) -> Callable[[str], None]:
+        """某一路请求使用的流式回调"""
+        def emit(chunk: str):
+            with self._lock:
+                claimed = self.winner is None and not self.closed
+                if claimed:
+                    self.winner = lane
+                    self.ttft = time.monotonic() - self.started
+                won = self.winner == lane
+            if claimed:
+                self._settle(cancel_except=lane)
+            if not won:
+                raise HedgeLost()
+            if self._callback:
+                self._callback(chunk)
+        return emit
+
+    def bind(self, lane: int, cancel: Callable[[], None]):
+        """登记中止某一路请求的方法 (关闭响应或取消任务)，该路已落败时立即中止"""
+        with self._lock:
+            self._cancels[lane] = cancel
+            lost = self.winner is not None and self.winner != lane
+        if lost:
+            _quietly(cancel)
+
+    def begin_hedge(self, allow: Callable[[], bool]) -> bool:
+        """
+        准备发出对冲请求
+
+        Args:
+            allow: 竞争尚未决出时调用，返回是否允许对冲 (占用对冲名额)
+
+        Returns:
+            是否发出对冲请求
+        """
+        with self._lock:
+            if self.winner is not None or self.closed or self.hedging_stopped or not allow():
+                return False
+            self.fired = True
+            return True
+
+    def stop_hedging(self):
+        """主请求已结束: 之后不再发出对冲请求，已发出的对冲请求继续进行"""
+        with self._lock:
+            self.hedging_stopped = True
+
+    def close(self):
+        """主请求结束: 不再发出对冲请求，并中止未胜出的一路"""
+        with self._lock:
+            self.closed = True
+        self._settle(cancel_except=self.winner)
+
+    def _settle(self, cancel_except: Optional[int]):
+        with self._lock:
+            cancels = [c for lane, c in self._cancels.items() if lane != cancel_except]
+        for cancel in cancels:
+            _quietly(cancel)
+        if self._on_claim:
+            self._on_claim()
+
+
+def _quietly(cancel: Callable[[], None]):
+    try:
+        cancel()
+    except Exception:
+        pass
+
+
+class HedgePolicy:
+    """按服务方法记录 TTFT 直方图，并据此决定对冲延迟和是否允许对冲"""
+
+    def __init__(self, enabled: bool = False, percentile: float = 95, min_delay: float = 1.0,
+                 max_delay: float = 30.0, min_samples: int = 20, max_ratio: float = 0.1,
+                 url: Optional[str] = None, model: Optional[str] = None):
+        """
+        Args:
+            enabled: 是否启用对冲 (关闭时仍统计 TTFT)
+            percentile: 对冲延迟取该方法 TTFT 的哪个分位数
+            min_delay: 对冲延迟下限(秒)
+            max_delay: 对冲延迟上限(秒)
+            min_samples: 该方法至少有多少个 TTFT 样本才开始对冲
+            max_ratio: 对冲请求数占调用数的上限，防止上游整体变慢时请求量翻倍
+            url: 对冲请求的备用地址，为空时使用主地址
+            model: 对冲请求使用的模型，为空时与主请求相同
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.url = url or None
+        self.model = model or None
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Dict[str, Any]] = {}
+
+    def hedge_delay(self, method: Optional[str]) -> Optional[float]:
+        """
+        本次调用的对冲延迟(秒)
+
+        Returns:
+            延迟秒数，未启用或样本不足时返回 None (不对冲)
+        """
+        if not self.enabled:
+            return None
+        ttft = self._stats(method)["ttft"]
+        if ttft.count < self.min_samples:
+            return None
+        return min(self.max_delay, max(self.min_delay, ttft.percentile(self.percentile)))
+
+    def try_hedge(self, method: Optional[str]) -> bool:
+        """对冲比例未超过上限时占用一次对冲名额"""
+        stats = self._stats(method)
+        with self._lock:
+            if stats["hedged"] >= self.max_ratio * max(1, stats["calls"]):
+                stats["suppressed"] += 1
+                return False
+            stats["hedged"] += 1
+            return True
+
+    def hedge_body(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """对冲请求的请求体"""
+        return dict(body, model=self.model) if self.model else body
+
+    def record(self, method: Optional[str], race: HedgeRace):
+        """记录一次流式调用的 TTFT 和对冲结果"""
+        stats = self._stats(method)
+        with self._lock:
+            stats["calls"] += 1
+            if race.winner == HEDGE:
+                stats["hedge_won"] += 1
+        if race.ttft is not None:
+            stats["ttft"].observe(race.ttft)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            methods = {m: dict(s) for m, s in self._methods.items()}
+        report = {}
+        for method, stats in methods.items():
+            ttft = stats.pop("ttft").snapshot()
+            stats["hedge_rate"] = round(stats["hedged"] / stats["calls"], 4) if stats["calls"] else 0.0
+            stats["ttft"] = ttft
+            stats["hedge_delay"] = self.hedge_delay(method)
+            report[method] = stats
+        return {"enabled": self.enabled, "percentile": self.percentile, "methods": report}
+
+    def _stats(self, method: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            return self._methods.setdefault(method or "unknown", {
+                "calls": 0, "hedged": 0, "hedge_won": 0, "suppressed": 0,
+                "ttft": Histogram(LATENCY_BUCKETS),
+            })
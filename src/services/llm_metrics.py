@@ -0,0 +1,167 @@
+"""
+LLM 调用指标
+记录每次上游请求的连接耗时、首个分块耗时 (TTFT)、分块间隔、总耗时、输出速度和 usage，
+按会话、节点、模型打标签，汇总为滚动直方图，并为每次调用输出一行紧凑的结构化日志
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional
+
+from src.services.llm_context import get_call_tags
+from src.utils.histogram import Histogram, LATENCY_BUCKETS, GAP_BUCKETS, RATE_BUCKETS, TOKEN_BUCKETS
+from src.utils.logger import llm_logger
+from src.utils.token_estimator import estimate_tokens
+
+# 汇总的指标及其分桶
+_METRIC_BUCKETS = {
+    "connect": LATENCY_BUCKETS,
+    "ttft": LATENCY_BUCKETS,
+    "gap": GAP_BUCKETS,
+    "duration": LATENCY_BUCKETS,
+    "tokens_per_sec": RATE_BUCKETS,
+    "output_tokens": TOKEN_BUCKETS,
+}
+
+
+class CallTimer:
+    """一次上游请求的计时器"""
+
+    def __init__(self, stream_callback: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            stream_callback: 被包装的流式回调，分块经 feed 转发
+        """
+        self.started = time.monotonic()
+        self.connect: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.gaps: List[float] = []
+        self.chunks = 0
+        self._last_chunk: Optional[float] = None
+        self._callback = stream_callback
+
+    def connected(self):
+        """收到响应头"""
+        if self.connect is None:
+            self.connect = time.monotonic() - self.started
+
+    def feed(self, chunk: str):
+        """收到一个流式分块"""
+        now = time.monotonic()
+        if self._last_chunk is None:
+            self.ttft = now - self.started
+        else:
+            self.gaps.append(now - self._last_chunk)
+        self._last_chunk = now
+        self.chunks += 1
+        if self._callback:
+            self._callback(chunk)
+
+    def finish(self) -> "CallTimer":
+        self.duration = time.monotonic() - self.started
+        return self
+
+
+class LLMCallMetrics:
+    """按模型、节点、服务方法汇总的 LLM 调用指标"""
+
+    def __init__(self, recent_size: int = 200, log_enabled: bool = True):
+        """
+        Args:
+            recent_size: 保留最近多少次调用的明细
+            log_enabled: 是否为每次调用输出一行结构化日志
+        """
+        self.log_enabled = log_enabled
+        self._recent = deque(maxlen=recent_size)
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timer: CallTimer, body: Dict[str, Any], result: Optional[Dict[str, Any]],
+               method: Optional[str] = None) -> Dict[str, Any]:
+        """
+        记录一次上游请求
+
+        Args:
+            timer: 已结束的计时器
+            body: 请求体
+            result: 请求结果
+            method: 服务方法名
+
+        Returns:
+            本次调用的指标记录
+        """
+        result = result or {}
+        usage = result.get("usage") or {}
+        output_tokens = usage.get("completion_tokens") or estimate_tokens(result.get("content") or "")
+        generating = timer.duration - (timer.ttft or 0)
+        entry = {
+            **get_call_tags(),
+            "method": method,
+            "model": body.get("model"),
+            "stream": bool(body.get("stream")),
+            "success": bool(result.get("success")),
+            "status_code": result.get("status_code"),
+            "connect": _round(timer.connect),
+            "ttft": _round(timer.ttft),
+            "gap_avg": _round(sum(timer.gaps) / len(timer.gaps)) if timer.gaps else None,
+            "gap_max": _round(max(timer.gaps)) if timer.gaps else None,
+            "duration": _round(timer.duration),
+            "chunks": timer.chunks,
+            "output_tokens": output_tokens,
+            "tokens_per_sec": round(output_tokens / generating, 1) if output_tokens and generating > 0 else None,
+            "usage": usage or None,
+        }
+        with self._lock:
+            self._recent.append(entry)
+            groups = [self._group(f"{dim}:{entry[dim]}") for dim in ("model", "node", "method") if entry[dim]]
+            for group in groups:
+                group["calls"] += 1
+                group["errors"] += 0 if entry["success"] else 1
+        for group in groups:
+            for name, hist in group["histograms"].items():
+                if name == "gap":
+                    for gap in timer.gaps:
+                        hist.observe(gap)
+                elif entry[name] is not None:
+                    hist.observe(entry[name])
+        if self.log_enabled:
+            line = {k: v for k, v in entry.items() if v is not None}
+            llm_logger.info("llm_call " + json.dumps(line, ensure_ascii=False, separators=(",", ":")))
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """按 model:/node:/method: 分组的调用数、错误数和各指标直方图"""
+        with self._lock:
+            groups = dict(self._groups)
+        return {
+            key: {
+                "calls": group["calls"],
+                "errors": group["errors"],
+                **{name: hist.snapshot() for name, hist in group["histograms"].items()},
+            }
+            for key, group in groups.items()
+        }
+
+    def recent(self, session_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """最近的调用明细 (新的在前)，可按会话过滤"""
+        with self._lock:
+            entries = list(self._recent)
+        if session_id:
+            entries = [e for e in entries if e["session_id"] == session_id]
+        return entries[::-1][:limit]
+
+    def _group(self, key: str) -> Dict[str, Any]:
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = {
+                "calls": 0, "errors": 0,
+                "histograms": {name: Histogram(bounds) for name, bounds in _METRIC_BUCKETS.items()},
+            }
+        return group
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
@@ -0,0 +1,203 @@
+"""
+LLM 调用的容错策略
+包含指数退避 + 抖动的重试策略，以及在上游持续故障时快速失败的熔断器
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Iterable, Tuple, Type
+
+from src.utils.logger import llm_logger
+
+
+class RetryPolicy:
+    """指数退避 + 全抖动 (full jitter) 的重试策略"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 20.0,
+                 total_budget: float = 60.0, max_retry_after: float = 60.0,
+                 retryable_status_codes: Iterable[int] = (408, 425, 429, 500, 502, 503, 504),
+                 retryable_exceptions: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError)):
+        """
+        初始化重试策略
+
+        Args:
+            max_retries: 最大重试次数 (不含首次请求)
+            base_delay: 退避基准时间(秒)
+            max_delay: 单次退避上限(秒)
+            total_budget: 一次调用允许花在重试等待上的总时间(秒)，超出后不再重试
+            max_retry_after: Retry-After 头允许的最长等待(秒)
+            retryable_status_codes: 可重试的 HTTP 状态码
+            retryable_exceptions: 可重试的异常类型 (网络错误、超时等)
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_budget = total_budget
+        self.max_retry_after = max_retry_after
+        self.retryable_status_codes = set(retryable_status_codes)
+        self.retryable_exceptions = retryable_exceptions
+
+    def is_retryable_status(self, status_code: Optional[int]) -> bool:
+        """判断 HTTP 状态码是否值得重试 (4xx 客户端错误重试也不会成功)"""
+        return status_code in self.retryable_status_codes
+
+    def is_retryable_exception(self, error: BaseException) -> bool:
+        """判断异常是否为可重试的瞬时错误"""
+        return isinstance(error, self.retryable_exceptions)
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        计算第 attempt 次失败后的等待时间
+
+        Args:
+            attempt: 已失败的次数，从 0 开始
+            retry_after: 上游通过 Retry-After 指定的等待时间(秒)
+
+        Returns:
+            等待时间(秒)
+        """
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_retry_after)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        解析 Retry-After 响应头 (秒数或 HTTP 日期)
+
+        Returns:
+            等待秒数，无法解析时返回 None
+        """
+        if not value:
+            return None
+        value = value.strip()
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """
+    基于滑动窗口错误率的熔断器
+
+    closed: 正常放行；窗口内错误率超过阈值后进入 open
+    open: 直接拒绝请求，recovery_timeout 后进入 half_open
+    half_open: 放行少量探测请求，成功则恢复 closed，失败则重新 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: float = 0.5, min_calls: int = 5,
+                 window_seconds: float = 60.0, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, name: str = "spark"):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 触发熔断的错误率 (0-1)
+            min_calls: 窗口内至少有这么多次调用才评估错误率
+            window_seconds: 滑动窗口时长(秒)
+            recovery_timeout: 熔断后等待多久进入半开探测(秒)
+            half_open_max_calls: 半开状态下同时放行的探测请求数
+            name: 熔断器名称，用于日志
+        """
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+
+        self._state = self.CLOSED
+        self._outcomes = deque()  # (时间戳, 是否成功)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state(time.monotonic())
+            return self._state
+
+    def allow_request(self) -> bool:
+        """判断是否放行本次请求"""
+        with self._lock:
+            self._refresh_state(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                llm_logger.info(f"✅ 熔断器[{self.name}] 探测成功，恢复正常")
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                self._half_open_calls = 0
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self):
+        """记录一次上游故障 (5xx、429、超时、连接错误等)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if self._state == self.CLOSED and total >= self.min_calls and failures / total >= self.failure_threshold:
+                self._open(now)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh_state(now)
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": self._state,
+                "window_calls": total,
+                "window_failures": failures,
+                "failure_rate": round(failures / total, 4) if total else 0.0,
+                "rejected": self._rejected
+            }
+
+    def _open(self, now: float):
+        llm_logger.warning(f"⚡ 熔断器[{self.name}] 打开，{self.recovery_timeout}s 内快速失败")
+        self._state = self.OPEN
+        self._opened_at = now
+        self._half_open_calls = 0
+
+    def _refresh_state(self, now: float):
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
@@ -4,8 +4,17 @@
 """
 
 import os
+import re
 import json
+import time
+import socket
+import asyncio
+import threading
+import contextvars
 import requests
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, List, Optional
 
 # Tavily搜索工具集成
@@ -15,7 +24,210 @@ from searchsrc.config import TAVILY_MAX_RESULTS, TAVILY_API_KEY
 from decorators import create_logged_tool
 
 # 导入自定义JSON编码器
-from src.utils.logger import CustomJsonEncoder, llm_logger
+from src.utils.logger import llm_logger
+from src.services.llm_cache import LLMResponseCache
+from src.services.search_cache import SearchResultCache
+from src.services.context_packer import ContextPacker
+from src.services.token_budget import TokenBudget, PromptBudgetExceeded
+from src.services.model_router import ModelRouter
+from src.services.llm_context import current_node, current_required_keys, current_cancel_token
+from src.services.cancellation import WorkflowCancelled
+from src.services.llm_cascade import CascadeStats, schema_problem
+from src.services.llm_hedging import HedgePolicy, HedgeRace, PRIMARY, HEDGE
+from src.services.llm_metrics import CallTimer, LLMCallMetrics
+from src.services.prompt_renderer import PromptRenderer
+from src.services import prompt_templates
+from src.services.single_flight import SingleFlight
+from src.services.llm_resilience import RetryPolicy, CircuitBreaker
+from src.services.rate_limiter import LLMRateLimiter
+from src.utils.json_repair import is_json_truncated
+from src.utils.token_estimator import estimate_message_tokens, estimate_tokens
+
+
+def _retryable_exceptions() -> tuple:
+    """可重试的网络层异常: 连接失败、超时、传输中断"""
+    exceptions = (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+        ConnectionError,
+        TimeoutError
+    )
+    try:
+        import httpx
+        exceptions += (httpx.TransportError,)
+    except ImportError:
+        pass
+    return exceptions
+
+
+class _KeepAliveHTTPAdapter(HTTPAdapter):
+    """为连接池中的套接字开启 TCP keep-alive 的 HTTPAdapter"""
+    
+    def __init__(self, socket_options: Optional[List] = None, **kwargs):
+        # HTTPAdapter.__init__ 内部会调用 init_poolmanager，必须先保存套接字参数
+        self._socket_options = socket_options
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        if self._socket_options:
+            kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _keep_alive_socket_options(idle_seconds: int) -> List:
+    """构建 TCP keep-alive 套接字参数 (不支持的平台选项会被跳过)"""
+    options = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle_seconds))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle_seconds // 4)))
+    return options
+
+
+class _SSEStreamState:
+    """流式响应 (SSE) 的解析状态，同步与异步调用共用"""
+    
+    def __init__(self):
+        self.content = ""
+        self.request_id = ""
+        self.usage = {}
+        self.finish_reason = None
+        self.buffer = ""
+        self.done = False
+    
+    def feed_line(self, line_str: str) -> str:
+        """
+        处理一行 SSE 数据
+        
+        Args:
+            line_str: 已解码的一行响应文本
+            
+        Returns:
+            本行携带的增量内容，没有内容时返回空字符串
+        """
+        line_str = line_str.strip()
+        if not line_str:
+            return ""
+        
+        if not line_str.startswith('data:'):
+            # 非 data: 开头的行，可能是错误信息或其它格式
+            try:
+                data = json.loads(line_str)
+                if 'error' in data:
+                    llm_logger.error(f"API返回错误: {data['error']}")
+            except:
+                pass
+            return ""
+        
+        data_str = line_str[5:].strip()
+        if data_str == '[DONE]':
+            self.done = True
+            return ""
+        
+        # 处理可能被分割的JSON
+        try:
+            # 尝试直接解析
+            data = json.loads(data_str)
+            self.buffer = "" # 解析成功，清空缓存
+        except json.JSONDecodeError:
+            # 解析失败，加入缓存尝试
+            self.buffer += data_str
+            try:
+                data = json.loads(self.buffer)
+                self.buffer = "" # 缓存解析成功，清空
+            except json.JSONDecodeError:
+                # 仍然失败，等待下一行
+                return ""
+        
+        if not self.request_id and 'id' in data:
+            self.request_id = data['id']
+        if 'usage' in data:
+            self.usage = data['usage']
+        
+        if 'choices' in data and len(data['choices']) > 0:
+            choice = data['choices'][0]
+            if choice.get('finish_reason'):
+                self.finish_reason = choice['finish_reason']
+            container = choice.get('delta') or choice.get('message') or {}
+            content = container.get('content') or container.get('text') or ''
+            if content:
+                self.content += content
+            return content
+        elif 'error' in data:
+            llm_logger.error(f"流式响应包含错误: {data['error']}")
+        return ""
+    
+    def to_result(self) -> Dict[str, Any]:
+        """转换为 call_llm 的返回结构"""
+        return {
+            "success": len(self.content) > 0,
+            "content": self.content,
+            "error": "API未返回任何内容" if len(self.content) == 0 else None,
+            "usage": self.usage,
+            "request_id": self.request_id,
+            "finish_reason": self.finish_reason
+        }
+
+
+# 续写请求的提示词
+CONTINUATION_PROMPT = (
+    "你的上一条回复因长度限制被截断了。请从截断处直接继续输出剩余内容，"
+    "不要重复已经输出的部分，不要添加任何解释、前言或代码块标记。"
+)
+
+
+class _ContinuationStitcher:
+    """
+    续写请求的流式分块拼接
+    
+    先缓存续写开头的一小段，去掉模型重新输出的代码块标记或与已有内容重叠的部分，
+    之后的分块直接转发，保证前端看到的是一段连续的输出
+    """
+    
+    HOLD_CHARS = 256
+    MIN_OVERLAP = 10
+    
+    def __init__(self, partial: str, emit: Optional[callable]):
+        self.partial = partial
+        self.emit = emit
+        self._head = ""
+        self._flushed = False
+    
+    @classmethod
+    def offset(cls, partial: str, continuation: str) -> int:
+        """续写内容中需要跳过的前缀长度 (代码块标记 + 与已有内容重叠的部分)"""
+        head = continuation[:cls.HOLD_CHARS]
+        fence = re.match(r'\s*```(?:json)?[ \t]*\n?', head)
+        start = fence.end() if fence else 0
+        overlap_window = head[start:start + cls.HOLD_CHARS - 56]
+        for k in range(min(len(overlap_window), len(partial)), cls.MIN_OVERLAP - 1, -1):
+            if partial.endswith(overlap_window[:k]):
+                return start + k
+        return start
+    
+    def feed(self, chunk: str):
+        if self._flushed:
+            self._emit(chunk)
+            return
+        self._head += chunk
+        if len(self._head) >= self.HOLD_CHARS:
+            self.flush()
+    
+    def flush(self):
+        """续写结束或缓存已满时，输出去掉前缀后的开头部分"""
+        if self._flushed:
+            return
+        self._flushed = True
+        self._emit(self._head[self.offset(self.partial, self._head):])
+    
+    def _emit(self, text: str):
+        if text and self.emit:
+            self.emit(text)
+
 
 class DashScopeService:
     """讯飞星火API服务类 (原DashScope服务)"""
@@ -38,11 +250,179 @@ class DashScopeService:
         self.default_model = "4.0Ultra"
         self.default_temperature = 0.7
         self.default_max_tokens = 4000  # 增加最大token数，防止截断
+        
+        # HTTP 连接池配置：所有节点和会话复用同一组长连接，避免每次调用都重新握手 TCP+TLS
+        self.pool_connections = BaseConfig.LLM_POOL_CONNECTIONS
+        self.pool_maxsize = BaseConfig.LLM_POOL_MAXSIZE
+        self.pool_block = BaseConfig.LLM_POOL_BLOCK
+        self.keep_alive = BaseConfig.LLM_KEEP_ALIVE
+        self.keep_alive_idle = BaseConfig.LLM_KEEP_ALIVE_IDLE
+        self.timeout = (BaseConfig.LLM_CONNECT_TIMEOUT, BaseConfig.LLM_READ_TIMEOUT)
+        self._http_session: Optional[requests.Session] = None
+        self._http_session_lock = threading.Lock()
+        self._async_client = None
+        self._async_client_loop = None
+        
+        # 响应缓存：相同 (模型, 温度, max_tokens, 提示词) 的请求直接复用结果
+        self.response_cache = LLMResponseCache(
+            max_entries=BaseConfig.LLM_CACHE_MAX_ENTRIES,
+            default_ttl=BaseConfig.LLM_CACHE_DEFAULT_TTL,
+            method_ttls=BaseConfig.LLM_CACHE_METHOD_TTLS,
+            disabled_methods=BaseConfig.LLM_CACHE_DISABLED_METHODS,
+            sqlite_path=BaseConfig.LLM_CACHE_SQLITE_PATH,
+            enabled=BaseConfig.LLM_CACHE_ENABLED,
+            stale_grace=BaseConfig.LLM_CACHE_STALE_GRACE
+        )
+        self.cache_replay_chunk_size = 32
+        
+        # 提示词渲染：预编译模板、紧凑序列化，并按方法统计提示词 token 数
+        self.prompts = PromptRenderer()
+        
+        # 模型路由：按服务方法/工作流节点选择模型、温度和 max_tokens，调用方显式传入的参数优先
+        self.model_router = ModelRouter(
+            default={
+                "model": self.default_model,
+                "temperature": self.default_temperature,
+                "max_tokens": self.default_max_tokens
+            },
+            tiers=BaseConfig.LLM_MODEL_TIERS,
+            routes=BaseConfig.LLM_MODEL_ROUTES,
+            routes_file=BaseConfig.LLM_MODEL_ROUTES_FILE
+        )
+        
+        # 模型级联：先用快速模型，输出无法解析或缺少必需字段时升级到路由指定的模型
+        self.cascade_enabled = BaseConfig.LLM_CASCADE_ENABLED
+        self.cascade_stats = CascadeStats()
+        
+        # 请求对冲：按方法统计首个分块耗时 (TTFT)，超过其分位数仍未开始输出时再发一路请求，先输出者胜出
+        self.hedging = HedgePolicy(
+            enabled=BaseConfig.LLM_HEDGE_ENABLED,
+            percentile=BaseConfig.LLM_HEDGE_PERCENTILE,
+            min_delay=BaseConfig.LLM_HEDGE_MIN_DELAY,
+            max_delay=BaseConfig.LLM_HEDGE_MAX_DELAY,
+            min_samples=BaseConfig.LLM_HEDGE_MIN_SAMPLES,
+            max_ratio=BaseConfig.LLM_HEDGE_MAX_RATIO,
+            url=BaseConfig.LLM_HEDGE_URL,
+            model=BaseConfig.LLM_HEDGE_MODEL
+        )
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=BaseConfig.LLM_MAX_CONCURRENCY, thread_name_prefix="llm-hedge"
+        )
+        
+        # 调用指标：每次上游请求的连接耗时、TTFT、分块间隔、输出速度，按会话/节点/模型汇总
+        self.call_metrics = LLMCallMetrics(
+            recent_size=BaseConfig.LLM_CALL_METRICS_RECENT,
+            log_enabled=BaseConfig.LLM_CALL_METRICS_LOG
+        )
+        
+        # token 预算：发送前估算输入 token，把 max_tokens 调整到模型窗口内，超出预算时压缩或拒绝
+        self.token_budget = TokenBudget(
+            context_windows=BaseConfig.LLM_MODEL_CONTEXT_WINDOWS,
+            max_output_tokens=BaseConfig.LLM_MODEL_MAX_OUTPUT_TOKENS,
+            default_window=BaseConfig.LLM_DEFAULT_CONTEXT_WINDOW,
+            prompt_budget=BaseConfig.LLM_PROMPT_TOKEN_BUDGET,
+            overflow_action=BaseConfig.LLM_PROMPT_OVERFLOW_ACTION,
+            min_output_tokens=BaseConfig.LLM_MIN_OUTPUT_TOKENS
+        )
+        
+        # 综合报告的上下文打包：按 token 预算压缩各节点的分析结果
+        self.context_packer = ContextPacker(
+            token_budget=BaseConfig.REPORT_CONTEXT_TOKEN_BUDGET,
+            max_snippets=BaseConfig.REPORT_CONTEXT_MAX_SNIPPETS,
+            snippet_chars=BaseConfig.REPORT_CONTEXT_SNIPPET_CHARS
+        )
+        
+        # 输出因 max_tokens 截断时，发送续写请求接着已有内容生成，而不是整段重新生成
+        self.max_continuations = BaseConfig.LLM_MAX_CONTINUATIONS
+        
+        # 单飞合并：并发的相同请求只向上游发送一次，分块扇出给所有调用方
+        self.single_flight_enabled = BaseConfig.LLM_SINGLE_FLIGHT_ENABLED
+        self.single_flight = SingleFlight()
+        
+        # 重试与熔断：所有会话共享同一个熔断器，上游持续故障时快速失败而不是每个会话各自重试到超时
+        self.retry_policy = RetryPolicy(
+            max_retries=BaseConfig.LLM_MAX_RETRIES,
+            base_delay=BaseConfig.LLM_RETRY_BASE_DELAY,
+            max_delay=BaseConfig.LLM_RETRY_MAX_DELAY,
+            total_budget=BaseConfig.LLM_RETRY_BUDGET,
+            retryable_status_codes=BaseConfig.LLM_RETRYABLE_STATUS_CODES,
+            retryable_exceptions=_retryable_exceptions()
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=BaseConfig.LLM_BREAKER_FAILURE_THRESHOLD,
+            min_calls=BaseConfig.LLM_BREAKER_MIN_CALLS,
+            window_seconds=BaseConfig.LLM_BREAKER_WINDOW,
+            recovery_timeout=BaseConfig.LLM_BREAKER_RECOVERY_TIMEOUT
+        )
+        
+        # 全局限流：请求/秒、token/分钟和最大并发，等待的调用按会话轮转放行
+        self.rate_limiter = LLMRateLimiter(
+            requests_per_second=BaseConfig.LLM_RATE_LIMIT_RPS,
+            burst=BaseConfig.LLM_RATE_LIMIT_BURST,
+            tokens_per_minute=BaseConfig.LLM_RATE_LIMIT_TPM,
+            max_concurrency=BaseConfig.LLM_MAX_CONCURRENCY,
+            enabled=BaseConfig.LLM_RATE_LIMIT_ENABLED
+        )
+    
+    @property
+    def http_session(self) -> requests.Session:
+        """
+        获取共享的 HTTP 会话 (线程安全，首次访问时创建)
+        
+        Returns:
+            挂载了连接池的 requests.Session
+        """
+        if self._http_session is None:
+            with self._http_session_lock:
+                if self._http_session is None:
+                    self._http_session = self._create_http_session()
+        return self._http_session
+    
+    def _create_http_session(self) -> requests.Session:
+        """创建带连接池和 keep-alive 的 HTTP 会话"""
+        session = requests.Session()
+        adapter = _KeepAliveHTTPAdapter(
+            socket_options=_keep_alive_socket_options(self.keep_alive_idle) if self.keep_alive else None,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0  # 重试由 call_llm 自行控制
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            'Authorization': self.api_key,
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive' if self.keep_alive else 'close'
+        })
+        # 会话在多线程间共享，禁止写入 Cookie，避免并发修改共享状态
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        llm_logger.info(
+            f"🔌 创建LLM HTTP连接池: pool_connections={self.pool_connections}, "
+            f"pool_maxsize={self.pool_maxsize}, keep_alive={self.keep_alive}"
+        )
+        return session
+    
+    def close(self):
+        """关闭连接池，释放所有长连接"""
+        with self._http_session_lock:
+            if self._http_session is not None:
+                self._http_session.close()
+                self._http_session = None
+    
+    async def aclose(self):
+        """关闭异步连接池 (需在创建它的事件循环中调用)"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_client_loop = None
     
     def call_llm(self, prompt: str, context: Optional[Dict] = None, 
                  model: Optional[str] = None, temperature: Optional[float] = None,
                  max_tokens: Optional[int] = None, stream: bool = False,
-                 stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+                 stream_callback: Optional[callable] = None,
+                 method: Optional[str] = None, use_cache: bool = True,
+                 required_keys: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         调用大语言模型 (讯飞星火)
         
@@ -54,195 +434,837 @@ class DashScopeService:
             max_tokens: 最大token数
             stream: 是否使用流式输出
             stream_callback: 流式输出回调函数
+            method: 发起调用的服务方法名，用于按方法配置缓存时间
+            use_cache: 是否允许使用响应缓存
+            required_keys: 输出必须包含的顶层字段，为空时使用当前节点声明的字段；
+                           路由配置了 cascade_from 时先用快速模型，输出不合格再升级
+            
+        Returns:
+            包含模型响应的字典
+        """
+        fast_model, keys = self._cascade_plan(method, model, required_keys)
+        if fast_model is None:
+            return self._call_llm(prompt, context, model, temperature, max_tokens, stream,
+                                  stream_callback, method, use_cache)
+        
+        started = time.monotonic()
+        chunks = []
+        result = self._call_llm(prompt, context, fast_model, temperature, max_tokens, stream,
+                                chunks.append if stream_callback else None, method, use_cache)
+        if result.get("cancelled"):
+            return result
+        problem = schema_problem(result, keys)
+        if problem is None:
+            return self._accept_cascade(result, chunks, stream_callback, method, started)
+        self._log_escalation(method, fast_model, problem)
+        result = self._call_llm(prompt, context, model, temperature, max_tokens, stream,
+                                stream_callback, method, use_cache)
+        return self._finish_escalation(result, method, problem, started)
+    
+    def _call_llm(self, prompt: str, context: Optional[Dict], model: Optional[str],
+                  temperature: Optional[float], max_tokens: Optional[int], stream: bool,
+                  stream_callback: Optional[callable], method: Optional[str],
+                  use_cache: bool) -> Dict[str, Any]:
+        """单个模型的一次调用 (缓存、单飞合并、重试、续写)"""
+        try:
+            # 构建完整的提示词
+            body = self._prepare_body(prompt, context, model, temperature, max_tokens,
+                                      stream or (stream_callback is not None), method)
+        except PromptBudgetExceeded as e:
+            return self._budget_exceeded_result(e)
+        except Exception as e:
+            return {"success": False, "error": f"构建请求失败: {str(e)}"}
+        
+        cache_key, cache_ttl = self._cache_plan(body, method, use_cache)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return self._replay_cached(cached, stream_callback, method)
+        
+        def fetch(emit: Optional[callable]) -> Dict[str, Any]:
+            result = self._request_with_retries(body, emit, method)
+            for _ in range(self.max_continuations):
+                if not self._is_truncated(result, method):
+                    break
+                continuation = self._fit_continuation(body, result, method)
+                if continuation is None:
+                    break
+                stitcher = _ContinuationStitcher(result["content"], emit)
+                continued = self._request_with_retries(continuation, stitcher.feed, method)
+                stitcher.flush()
+                result = self._merge_continuation(result, continued)
+            self.token_budget.record_usage(method, result.get("usage"))
+            # 在结束单飞之前写入缓存，保证之后到达的相同请求直接命中缓存
+            if cache_key and result.get("success"):
+                self.response_cache.set(cache_key, self._cacheable(result), cache_ttl)
+            return result
+        
+        if self.single_flight_enabled:
+            result = self.single_flight.do(self._flight_key(body), fetch, stream_callback)
+        else:
+            result = fetch(stream_callback)
+        return self._degrade_if_open(result, cache_key, stream_callback, method)
+    
+    async def acall_llm(self, prompt: str, context: Optional[Dict] = None, 
+                        model: Optional[str] = None, temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None, stream: bool = False,
+                        stream_callback: Optional[callable] = None,
+                        method: Optional[str] = None, use_cache: bool = True,
+                        required_keys: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        异步调用大语言模型 (讯飞星火)
+        
+        与 call_llm 参数和返回值完全一致，但基于 httpx.AsyncClient 实现，
+        等待上游响应时不占用线程，一个事件循环即可承载大量并发会话。
+        
+        Args:
+            prompt: 输入提示词
+            context: 上下文信息
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大token数
+            stream: 是否使用流式输出
+            stream_callback: 流式输出回调函数 (同步函数，在事件循环中直接调用)
+            method: 发起调用的服务方法名，用于按方法配置缓存时间
+            use_cache: 是否允许使用响应缓存
+            required_keys: 输出必须包含的顶层字段 (见 call_llm)
             
         Returns:
             包含模型响应的字典
         """
-        max_retries = 2
-        retry_delay = 1.0
+        fast_model, keys = self._cascade_plan(method, model, required_keys)
+        if fast_model is None:
+            return await self._acall_llm(prompt, context, model, temperature, max_tokens, stream,
+                                         stream_callback, method, use_cache)
+        
+        started = time.monotonic()
+        chunks = []
+        result = await self._acall_llm(prompt, context, fast_model, temperature, max_tokens, stream,
+                                       chunks.append if stream_callback else None, method, use_cache)
+        if result.get("cancelled"):
+            return result
+        problem = schema_problem(result, keys)
+        if problem is None:
+            return self._accept_cascade(result, chunks, stream_callback, method, started)
+        self._log_escalation(method, fast_model, problem)
+        result = await self._acall_llm(prompt, context, model, temperature, max_tokens, stream,
+                                       stream_callback, method, use_cache)
+        return self._finish_escalation(result, method, problem, started)
+    
+    async def _acall_llm(self, prompt: str, context: Optional[Dict], model: Optional[str],
+                         temperature: Optional[float], max_tokens: Optional[int], stream: bool,
+                         stream_callback: Optional[callable], method: Optional[str],
+                         use_cache: bool) -> Dict[str, Any]:
+        """_call_llm 的异步版本"""
+        try:
+            body = self._prepare_body(prompt, context, model, temperature, max_tokens,
+                                      stream or (stream_callback is not None), method)
+        except PromptBudgetExceeded as e:
+            return self._budget_exceeded_result(e)
+        except Exception as e:
+            return {"success": False, "error": f"构建请求失败: {str(e)}"}
+        
+        cache_key, cache_ttl = self._cache_plan(body, method, use_cache)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return self._replay_cached(cached, stream_callback, method)
         
-        for attempt in range(max_retries + 1):
+        async def fetch(emit: Optional[callable]) -> Dict[str, Any]:
+            result = await self._arequest_with_retries(body, emit, method)
+            for _ in range(self.max_continuations):
+                if not self._is_truncated(result, method):
+                    break
+                continuation = self._fit_continuation(body, result, method)
+                if continuation is None:
+                    break
+                stitcher = _ContinuationStitcher(result["content"], emit)
+                continued = await self._arequest_with_retries(continuation, stitcher.feed, method)
+                stitcher.flush()
+                result = self._merge_continuation(result, continued)
+            self.token_budget.record_usage(method, result.get("usage"))
+            if cache_key and result.get("success"):
+                self.response_cache.set(cache_key, self._cacheable(result), cache_ttl)
+            return result
+        
+        if self.single_flight_enabled:
+            result = await self.single_flight.ado(self._flight_key(body), fetch, stream_callback)
+        else:
+            result = await fetch(stream_callback)
+        return self._degrade_if_open(result, cache_key, stream_callback, method)
+    
+    def _cascade_plan(self, method: Optional[str], model: Optional[str],
+                      required_keys: Optional[List[str]]):
+        """
+        判断本次调用是否走级联
+        
+        Returns:
+            (先尝试的快速模型, 必需字段)；不走级联时快速模型为 None
+        """
+        keys = tuple(required_keys or current_required_keys.get())
+        if not self.cascade_enabled or model or not keys:
+            return None, keys
+        route = self.model_router.resolve(method, current_node.get())
+        if not route.get("cascade_from"):
+            return None, keys
+        fast_model = self.model_router.tier_params(route["cascade_from"]).get("model")
+        if not fast_model or fast_model == route["model"]:
+            return None, keys
+        return fast_model, keys
+    
+    def _accept_cascade(self, result: Dict[str, Any], chunks: List[str], stream_callback: Optional[callable],
+                        method: Optional[str], started: float) -> Dict[str, Any]:
+        """
+        快速模型的输出合格: 把缓冲的流式分块回放给 stream_callback
+        (快速模型同样以流式请求上游，但分块先缓冲，校验通过后才交给调用方，避免不合格的输出被推送出去)
+        """
+        if stream_callback:
+            for chunk in chunks:
+                stream_callback(chunk)
+        self.cascade_stats.record(method, time.monotonic() - started)
+        result = dict(result)
+        result["escalated"] = False
+        return result
+    
+    @staticmethod
+    def _log_escalation(method: Optional[str], fast_model: str, problem: str):
+        llm_logger.info(f"⬆️ 模型级联升级: method={method}, 快速模型 {fast_model} 输出不合格 ({problem})")
+    
+    def _finish_escalation(self, result: Dict[str, Any], method: Optional[str], problem: str,
+                           started: float) -> Dict[str, Any]:
+        self.cascade_stats.record(method, time.monotonic() - started, problem)
+        result = dict(result)
+        result["escalated"] = True
+        result["escalation_reason"] = problem
+        return result
+    
+    @staticmethod
+    def _is_truncated(result: Dict[str, Any], method: Optional[str]) -> bool:
+        """
+        判断输出是否被截断
+        
+        上游返回 finish_reason=length 时直接判定；服务方法 (均要求返回 JSON)
+        在上游未给出 finish_reason 时再检查 JSON 括号是否闭合
+        """
+        if not result.get("success"):
+            return False
+        finish_reason = result.get("finish_reason")
+        if finish_reason == "length":
+            return True
+        if finish_reason is None and method:
+            return is_json_truncated(result.get("content") or "")
+        return False
+    
+    def _fit_continuation(self, body: Dict[str, Any], result: Dict[str, Any],
+                          method: Optional[str]) -> Optional[Dict[str, Any]]:
+        """构建并检查续写请求，已生成内容使上下文窗口放不下续写时返回 None"""
+        try:
+            continuation, _ = self.token_budget.fit(
+                self._continuation_body(body, result["content"]), method, kind="continuation_input"
+            )
+        except PromptBudgetExceeded as e:
+            llm_logger.warning(f"续写请求超出上下文窗口，保留已生成内容: {str(e)}")
+            return None
+        return continuation
+    
+    @staticmethod
+    def _continuation_body(body: Dict[str, Any], partial: str) -> Dict[str, Any]:
+        """构建续写请求: 把已生成的内容作为 assistant 消息，要求模型从截断处继续"""
+        continuation = dict(body)
+        continuation["messages"] = body["messages"] + [
+            {"role": "assistant", "content": partial},
+            {"role": "user", "content": CONTINUATION_PROMPT}
+        ]
+        return continuation
+    
+    @staticmethod
+    def _merge_continuation(result: Dict[str, Any], continued: Dict[str, Any]) -> Dict[str, Any]:
+        """把续写结果拼接到已有结果上，续写失败时保留已有结果"""
+        if not continued.get("success"):
+            llm_logger.warning(f"续写请求失败，保留已生成内容: {continued.get('error')}")
+            merged = dict(result)
+            merged["truncated"] = True
+            return merged
+        
+        partial, extra = result["content"], continued["content"]
+        usage = dict(result.get("usage") or {})
+        for key, value in (continued.get("usage") or {}).items():
+            if isinstance(value, (int, float)) and isinstance(usage.get(key, 0), (int, float)):
+                usage[key] = usage.get(key, 0) + value
+        
+        merged = dict(result)
+        merged["content"] = partial + extra[_ContinuationStitcher.offset(partial, extra):]
+        merged["usage"] = usage
+        merged["finish_reason"] = continued.get("finish_reason")
+        merged["continuations"] = result.get("continuations", 0) + 1
+        merged.pop("truncated", None)
+        llm_logger.info(f"✂️ 输出被截断，已续写第 {merged['continuations']} 次，累计 {len(merged['content'])} 字符")
+        return merged
+    
+    def _cache_plan(self, body: Dict[str, Any], method: Optional[str], use_cache: bool):
+        """
+        判断本次调用是否走缓存
+        
+        Returns:
+            (缓存键, 缓存时间)，不缓存时缓存键为 None
+        """
+        ttl = self.response_cache.ttl_for(method) if use_cache else 0
+        if ttl <= 0:
+            return None, 0
+        key = LLMResponseCache.make_key(
+            body["model"], body["temperature"], body["max_tokens"], body["messages"][-1]["content"]
+        )
+        return key, ttl
+    
+    @staticmethod
+    def _flight_key(body: Dict[str, Any]) -> str:
+        """单飞合并键: 与缓存键相同的内容哈希，并区分是否流式"""
+        key = LLMResponseCache.make_key(
+            body["model"], body["temperature"], body["max_tokens"], body["messages"][-1]["content"]
+        )
+        return f"{key}:{'stream' if body['stream'] else 'plain'}"
+    
+    @staticmethod
+    def _cacheable(result: Dict[str, Any]) -> Dict[str, Any]:
+        """提取结果中需要缓存的字段"""
+        return {
+            "success": True,
+            "content": result["content"],
+            "usage": result.get("usage", {}),
+            "request_id": result.get("request_id", "")
+        }
+    
+    def _replay_cached(self, cached: Dict[str, Any], stream_callback: Optional[callable],
+                       method: Optional[str]) -> Dict[str, Any]:
+        """命中缓存: 通过 stream_callback 分块回放缓存文本，使前端表现与实时生成一致"""
+        llm_logger.info(f"💾 LLM缓存命中: method={method}")
+        self._replay(cached.get("content", ""), stream_callback)
+        result = dict(cached)
+        result["cached"] = True
+        return result
+    
+    def _replay(self, content: str, stream_callback: Optional[callable]):
+        """通过 stream_callback 分块回放已生成的文本"""
+        if stream_callback:
+            chunk_size = self.cache_replay_chunk_size
+            for i in range(0, len(content), chunk_size):
+                stream_callback(content[i:i + chunk_size])
+    
+    def _degrade_if_open(self, result: Dict[str, Any], cache_key: Optional[str],
+                         stream_callback: Optional[callable], method: Optional[str]) -> Dict[str, Any]:
+        """熔断期间的降级路径: 有过期缓存时返回过期缓存，否则原样返回快速失败结果"""
+        if not result.get("circuit_open") or not cache_key:
+            return result
+        stale = self.response_cache.get_stale(cache_key)
+        if stale is None:
+            return result
+        llm_logger.warning(f"⚠️ 星火API熔断中，使用过期缓存降级返回: method={method}")
+        result = self._replay_cached(stale, stream_callback, method)
+        result["degraded"] = True
+        return result
+    
+    def _request_with_retries(self, body: Dict[str, Any], stream_callback: Optional[callable] = None,
+                              method: Optional[str] = None) -> Dict[str, Any]:
+        """向星火API发送请求 (按重试策略退避重试，受熔断器保护，运行取消后不再发送和重试)"""
+        started = time.monotonic()
+        attempt = 0
+        token = current_cancel_token.get()
+        while True:
+            if token and token.cancelled:
+                return self._cancelled_result(token)
+            if not self.circuit_breaker.allow_request():
+                return self._circuit_open_result()
             try:
-                # 构建完整的提示词
-                full_prompt = self._build_prompt(prompt, context)
-                
-                headers = {
-                    'Authorization': self.api_key,
-                    'Content-Type': 'application/json'
-                }
-                
-                body = {
-                    "model": model or self.default_model,
-                    "messages": [
-                        {"role": "user", "content": full_prompt}
-                    ],
-                    "temperature": temperature or self.default_temperature,
-                    "max_tokens": max_tokens or self.default_max_tokens,
-                    "stream": stream or (stream_callback is not None)
-                }
-                
-                if body["stream"]:
-                    response = requests.post(url=self.api_url, json=body, headers=headers, stream=True, timeout=120)
-                    if response.status_code == 200:
-                        full_content = ""
-                        request_id = ""
-                        usage = {}
-                        buffer = ""
-                        
-                        for line in response.iter_lines():
-                            if line:
-                                line_str = line.decode('utf-8').strip()
-                                if not line_str:
-                                    continue
-                                    
-                                if line_str.startswith('data:'):
-                                    data_str = line_str[5:].strip()
-                                    if data_str == '[DONE]':
-                                        break
-                                    
-                                    # 处理可能被分割的JSON
-                                    try:
-                                        # 尝试直接解析
-                                        data = json.loads(data_str)
-                                        buffer = "" # 解析成功，清空缓存
-                                    except json.JSONDecodeError:
-                                        # 解析失败，加入缓存尝试
-                                        buffer += data_str
-                                        try:
-                                            data = json.loads(buffer)
-                                            buffer = "" # 缓存解析成功，清空
-                                        except json.JSONDecodeError:
-                                            # 仍然失败，等待下一行
-                                            continue
-                                    
-                                    if not request_id and 'id' in data:
-                                        request_id = data['id']
-                                    if 'usage' in data:
-                                        usage = data['usage']
-                                        
-                                    if 'choices' in data and len(data['choices']) > 0:
-                                        choice = data['choices'][0]
-                                        container = choice.get('delta') or choice.get('message') or {}
-                                        content = container.get('content') or container.get('text') or ''
-                                        
-                                        if content:
-                                            full_content += content
-                                            if stream_callback:
-                                                stream_callback(content)
-                                    elif 'error' in data:
-                                        llm_logger.error(f"流式响应包含错误: {data['error']}")
-                                else:
-                                    # 非 data: 开头的行，可能是错误信息或其它格式
-                                    try:
-                                        data = json.loads(line_str)
-                                        if 'error' in data:
-                                            llm_logger.error(f"API返回错误: {data['error']}")
-                                    except:
-                                        pass
-                                    continue
-                        
-                        if not full_content and attempt < max_retries:
-                            llm_logger.warning(f"API未返回内容，尝试第 {attempt + 1} 次重试...")
-                            import time
-                            time.sleep(retry_delay * (attempt + 1))
-                            continue
-
-                        return {
-                            "success": len(full_content) > 0,
-                            "content": full_content,
-                            "error": "API未返回任何内容" if len(full_content) == 0 else None,
-                            "usage": usage,
-                            "request_id": request_id
-                        }
-                    else:
-                        if attempt < max_retries:
-                            llm_logger.warning(f"API调用失败 ({response.status_code})，尝试第 {attempt + 1} 次重试...")
-                            import time
-                            time.sleep(retry_delay * (attempt + 1))
-                            continue
-                        return {
-                            "success": False,
-                            "error": f"API流式调用失败: {response.status_code} - {response.text}",
-                            "status_code": response.status_code
-                        }
-
-                response = requests.post(url=self.api_url, json=body, headers=headers, timeout=120)
-                
-                # 检查响应状态
+                permit = self.rate_limiter.acquire(self._estimate_tokens(body), cancel_token=token)
+            except WorkflowCancelled:
+                return self._cancelled_result(token)
+            result = None
+            try:
+                result, retryable, retry_after = self._hedged_attempt(body, stream_callback, method)
+            finally:
+                self.rate_limiter.release(permit, self._used_tokens(body, result))
+            if token and token.cancelled:
+                # 取消导致的失败不计入熔断器
+                return self._cancelled_result(token)
+            delay = self._record_attempt(result, retryable, retry_after, attempt, started)
+            if delay is None:
+                return result
+            time.sleep(delay)
+            attempt += 1
+    
+    async def _arequest_with_retries(self, body: Dict[str, Any], stream_callback: Optional[callable] = None,
+                                     method: Optional[str] = None) -> Dict[str, Any]:
+        """向星火API发送异步请求 (按重试策略退避重试，受熔断器保护，运行取消后不再发送和重试)"""
+        started = time.monotonic()
+        attempt = 0
+        token = current_cancel_token.get()
+        while True:
+            if token and token.cancelled:
+                return self._cancelled_result(token)
+            if not self.circuit_breaker.allow_request():
+                return self._circuit_open_result()
+            try:
+                permit = await self.rate_limiter.aacquire(self._estimate_tokens(body), cancel_token=token)
+            except WorkflowCancelled:
+                return self._cancelled_result(token)
+            result = None
+            try:
+                result, retryable, retry_after = await self._ahedged_attempt(body, stream_callback, method)
+            finally:
+                self.rate_limiter.release(permit, self._used_tokens(body, result))
+            if token and token.cancelled:
+                return self._cancelled_result(token)
+            delay = self._record_attempt(result, retryable, retry_after, attempt, started)
+            if delay is None:
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    @staticmethod
+    def _estimate_tokens(body: Dict[str, Any]) -> int:
+        """预估一次请求的 token 消耗 (离线估算的输入 token 加上输出上限)"""
+        return estimate_message_tokens(body["messages"]) + body["max_tokens"]
+    
+    @staticmethod
+    def _used_tokens(body: Dict[str, Any], result: Optional[Dict[str, Any]]) -> Optional[int]:
+        """请求实际消耗的 token 数，优先使用上游返回的 usage"""
+        if result is None:
+            return None
+        total = (result.get("usage") or {}).get("total_tokens")
+        if total:
+            return int(total)
+        return estimate_message_tokens(body["messages"]) + estimate_tokens(result.get("content") or "")
+    
+    def _attempt_request(self, body: Dict[str, Any], stream_callback: Optional[callable],
+                         url: Optional[str] = None, on_response: Optional[callable] = None,
+                         method: Optional[str] = None):
+        """
+        发送一次请求，并记录连接耗时、TTFT、分块间隔、输出速度等指标
+        
+        Args:
+            body: 请求体
+            stream_callback: 流式输出回调函数
+            url: 请求地址，默认使用 api_url
+            on_response: 响应建立后调用，参数为响应对象 (用于从其他线程关闭流式响应)
+            method: 服务方法名 (指标标签)
+        
+        Returns:
+            (结果字典, 是否可重试, Retry-After 秒数)
+        """
+        timer = CallTimer(stream_callback)
+        token = current_cancel_token.get()
+        closers = []
+        
+        def connected(response):
+            timer.connected()
+            if on_response:
+                on_response(response)
+            if token:
+                # 运行取消时关闭上游响应，正在读取的流随即中断
+                closers.append(response.close)
+                token.add_callback(response.close)
+        
+        try:
+            outcome = self._send_request(body, timer.feed, url, connected)
+        finally:
+            for close in closers:
+                token.remove_callback(close)
+        self.call_metrics.record(timer.finish(), body, outcome[0], method)
+        return outcome
+    
+    def _send_request(self, body: Dict[str, Any], stream_callback: Optional[callable],
+                      url: Optional[str], on_response: callable):
+        """发送一次请求 (见 _attempt_request)"""
+        policy = self.retry_policy
+        url = url or self.api_url
+        try:
+            if body["stream"]:
+                response = self.http_session.post(url=url, json=body, stream=True, timeout=self.timeout)
+                on_response(response)
                 if response.status_code == 200:
-                    result = response.json()
-                    if 'choices' in result and len(result['choices']) > 0:
-                        return {
-                            "success": True,
-                            "content": result['choices'][0]['message']['content'],
-                            "usage": result.get('usage', {}),
-                            "request_id": result.get('id', '')
-                        }
-                    else:
-                        if attempt < max_retries:
-                            llm_logger.warning(f"API返回内容为空或格式不正确，尝试第 {attempt + 1} 次重试...")
-                            import time
-                            time.sleep(retry_delay * (attempt + 1))
-                            continue
-                        return {
-                            "success": False,
-                            "error": f"API返回格式异常: {response.text}",
-                            "status_code": response.status_code
-                        }
-                else:
-                    if attempt < max_retries:
-                        llm_logger.warning(f"API调用失败 ({response.status_code})，尝试第 {attempt + 1} 次重试...")
-                        import time
-                        time.sleep(retry_delay * (attempt + 1))
-                        continue
-                    error_msg = f"API调用失败: {response.status_code} - {response.text}"
-                    if response.status_code == 401:
-                        error_msg += " (请检查API_KEY是否正确)"
-                    return {
-                        "success": False,
-                        "error": error_msg,
-                        "status_code": response.status_code
-                    }
-                    
-            except Exception as e:
-                if attempt < max_retries:
-                    llm_logger.warning(f"调用API发生异常: {str(e)}，尝试第 {attempt + 1} 次重试...")
-                    import time
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-                error_msg = f"调用星火API时发生异常: {str(e)}"
-                return {
-                    "success": False,
-                    "error": error_msg
-                }
-        
-        return {"success": False, "error": "重试多次后仍然失败"}
-    
-    def _build_prompt(self, prompt: str, context: Optional[Dict] = None) -> str:
-        """
-        构建完整的提示词
+                    stream_state = _SSEStreamState()
+                    for line in response.iter_lines():
+                        # 收到 [DONE] 后继续读完剩余字节，使连接能归还连接池复用
+                        if line and not stream_state.done:
+                            content = stream_state.feed_line(line.decode('utf-8'))
+                            if content and stream_callback:
+                                stream_callback(content)
+                    result = stream_state.to_result()
+                    # 返回 200 但没有内容，视为上游瞬时异常
+                    return result, not result["success"], None
+                return (
+                    self._stream_error_result(response.status_code, response.text),
+                    policy.is_retryable_status(response.status_code),
+                    policy.parse_retry_after(response.headers.get("Retry-After"))
+                )
+            
+            response = self.http_session.post(url=url, json=body, timeout=self.timeout)
+            on_response(response)
+            if response.status_code == 200:
+                return self._completion_result(response)
+            return (
+                self._http_error_result(response.status_code, response.text),
+                policy.is_retryable_status(response.status_code),
+                policy.parse_retry_after(response.headers.get("Retry-After"))
+            )
+        except Exception as e:
+            return (
+                {"success": False, "error": f"调用星火API时发生异常: {str(e)}"},
+                policy.is_retryable_exception(e),
+                None
+            )
+    
+    async def _aattempt_request(self, body: Dict[str, Any], stream_callback: Optional[callable],
+                                url: Optional[str] = None, method: Optional[str] = None):
+        """
+        发送一次异步请求，并记录调用指标 (见 _attempt_request)
+        
+        Returns:
+            (结果字典, 是否可重试, Retry-After 秒数)
+        """
+        timer = CallTimer(stream_callback)
+        outcome = await self._asend_request(body, timer.feed, url, timer.connected)
+        self.call_metrics.record(timer.finish(), body, outcome[0], method)
+        return outcome
+    
+    async def _asend_request(self, body: Dict[str, Any], stream_callback: Optional[callable],
+                             url: Optional[str], on_connected: callable):
+        """发送一次异步请求 (见 _aattempt_request)"""
+        policy = self.retry_policy
+        client = self._get_async_client()
+        url = url or self.api_url
+        try:
+            if body["stream"]:
+                async with client.stream("POST", url, json=body) as response:
+                    on_connected()
+                    if response.status_code == 200:
+                        stream_state = _SSEStreamState()
+                        async for line in response.aiter_lines():
+                            if line and not stream_state.done:
+                                content = stream_state.feed_line(line)
+                                if content and stream_callback:
+                                    stream_callback(content)
+                        result = stream_state.to_result()
+                        return result, not result["success"], None
+                    await response.aread()
+                return (
+                    self._stream_error_result(response.status_code, response.text),
+                    policy.is_retryable_status(response.status_code),
+                    policy.parse_retry_after(response.headers.get("Retry-After"))
+                )
+            
+            response = await client.post(url, json=body)
+            on_connected()
+            if response.status_code == 200:
+                return self._completion_result(response)
+            return (
+                self._http_error_result(response.status_code, response.text),
+                policy.is_retryable_status(response.status_code),
+                policy.parse_retry_after(response.headers.get("Retry-After"))
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return (
+                {"success": False, "error": f"调用星火API时发生异常: {str(e)}"},
+                policy.is_retryable_exception(e),
+                None
+            )
+    
+    def _hedged_attempt(self, body: Dict[str, Any], stream_callback: Optional[callable],
+                        method: Optional[str]):
+        """
+        发送一次请求: 流式请求统计 TTFT，首个分块超过对冲延迟仍未到达时再发出一个对冲请求，
+        先输出的一路胜出，另一路的响应被关闭
+        
+        Returns:
+            (结果字典, 是否可重试, Retry-After 秒数)
+        """
+        if not body["stream"]:
+            return self._attempt_request(body, stream_callback, method=method)
+        race = HedgeRace(stream_callback)
+        delay = self.hedging.hedge_delay(method)
+        hedge, timer = None, None
+        if delay is not None:
+            # 延迟由定时器计时，只有真正发出对冲请求时才占用对冲线程池
+            hedge = Future()
+            timer = threading.Timer(delay, self._launch_hedge,
+                                    (race, hedge, body, delay, method, contextvars.copy_context()))
+            timer.daemon = True
+            timer.start()
+        outcome = self._attempt_request(body, race.emitter(PRIMARY),
+                                        on_response=lambda r: race.bind(PRIMARY, r.close), method=method)
+        if timer is not None:
+            timer.cancel()
+        race.stop_hedging()
+        if hedge is not None and self._needs_hedge_outcome(race, outcome):
+            outcome = hedge.result() or outcome
+        race.close()
+        self.hedging.record(method, race)
+        return outcome
+    
+    def _launch_hedge(self, race: HedgeRace, hedge: Future, body: Dict[str, Any], delay: float,
+                      method: Optional[str], context: contextvars.Context):
+        """对冲延迟到期 (定时器线程): 首个分块仍未到达时把对冲请求交给对冲线程池，结果写入 hedge"""
+        if not race.begin_hedge(lambda: self.hedging.try_hedge(method)):
+            return
+        lane = self._hedge_executor.submit(context.run, self._hedge_lane, race, body, delay, method)
+        lane.add_done_callback(lambda done: hedge.set_exception(done.exception()) if done.exception()
+                               else hedge.set_result(done.result()))
+    
+    def _hedge_lane(self, race: HedgeRace, body: Dict[str, Any], delay: float, method: Optional[str]):
+        """发出对冲请求 (在对冲线程池中运行)"""
+        llm_logger.info(f"🔀 首个分块 {delay:.1f}s 内未到达，发出对冲请求: method={method}")
+        hedge_body = self.hedging.hedge_body(body)
+        try:
+            permit = self.rate_limiter.acquire(self._estimate_tokens(hedge_body),
+                                               cancel_token=current_cancel_token.get())
+        except WorkflowCancelled:
+            return None
+        outcome = None
+        try:
+            outcome = self._attempt_request(hedge_body, race.emitter(HEDGE), url=self.hedging.url,
+                                            on_response=lambda r: race.bind(HEDGE, r.close), method=method)
+        finally:
+            self.rate_limiter.release(permit, self._used_tokens(hedge_body, outcome and outcome[0]))
+        return outcome
+    
+    async def _ahedged_attempt(self, body: Dict[str, Any], stream_callback: Optional[callable],
+                               method: Optional[str]):
+        """_hedged_attempt 的异步版本，落败的一路通过取消任务中止"""
+        if not body["stream"]:
+            return await self._aattempt_request(body, stream_callback, method=method)
+        settled = asyncio.Event()
+        race = HedgeRace(stream_callback, on_claim=settled.set)
+        delay = self.hedging.hedge_delay(method)
+        primary = asyncio.ensure_future(self._aattempt_request(body, race.emitter(PRIMARY), method=method))
+        race.bind(PRIMARY, primary.cancel)
+        hedge = None
+        try:
+            if delay is not None:
+                waiter = asyncio.ensure_future(settled.wait())
+                try:
+                    await asyncio.wait({primary, waiter}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiter.cancel()
+                if not primary.done() and race.begin_hedge(lambda: self.hedging.try_hedge(method)):
+                    hedge = asyncio.ensure_future(self._ahedge_lane(race, body, delay, method))
+                    race.bind(HEDGE, hedge.cancel)
+            await asyncio.wait({primary})
+            outcome = None if primary.cancelled() else primary.result()
+            if hedge is not None and self._needs_hedge_outcome(race, outcome):
+                await asyncio.wait({hedge})
+                outcome = (None if hedge.cancelled() else hedge.result()) or outcome
+        except asyncio.CancelledError:
+            primary.cancel()
+            if hedge is not None:
+                hedge.cancel()
+            raise
+        race.close()
+        self.hedging.record(method, race)
+        return outcome
+    
+    async def _ahedge_lane(self, race: HedgeRace, body: Dict[str, Any], delay: float, method: Optional[str]):
+        """发出异步对冲请求"""
+        llm_logger.info(f"🔀 首个分块 {delay:.1f}s 内未到达，发出对冲请求: method={method}")
+        hedge_body = self.hedging.hedge_body(body)
+        try:
+            permit = await self.rate_limiter.aacquire(self._estimate_tokens(hedge_body),
+                                                      cancel_token=current_cancel_token.get())
+        except WorkflowCancelled:
+            return None
+        outcome = None
+        try:
+            outcome = await self._aattempt_request(hedge_body, race.emitter(HEDGE), url=self.hedging.url,
+                                                   method=method)
+        finally:
+            self.rate_limiter.release(permit, self._used_tokens(hedge_body, outcome and outcome[0]))
+        return outcome
+    
+    @staticmethod
+    def _needs_hedge_outcome(race: HedgeRace, outcome) -> bool:
+        """主请求结束后是否需要等待对冲请求: 对冲胜出，或主请求失败而对冲已发出"""
+        if race.winner == HEDGE:
+            return True
+        return race.winner is None and race.fired and not (outcome and outcome[0].get("success"))
+    
+    def _record_attempt(self, result: Dict[str, Any], retryable: bool, retry_after: Optional[float],
+                        attempt: int, started: float) -> Optional[float]:
+        """
+        把一次请求的结果记入熔断器，并决定是否重试
         
         Args:
-            prompt: 基础提示词
-            context: 上下文信息
+            result: 本次请求结果
+            retryable: 失败是否可重试
+            retry_after: 上游要求的等待时间(秒)
+            attempt: 已失败的次数
+            started: 本次调用开始的 monotonic 时间
             
         Returns:
-            完整的提示词
+            重试前需要等待的秒数，不再重试时返回 None
         """
-        if not context:
-            return prompt
+        # 只有可重试的失败 (5xx、429、超时、连接错误) 才说明上游异常；4xx 说明上游可达
+        if result.get("success") or not retryable:
+            self.circuit_breaker.record_success()
+            return None
+        self.circuit_breaker.record_failure()
         
-        context_str = ""
-        if context:
-            context_str = "\n\n上下文信息:\n"
-            for key, value in context.items():
-                if isinstance(value, (dict, list)):
-                    # 使用自定义JSON编码器处理枚举类型
-                    context_str += f"{key}: {json.dumps(value, ensure_ascii=False, indent=2, cls=CustomJsonEncoder)}\n"
-                else:
-                    context_str += f"{key}: {value}\n"
+        policy = self.retry_policy
+        if attempt >= policy.max_retries:
+            return None
+        delay = policy.compute_delay(attempt, retry_after)
+        if time.monotonic() - started + delay > policy.total_budget:
+            llm_logger.warning(f"LLM重试预算 {policy.total_budget}s 已耗尽，放弃重试: {result.get('error')}")
+            return None
+        llm_logger.warning(f"{result.get('error')}，{delay:.1f}s 后进行第 {attempt + 1} 次重试...")
+        return delay
+    
+    def _completion_result(self, response):
+        """解析状态码为 200 的非流式响应，返回 (结果字典, 是否可重试, Retry-After)"""
+        try:
+            result = self._parse_completion(response.json())
+        except ValueError:
+            result = None
+        if result is not None:
+            return result, False, None
+        return {
+            "success": False,
+            "error": f"API返回格式异常: {response.text}",
+            "status_code": response.status_code
+        }, True, None
+    
+    @staticmethod
+    def _stream_error_result(status_code: int, text: str) -> Dict[str, Any]:
+        """构建流式调用 HTTP 错误返回结果"""
+        return {
+            "success": False,
+            "error": f"API流式调用失败: {status_code} - {text}",
+            "status_code": status_code
+        }
+    
+    @staticmethod
+    def _cancelled_result(token) -> Dict[str, Any]:
+        """会话运行被取消时的结果"""
+        return {
+            "success": False,
+            "error": f"LLM调用已取消: {token.reason}",
+            "cancelled": True
+        }
+    
+    @staticmethod
+    def _circuit_open_result() -> Dict[str, Any]:
+        """熔断器打开时的快速失败结果"""
+        return {
+            "success": False,
+            "error": "星火API暂时不可用 (熔断中)，请稍后重试",
+            "circuit_open": True
+        }
+    
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """
+        获取当前事件循环对应的 httpx.AsyncClient (带连接池和 keep-alive)
         
-        return f"{context_str}\n\n{prompt}"
+        AsyncClient 绑定创建它的事件循环，事件循环变化时重新创建。
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            import httpx
+            self._async_client = httpx.AsyncClient(
+                headers=dict(self.http_session.headers),
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0,
+                    keepalive_expiry=self.keep_alive_idle
+                )
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def _prepare_body(self, prompt: str, context: Optional[Dict], model: Optional[str],
+                      temperature: Optional[float], max_tokens: Optional[int], stream: bool,
+                      method: Optional[str]) -> Dict[str, Any]:
+        """
+        渲染完整提示词并构建请求体: 未显式指定的模型参数由模型路由决定，再按 token 预算调整
+        
+        Raises:
+            PromptBudgetExceeded: 提示词超出预算
+        """
+        route = self.model_router.resolve(method, current_node.get())
+        full_prompt = self.prompts.render_context(method, prompt, context)
+        body = self._build_request_body(
+            full_prompt,
+            model or route["model"],
+            temperature if temperature is not None else route["temperature"],
+            max_tokens or route["max_tokens"],
+            stream
+        )
+        body, prompt_tokens = self.token_budget.fit(body, method)
+        self.prompts.record(method, prompt_tokens)
+        return body
+    
+    @staticmethod
+    def _budget_exceeded_result(error: PromptBudgetExceeded) -> Dict[str, Any]:
+        """提示词超出预算时的返回结果"""
+        llm_logger.error(f"LLM请求被拒绝: {str(error)}")
+        return {
+            "success": False,
+            "error": f"提示词过长: {str(error)}",
+            "prompt_tokens": error.prompt_tokens,
+            "budget_exceeded": True
+        }
+    
+    def _build_request_body(self, full_prompt: str, model: Optional[str], temperature: Optional[float],
+                            max_tokens: Optional[int], stream: bool) -> Dict[str, Any]:
+        """构建星火 chat/completions 请求体"""
+        return {
+            "model": model or self.default_model,
+            "messages": [
+                {"role": "user", "content": full_prompt}
+            ],
+            "temperature": temperature if temperature is not None else self.default_temperature,
+            "max_tokens": max_tokens or self.default_max_tokens,
+            "stream": stream
+        }
+    
+    @staticmethod
+    def _parse_completion(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析非流式响应，格式异常时返回 None"""
+        if 'choices' in result and len(result['choices']) > 0:
+            return {
+                "success": True,
+                "content": result['choices'][0]['message']['content'],
+                "usage": result.get('usage', {}),
+                "request_id": result.get('id', ''),
+                "finish_reason": result['choices'][0].get('finish_reason')
+            }
+        return None
+    
+    @staticmethod
+    def _http_error_result(status_code: int, text: str) -> Dict[str, Any]:
+        """构建 HTTP 错误返回结果"""
+        error_msg = f"API调用失败: {status_code} - {text}"
+        if status_code == 401:
+            error_msg += " (请检查API_KEY是否正确)"
+        return {
+            "success": False,
+            "error": error_msg,
+            "status_code": status_code
+        }
+    
+    @staticmethod
+    def _reference_section(snippets: Optional[List[Dict]], max_items: int = 5, max_chars: int = 300) -> str:
+        """把检索到的搜索结果整理成提示词中的参考资料段落，没有结果时返回空字符串"""
+        lines = []
+        for item in (snippets or [])[:max_items]:
+            if not isinstance(item, dict):
+                continue
+            content = " ".join((item.get("content") or "").split())[:max_chars]
+            if content:
+                lines.append(f"- {content} (来源: {item.get('url', '')})")
+        if not lines:
+            return ""
+        return "\n以下是最新检索到的资料，可作为分析参考：\n" + "\n".join(lines) + "\n"
     
     def analyze_career_goal_clarity(self, user_request: str, user_profile: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
@@ -256,29 +1278,21 @@ class DashScopeService:
         Returns:
             分析结果
         """
-        prompt = f"""
-作为一名专业的职业规划顾问，请分析用户的职业目标是否明确。
-
-用户请求: {user_request}
-
-请从以下几个维度进行分析：
-1. 目标职位是否具体明确
-2. 行业方向是否清晰
-3. 时间规划是否合理
-4. 个人能力与目标的匹配度
-
-请以JSON格式返回分析结果：
-{{
-    "is_goal_clear": true/false,
-    "clarity_score": 0-100,
-    "reason": "分析原因",
-    "missing_info": ["缺失的关键信息"],
-    "suggestions": ["改进建议"]
-}}
-"""
+        return self.call_llm(**self._analyze_career_goal_clarity_request(user_request, user_profile), stream_callback=stream_callback)
+    
+    async def aanalyze_career_goal_clarity(self, user_request: str, user_profile: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """analyze_career_goal_clarity 的异步版本"""
+        return await self.acall_llm(**self._analyze_career_goal_clarity_request(user_request, user_profile), stream_callback=stream_callback)
+    
+    def _analyze_career_goal_clarity_request(self, user_request: str, user_profile: Dict) -> Dict[str, Any]:
+        """构建 analyze_career_goal_clarity 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "analyze_career_goal_clarity", prompt_templates.ANALYZE_CAREER_GOAL_CLARITY,
+            user_request=user_request
+        )
         
         context = {"user_profile": user_profile}
-        return self.call_llm(prompt, context, stream_callback=stream_callback)
+        return {"prompt": prompt, "context": context, "method": "analyze_career_goal_clarity"}
     
     def create_analysis_strategy(self, user_profile: Dict, feedback_history: List = None, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
@@ -292,30 +1306,23 @@ class DashScopeService:
         Returns:
             分析策略
         """
-        prompt = f"""
-作为职业规划专家，请为用户制定一个详细的职业分析策略。
-
-请考虑以下因素：
-1. 用户的教育背景和工作经验
-2. 用户的技能和兴趣
-3. 目标行业的发展趋势
-4. 市场需求和竞争情况
-
-请以JSON格式返回策略：
-{{
-    "strategy_overview": "策略概述",
-    "analysis_priorities": ["分析重点"],
-    "data_sources": ["数据来源"],
-    "timeline": "分析时间线",
-    "expected_outcomes": ["预期结果"]
-}}
-"""
+        return self.call_llm(**self._create_analysis_strategy_request(user_profile, feedback_history), stream_callback=stream_callback)
+    
+    async def acreate_analysis_strategy(self, user_profile: Dict, feedback_history: List = None, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """create_analysis_strategy 的异步版本"""
+        return await self.acall_llm(**self._create_analysis_strategy_request(user_profile, feedback_history), stream_callback=stream_callback)
+    
+    def _create_analysis_strategy_request(self, user_profile: Dict, feedback_history: List = None) -> Dict[str, Any]:
+        """构建 create_analysis_strategy 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "create_analysis_strategy", prompt_templates.CREATE_ANALYSIS_STRATEGY
+        )
         
         context = {
             "user_profile": user_profile,
             "feedback_history": feedback_history or []
         }
-        return self.call_llm(prompt, context, stream_callback=stream_callback)
+        return {"prompt": prompt, "context": context, "method": "create_analysis_strategy"}
     
     def analyze_user_profile(self, user_profile: Dict, feedback_adjustments: Optional[Dict] = None, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
@@ -329,83 +1336,59 @@ class DashScopeService:
         Returns:
             个人画像分析结果
         """
-        prompt = f"""
-作为职业测评专家，请基于提供的用户信息，对用户进行全面的个人能力画像分析。
-
-用户信息如下：
-{json.dumps(user_profile, ensure_ascii=False, indent=2)}
-
-请从以下维度进行分析：
-1. 核心技能评估
-2. 性格特质分析
-3. 职业兴趣匹配
-4. 发展潜力评估
-5. 优势与劣势识别
-
-请严格以JSON格式返回分析结果，不要包含任何解释性文字或Markdown代码块标记以外的内容：
-{{
-    "strengths": ["核心优势"],
-    "weaknesses": ["需要改进的方面"],
-    "personality_traits": ["性格特质"],
-    "skill_assessment": {{
-        "technical_skills": ["技术技能"],
-        "soft_skills": ["软技能"],
-        "skill_gaps": ["技能缺口"]
-    }},
-    "career_interests": ["职业兴趣"],
-    "development_potential": "发展潜力评估",
-    "recommendations": ["个人发展建议"]
-}}
-"""
+        return self.call_llm(**self._analyze_user_profile_request(user_profile, feedback_adjustments), stream_callback=stream_callback)
+    
+    async def aanalyze_user_profile(self, user_profile: Dict, feedback_adjustments: Optional[Dict] = None, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """analyze_user_profile 的异步版本"""
+        return await self.acall_llm(**self._analyze_user_profile_request(user_profile, feedback_adjustments), stream_callback=stream_callback)
+    
+    def _analyze_user_profile_request(self, user_profile: Dict, feedback_adjustments: Optional[Dict] = None) -> Dict[str, Any]:
+        """构建 analyze_user_profile 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "analyze_user_profile", prompt_templates.ANALYZE_USER_PROFILE,
+            user_profile=user_profile
+        )
         
         context = {
             "feedback_adjustments": feedback_adjustments or {}
         }
-        return self.call_llm(prompt, context, stream_callback=stream_callback, max_tokens=5000)
+        return {"prompt": prompt, "context": context, "method": "analyze_user_profile"}
 
-    def research_industry_trends(self, target_industry: str, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+    def research_industry_trends(self, target_industry: str, stream_callback: Optional[callable] = None,
+                                 reference_snippets: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         研究行业趋势
         
         Args:
             target_industry: 目标行业
             stream_callback: 流式输出回调
+            reference_snippets: 检索到的搜索结果，作为参考资料附加到提示词
             
         Returns:
             行业研究结果
         """
-        prompt = f"""
-作为行业研究专家，请对"{target_industry}"行业进行深入分析。
-
-请从以下角度进行研究：
-1. 行业发展现状
-2. 未来发展趋势
-3. 主要驱动因素
-4. 面临的挑战
-5. 薪资水平分析
-6. 就业前景评估
-
-请严格以JSON格式返回研究结果，不要包含任何解释性文字：
-{{
-    "industry_overview": "行业概述",
-    "current_status": "发展现状",
-    "future_trends": ["未来趋势"],
-    "growth_drivers": ["增长驱动因素"],
-    "challenges": ["面临挑战"],
-    "salary_analysis": {{
-        "entry_level": "入门级薪资",
-        "mid_level": "中级薪资",
-        "senior_level": "高级薪资"
-    }},
-    "job_prospects": "就业前景",
-    "key_companies": ["重点企业"],
-    "recommendations": ["行业建议"]
-}}
-"""
+        return self.call_llm(**self._research_industry_trends_request(target_industry, reference_snippets),
+                             stream_callback=stream_callback)
+    
+    async def aresearch_industry_trends(self, target_industry: str, stream_callback: Optional[callable] = None,
+                                        reference_snippets: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """research_industry_trends 的异步版本"""
+        return await self.acall_llm(**self._research_industry_trends_request(target_industry, reference_snippets),
+                                    stream_callback=stream_callback)
+    
+    def _research_industry_trends_request(self, target_industry: str,
+                                          reference_snippets: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """构建 research_industry_trends 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "research_industry_trends", prompt_templates.RESEARCH_INDUSTRY_TRENDS,
+            target_industry=target_industry,
+            references=self._reference_section(reference_snippets)
+        )
         
-        return self.call_llm(prompt, stream_callback=stream_callback, max_tokens=5000)
+        return {"prompt": prompt, "method": "research_industry_trends"}
 
-    def analyze_career_opportunities(self, target_career: str, user_profile: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+    def analyze_career_opportunities(self, target_career: str, user_profile: Dict, stream_callback: Optional[callable] = None,
+                                     reference_snippets: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         分析职业机会
         
@@ -413,47 +1396,30 @@ class DashScopeService:
             target_career: 目标职业
             user_profile: 用户画像
             stream_callback: 流式输出回调
+            reference_snippets: 检索到的搜索结果，作为参考资料附加到提示词
             
         Returns:
             职业分析结果
         """
-        prompt = f"""
-作为职业发展顾问，请分析"{target_career}"这个职业方向的机会和要求。
-
-用户信息如下：
-{json.dumps(user_profile, ensure_ascii=False, indent=2)}
-
-请从以下方面进行分析：
-1. 职位职责和要求
-2. 技能要求分析
-3. 职业发展路径
-4. 市场需求情况
-5. AI替代风险评估
-6. 与用户背景的匹配度
-
-请严格以JSON格式返回分析结果，不要包含任何解释性文字：
-{{
-    "job_description": "职位描述",
-    "key_responsibilities": ["主要职责"],
-    "required_skills": {{
-        "must_have": ["必备技能"],
-        "nice_to_have": ["加分技能"]
-    }},
-    "career_path": ["职业发展路径"],
-    "market_demand": "市场需求分析",
-    "ai_replacement_risk": {{
-        "risk_level": "低/中/高",
-        "risk_factors": ["风险因素"],
-        "mitigation_strategies": ["应对策略"]
-    }},
-    "user_match_score": 0-100,
-    "gap_analysis": ["技能缺口"],
-    "recommendations": ["职业建议"]
-}}
-"""
+        return self.call_llm(**self._analyze_career_opportunities_request(target_career, user_profile, reference_snippets),
+                             stream_callback=stream_callback)
+    
+    async def aanalyze_career_opportunities(self, target_career: str, user_profile: Dict, stream_callback: Optional[callable] = None,
+                                            reference_snippets: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """analyze_career_opportunities 的异步版本"""
+        return await self.acall_llm(**self._analyze_career_opportunities_request(target_career, user_profile, reference_snippets),
+                                    stream_callback=stream_callback)
+    
+    def _analyze_career_opportunities_request(self, target_career: str, user_profile: Dict,
+                                              reference_snippets: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """构建 analyze_career_opportunities 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "analyze_career_opportunities", prompt_templates.ANALYZE_CAREER_OPPORTUNITIES,
+            target_career=target_career, user_profile=user_profile,
+            references=self._reference_section(reference_snippets)
+        )
         
-        context = {"user_profile": user_profile}
-        return self.call_llm(prompt, stream_callback=stream_callback, max_tokens=5000)
+        return {"prompt": prompt, "method": "analyze_career_opportunities"}
 
     def generate_integrated_report(self, analysis_results: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
@@ -466,42 +1432,26 @@ class DashScopeService:
         Returns:
             综合报告
         """
-        prompt = f"""
-作为资深职业规划顾问，请基于以下分析结果，为用户生成一份综合的职业规划报告。
-
-分析结果如下：
-{json.dumps(analysis_results, ensure_ascii=False, indent=2, cls=CustomJsonEncoder)}
-
-报告应该包括：
-1. 执行摘要
-2. 个人能力分析总结
-3. 行业机会分析
-4. 职业匹配度评估
-5. 发展建议和行动计划
-6. 风险提示
-
-请严格以JSON格式返回报告，不要包含任何解释性文字：
-{{
-    "executive_summary": "执行摘要",
-    "personal_analysis": "个人分析总结",
-    "industry_opportunities": "行业机会分析",
-    "career_match": {{
-        "match_score": "整数类型，取值范围 0-100（例如 95，不要使用小数）",
-        "match_reasons": ["匹配原因"],
-        "concerns": ["关注点"]
-    }},
-    "development_plan": {{
-        "short_term": ["短期建议"],
-        "medium_term": ["中期建议"],
-        "long_term": ["长期建议"]
-    }},
-    "action_items": ["具体行动项"],
-    "risk_warnings": ["风险提示"],
-    "next_steps": ["下一步行动"]
-}}
-"""
+        return self.call_llm(**self._generate_integrated_report_request(analysis_results), stream_callback=stream_callback)
+    
+    async def agenerate_integrated_report(self, analysis_results: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """generate_integrated_report 的异步版本"""
+        return await self.acall_llm(**self._generate_integrated_report_request(analysis_results), stream_callback=stream_callback)
+    
+    def _generate_integrated_report_request(self, analysis_results: Dict) -> Dict[str, Any]:
+        """构建 generate_integrated_report 的 LLM 请求参数"""
+        packed_results, pack_report = self.context_packer.pack(analysis_results)
+        llm_logger.info(
+            f"综合报告上下文打包: {pack_report['original_tokens']} -> {pack_report['packed_tokens']} tokens "
+            f"(节省 {pack_report['saved_tokens']}, 压缩级别 {pack_report['level']}, "
+            f"丢弃 {pack_report['dropped'] or '无'})"
+        )
+        prompt = self.prompts.render(
+            "generate_integrated_report", prompt_templates.GENERATE_INTEGRATED_REPORT,
+            analysis_results=packed_results
+        )
         
-        return self.call_llm(prompt, stream_callback=stream_callback, max_tokens=5000)
+        return {"prompt": prompt, "method": "generate_integrated_report"}
 
     def decompose_career_goals(self, career_direction: str, user_profile: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
@@ -515,52 +1465,20 @@ class DashScopeService:
         Returns:
             目标拆分结果
         """
-        prompt = f"""
-作为职业规划专家，请将用户的职业目标拆分为具体的、可执行的阶段性目标。
-
-职业方向: {career_direction}
-
-用户信息如下：
-{json.dumps(user_profile, ensure_ascii=False, indent=2)}
-
-请按照SMART原则（具体、可衡量、可达成、相关性、时限性）制定目标：
-
-请以JSON格式返回目标拆分：
-{{
-    "long_term_goals": [
-        {{
-            "title": "目标标题",
-            "description": "详细描述",
-            "timeline": "3-5年",
-            "success_criteria": ["成功标准"],
-            "required_skills": ["所需技能"],
-            "milestones": ["关键里程碑"]
-        }}
-    ],
-    "medium_term_goals": [
-        {{
-            "title": "目标标题",
-            "description": "详细描述",
-            "timeline": "1-3年",
-            "success_criteria": ["成功标准"],
-            "required_skills": ["所需技能"],
-            "milestones": ["关键里程碑"]
-        }}
-    ],
-    "short_term_goals": [
-        {{
-            "title": "目标标题",
-            "description": "详细描述",
-            "timeline": "3-12个月",
-            "success_criteria": ["成功标准"],
-            "required_skills": ["所需技能"],
-            "milestones": ["关键里程碑"]
-        }}
-    ]
-}}
-"""
+        return self.call_llm(**self._decompose_career_goals_request(career_direction, user_profile), stream_callback=stream_callback)
+    
+    async def adecompose_career_goals(self, career_direction: str, user_profile: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """decompose_career_goals 的异步版本"""
+        return await self.acall_llm(**self._decompose_career_goals_request(career_direction, user_profile), stream_callback=stream_callback)
+    
+    def _decompose_career_goals_request(self, career_direction: str, user_profile: Dict) -> Dict[str, Any]:
+        """构建 decompose_career_goals 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "decompose_career_goals", prompt_templates.DECOMPOSE_CAREER_GOALS,
+            career_direction=career_direction, user_profile=user_profile
+        )
         
-        return self.call_llm(prompt, stream_callback=stream_callback)
+        return {"prompt": prompt, "method": "decompose_career_goals"}
 
     def create_action_schedule(self, career_goals: List[Dict], user_constraints: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
@@ -574,60 +1492,20 @@ class DashScopeService:
         Returns:
             行动计划
         """
-        prompt = f"""
-作为时间管理和职业规划专家，请基于用户的职业目标，制定详细的行动计划。
-
-职业目标如下：
-{json.dumps(career_goals, ensure_ascii=False, indent=2)}
-
-用户约束条件如下：
-{json.dumps(user_constraints, ensure_ascii=False, indent=2)}
-请考虑用户的时间约束和实际情况，制定一个为期 8 周的可执行计划。
-
-硬性执行标准：
-
-覆盖周期：weekly_schedule 数组必须精确包含 8 个对象（Week 1 至 Week 8），严禁合并或省略任何一周。
-
-周内多任务制：每周的 tasks 数组必须包含 2到4 个具体的子任务，这些任务应共同支撑该周的 focus_area。
-
-请考虑用户的时间约束和实际情况，制定可执行的计划：
-
-请以JSON格式返回行动计划：
-{{
-    "schedule_overview": "计划概述",
-    "weekly_schedule": [
-        {{
-            "week": 1,
-            "focus_area": "重点领域",
-            "tasks": [
-                {{
-                    "task": "具体任务",
-                    "duration": "所需时间",
-                    "priority": "优先级",
-                    "resources": ["所需资源"]
-                }}
-            ]
-        }}
-    ],
-    "monthly_milestones": [
-        {{
-            "month": 1,
-            "milestone": "月度里程碑",
-            "deliverables": ["交付成果"],
-            "success_metrics": ["成功指标"]
-        }}
-    ],
-    "learning_plan": {{
-        "courses": ["推荐课程"],
-        "books": ["推荐书籍"],
-        "certifications": ["推荐认证"]
-    }},
-    "networking_plan": ["人脉建设建议"],
-    "progress_tracking": ["进度跟踪方法"]
-}}
-"""
+        return self.call_llm(**self._create_action_schedule_request(career_goals, user_constraints), stream_callback=stream_callback)
+    
+    async def acreate_action_schedule(self, career_goals: List[Dict], user_constraints: Dict, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
+        """create_action_schedule 的异步版本"""
+        return await self.acall_llm(**self._create_action_schedule_request(career_goals, user_constraints), stream_callback=stream_callback)
+    
+    def _create_action_schedule_request(self, career_goals: List[Dict], user_constraints: Dict) -> Dict[str, Any]:
+        """构建 create_action_schedule 的 LLM 请求参数"""
+        prompt = self.prompts.render(
+            "create_action_schedule", prompt_templates.CREATE_ACTION_SCHEDULE,
+            career_goals=career_goals, user_constraints=user_constraints
+        )
         
-        return self.call_llm(prompt, stream_callback=stream_callback)
+        return {"prompt": prompt, "method": "create_action_schedule"}
 
 
 # 创建全局服务实例
@@ -646,56 +1524,67 @@ tavily_tool = LoggedTavilySearch(
     tavily_api_key=TAVILY_API_KEY
 )
 
+# 外部搜索结果缓存
+def _create_search_cache() -> SearchResultCache:
+    from config.config import BaseConfig
+    return SearchResultCache(
+        max_entries=BaseConfig.SEARCH_CACHE_MAX_ENTRIES,
+        ttl=BaseConfig.SEARCH_CACHE_TTL,
+        negative_ttl=BaseConfig.SEARCH_CACHE_NEGATIVE_TTL,
+        sqlite_path=BaseConfig.SEARCH_CACHE_SQLITE_PATH,
+        enabled=BaseConfig.SEARCH_CACHE_ENABLED
+    )
+
+
+search_cache = _create_search_cache()
+
+
+def _mcp_search_query(api_name: str, params: Dict) -> Optional[str]:
+    """构建外部API对应的搜索查询语句，未知的API返回 None"""
+    if api_name == "user_profile_analysis":
+        # 搜索用户画像相关的职业测评信息
+        return f"职业测评 个人能力分析 {params.get('user_profile', {}).get('current_position', '')}"
+    if api_name == "industry_data":
+        # 搜索行业趋势和薪资数据
+        target_industry = params.get("target_industry", "科技行业")
+        return f"{target_industry} 行业趋势 薪资水平 2024"
+    if api_name == "job_market":
+        # 搜索职位市场信息
+        target_career = params.get("target_career", "产品经理")
+        return f"{target_career} 职位要求 薪资 招聘 2024"
+    return None
+
+
 # 真实的外部API调用函数
 def call_mcp_api(api_name: str, params: Dict) -> Dict:
     """
     调用真实的外部API获取数据
-    使用Tavily搜索工具获取最新的行业和职位信息
+    使用Tavily搜索工具获取最新的行业和职位信息，结果按 (API名称, 查询语句) 缓存
     """
     print(f"--- 外部API调用 ---")
     print(f"API: {api_name}, Params: {params}")
     
+    search_query = _mcp_search_query(api_name, params)
+    if search_query is None:
+        logger.warning(f"未知的API调用: {api_name}")
+        return {"error": f"未知的API: {api_name}"}
+    
+    cached = search_cache.get(api_name, search_query)
+    if cached is not None:
+        print(f"💾 搜索缓存命中: {api_name} - {search_query}")
+        return cached
+    
     try:
-        if api_name == "user_profile_analysis":
-            # 搜索用户画像相关的职业测评信息
-            search_query = f"职业测评 个人能力分析 {params.get('user_profile', {}).get('current_position', '')}"
-            search_results = tavily_tool.invoke({"query": search_query})
-            
-            # 直接返回Tavily获取到的文本信息
-            return {
-                "search_results": search_results,
-                "data_sources": [result.get("url", "") for result in search_results if isinstance(result, dict)]
-            }
-            
-        elif api_name == "industry_data":
-            # 搜索行业趋势和薪资数据
-            target_industry = params.get("target_industry", "科技行业")
-            search_query = f"{target_industry} 行业趋势 薪资水平 2024"
-            search_results = tavily_tool.invoke({"query": search_query})
-            
-            # 直接返回Tavily获取到的文本信息
-            return {
-                "search_results": search_results,
-                "data_sources": [result.get("url", "") for result in search_results if isinstance(result, dict)]
-            }
-            
-        elif api_name == "job_market":
-            # 搜索职位市场信息
-            target_career = params.get("target_career", "产品经理")
-            search_query = f"{target_career} 职位要求 薪资 招聘 2024"
-            search_results = tavily_tool.invoke({"query": search_query})
-            
-            # 直接返回Tavily获取到的文本信息
-            return {
-                "search_results": search_results,
-                "data_sources": [result.get("url", "") for result in search_results if isinstance(result, dict)]
-            }
+        search_results = tavily_tool.invoke({"query": search_query})
         
-        else:
-            logger.warning(f"未知的API调用: {api_name}")
-            return {"error": f"未知的API: {api_name}"}
-            
+        # 直接返回Tavily获取到的文本信息
+        result = {
+            "search_results": search_results,
+            "data_sources": [item.get("url", "") for item in search_results if isinstance(item, dict)]
+        }
     except Exception as e:
         logger.error(f"API调用失败: {api_name}, 错误: {str(e)}")
-        return {"error": f"API调用失败: {str(e)}"}
-
+        result = {"error": f"API调用失败: {str(e)}"}
+    
+    search_cache.set(api_name, search_query, result)
+    return result
@@ -0,0 +1,147 @@
+"""
+模型路由
+按服务方法或工作流节点选择模型、温度和 max_tokens：简单的判断类调用走快速模型，
+重度综合分析走 Ultra。路由表可在运行时通过接口更新，或从 JSON 文件热加载
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, Optional
+
+from src.utils.logger import llm_logger
+
+# 节点路由的键前缀，例如 "node:planner"
+NODE_PREFIX = "node:"
+
+# cascade_from: 先用该档位的模型生成，输出不合格时再使用本路由的模型
+ROUTE_KEYS = ("tier", "model", "temperature", "max_tokens", "cascade_from")
+
+
+class ModelRouter:
+    """服务方法/节点 -> 模型参数的路由表"""
+
+    def __init__(self, default: Dict[str, Any], tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+                 routes: Optional[Dict[str, Dict[str, Any]]] = None,
+                 routes_file: Optional[str] = None, reload_interval: float = 5.0):
+        """
+        Args:
+            default: 未配置路由时使用的参数 {"model", "temperature", "max_tokens"}
+            tiers: 模型档位 {"fast": {"model": "lite"}, ...}，路由中可用 tier 引用
+            routes: 路由表 {方法名 或 "node:节点名": {"tier"/"model"/"temperature"/"max_tokens"/"cascade_from"}}
+            routes_file: JSON 格式的路由文件，修改后自动重新加载，文件中的路由与 routes 合并后替换整个路由表
+            reload_interval: 检查路由文件是否变化的最小间隔(秒)
+        """
+        self.default = dict(default)
+        self.tiers = {name: dict(params) for name, params in (tiers or {}).items()}
+        self.routes_file = routes_file or None
+        self.reload_interval = reload_interval
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._base_routes = dict(routes or {})
+        self._lock = threading.Lock()
+        self._file_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.update(routes or {})
+        self._maybe_reload()
+
+    def resolve(self, method: Optional[str] = None, node: Optional[str] = None) -> Dict[str, Any]:
+        """
+        解析一次调用使用的模型参数 (节点路由优先于方法路由)
+
+        Args:
+            method: 服务方法名
+            node: 工作流节点名
+
+        Returns:
+            {"model", "temperature", "max_tokens", "tier", "cascade_from", "route"}
+        """
+        self._maybe_reload()
+        params = dict(self.default, tier=None, cascade_from=None, route=None)
+        with self._lock:
+            candidates = [(method, self._routes.get(method)),
+                          (f"{NODE_PREFIX}{node}", self._routes.get(f"{NODE_PREFIX}{node}"))]
+        for key, route in candidates:
+            if not route:
+                continue
+            if route.get("tier"):
+                params.update(self.tiers[route["tier"]], tier=route["tier"])
+            params.update({k: v for k, v in route.items() if k != "tier"}, route=key)
+        return params
+
+    def tier_params(self, tier: str) -> Dict[str, Any]:
+        """获取档位的模型参数"""
+        return dict(self.tiers[tier])
+
+    def update(self, routes: Dict[str, Dict[str, Any]], replace: bool = False):
+        """
+        更新路由表
+
+        Args:
+            routes: 新的路由，值为 None 时删除该路由
+            replace: 是否替换整个路由表
+
+        Raises:
+            ValueError: 路由格式错误或引用了不存在的档位
+        """
+        validated = {key: self._validate(key, route) for key, route in routes.items()}
+        with self._lock:
+            if replace:
+                self._routes = {}
+            for key, route in validated.items():
+                if route is None:
+                    self._routes.pop(key, None)
+                else:
+                    self._routes[key] = route
+
+    def routes(self) -> Dict[str, Any]:
+        """获取当前的路由配置"""
+        with self._lock:
+            routes = {key: dict(route) for key, route in self._routes.items()}
+        return {"default": dict(self.default), "tiers": {k: dict(v) for k, v in self.tiers.items()}, "routes": routes}
+
+    def _validate(self, key: str, route: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if route is None:
+            return None
+        if not isinstance(route, dict):
+            raise ValueError(f"路由 {key} 必须是对象")
+        unknown = set(route) - set(ROUTE_KEYS)
+        if unknown:
+            raise ValueError(f"路由 {key} 包含未知字段: {', '.join(sorted(unknown))}")
+        for field in ("tier", "cascade_from"):
+            if route.get(field) and route[field] not in self.tiers:
+                raise ValueError(f"路由 {key} 引用了不存在的档位: {route[field]}")
+        if "temperature" in route and not 0 <= float(route["temperature"]) <= 2:
+            raise ValueError(f"路由 {key} 的 temperature 超出范围")
+        if "max_tokens" in route and int(route["max_tokens"]) <= 0:
+            raise ValueError(f"路由 {key} 的 max_tokens 必须为正数")
+        return dict(route)
+
+    def _maybe_reload(self):
+        """路由文件修改后重新加载"""
+        if not self.routes_file:
+            return
+        now = time.time()
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.reload_interval
+        try:
+            mtime = os.path.getmtime(self.routes_file)
+        except OSError:
+            return
+        if mtime == self._file_mtime:
+            return
+        try:
+            with open(self.routes_file, encoding="utf-8") as f:
+                routes = json.load(f)
+            if not isinstance(routes, dict):
+                raise ValueError("路由文件的顶层必须是对象")
+            # 文件中删掉的路由随之失效，而不是残留在路由表中
+            self.update({**self._base_routes, **routes}, replace=True)
+        except Exception as e:
+            # 记录修改时间之前失败，文件修正后会在下次检查时重新加载
+            llm_logger.warning(f"模型路由文件加载失败，继续使用当前路由: {str(e)}")
+            return
+        self._file_mtime = mtime
+        llm_logger.info(f"已加载模型路由文件: {self.routes_file}")
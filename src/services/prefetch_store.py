@@ -0,0 +1,97 @@
+"""
+会话级预取任务存储
+/start 创建会话时提交的后台任务 (如外部搜索) 按 (会话ID, 键) 保存 Future，
+工作流节点执行到相应步骤时取走结果，而不是再次发起请求
+"""
+
+import time
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class PrefetchStore:
+    """按会话保存预取 Future，取走即删除，超时未取的任务被清理"""
+
+    def __init__(self, executor: Executor, ttl: float = 600, enabled: bool = True):
+        """
+        初始化存储
+
+        Args:
+            executor: 执行预取任务的线程池
+            ttl: 预取结果的保留时间(秒)，超过后视为失效
+            enabled: 预取总开关，关闭时 submit 不执行任何操作
+        """
+        self.executor = executor
+        self.ttl = ttl
+        self.enabled = enabled
+        self._futures: Dict[Tuple[str, Hashable], Tuple[float, Future]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "taken": 0, "expired": 0}
+
+    def submit(self, session_id: str, key: Hashable, func: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        提交预取任务，同一会话同一键已有未取走的任务时直接复用
+
+        Args:
+            session_id: 会话ID
+            key: 任务键 (取结果时使用相同的键)
+            func: 任务函数
+
+        Returns:
+            任务的 Future，预取关闭时返回 None
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            entry = self._futures.get((session_id, key))
+            if entry is not None:
+                return entry[1]
+            future = self.executor.submit(func, *args, **kwargs)
+            self._futures[(session_id, key)] = (now, future)
+            self._stats["submitted"] += 1
+        return future
+
+    def take(self, session_id: Optional[str], key: Hashable) -> Optional[Future]:
+        """
+        取走预取任务 (不等待完成)
+
+        Args:
+            session_id: 会话ID
+            key: 任务键
+
+        Returns:
+            任务的 Future，没有预取或已失效时返回 None
+        """
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._futures.pop((session_id, key), None)
+            if entry is None:
+                return None
+            if entry[0] + self.ttl <= time.time():
+                self._stats["expired"] += 1
+                return None
+            self._stats["taken"] += 1
+        return entry[1]
+
+    def discard(self, session_id: str):
+        """丢弃会话的所有预取任务 (已开始执行的任务不会被中断)"""
+        with self._lock:
+            for k in [k for k in self._futures if k[0] == session_id]:
+                self._futures.pop(k)[1].cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取预取统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._futures)
+        return stats
+
+    def _purge(self, now: float):
+        """清理超时未取走的任务 (调用方持有锁)"""
+        for k in [k for k, (created, _) in self._futures.items() if created + self.ttl <= now]:
+            self._futures.pop(k)[1].cancel()
+            self._stats["expired"] += 1
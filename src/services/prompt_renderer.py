@@ -0,0 +1,173 @@
+"""
+提示词渲染
+模板在导入时预编译 (切分为字面量和 $占位符)，渲染时只做拼接；
+结构化数据紧凑序列化，去掉空字段和重复的列表元素，已内嵌在提示词中的上下文不再重复附加，
+并按服务方法统计提示词 token 数以及相对旧格式 (indent=2 全量序列化) 节省的 token 数
+"""
+
+import re
+import json
+import threading
+from typing import Dict, Any, List, Optional, Union
+
+from src.utils.logger import CustomJsonEncoder
+from src.utils.token_estimator import estimate_tokens
+
+_PLACEHOLDER = re.compile(r"\$([a-z_][a-z0-9_]*)")
+
+_EMPTY = (None, "", [], {})
+
+
+def clean_value(value: Any) -> Any:
+    """递归去掉空值 (None、空字符串、空列表、空字典) 和列表中的重复元素"""
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            item = clean_value(item)
+            if item not in _EMPTY:
+                cleaned[key] = item
+        return cleaned
+    if isinstance(value, (list, tuple)):
+        seen = set()
+        cleaned = []
+        for item in value:
+            item = clean_value(item)
+            if item in _EMPTY:
+                continue
+            fingerprint = json.dumps(item, ensure_ascii=False, sort_keys=True, cls=CustomJsonEncoder)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                cleaned.append(item)
+        return cleaned
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _plain(value: Any) -> Any:
+    """把枚举、日期等对象转换为 JSON 基本类型"""
+    return json.loads(json.dumps(value, ensure_ascii=False, cls=CustomJsonEncoder))
+
+
+def _legacy_json(value: Any) -> str:
+    """旧格式的序列化 (indent=2，不去空值)，用于统计节省的 token"""
+    return json.dumps(value, ensure_ascii=False, indent=2, cls=CustomJsonEncoder)
+
+
+class PromptTemplate:
+    """预编译的提示词模板，占位符写作 $name，JSON 示例中的花括号无需转义"""
+
+    def __init__(self, text: str):
+        self.text = text.strip()
+        parts = _PLACEHOLDER.split(self.text)
+        self._literals: List[str] = parts[0::2]
+        self.fields: List[str] = parts[1::2]
+
+    def render(self, values: Dict[str, str]) -> str:
+        """用已序列化的字符串填充占位符"""
+        out = [self._literals[0]]
+        for name, literal in zip(self.fields, self._literals[1:]):
+            out.append(values[name])
+            out.append(literal)
+        return "".join(out)
+
+
+class PromptRenderer:
+    """渲染提示词并按服务方法统计 token 数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Dict[str, int]] = {}
+
+    def render(self, method: str, template: PromptTemplate, **values: Any) -> str:
+        """
+        渲染模板
+
+        Args:
+            method: 服务方法名 (用于统计)
+            template: 预编译模板
+            **values: 占位符取值，dict/list 紧凑序列化，None 渲染为空字符串
+
+        Returns:
+            提示词
+        """
+        rendered = {}
+        saved = 0
+        for name in template.fields:
+            text, legacy_tokens = self._render_value(values.get(name))
+            rendered[name] = text
+            saved += legacy_tokens - estimate_tokens(text)
+        self._add(method, saved_tokens=saved)
+        return template.render(rendered)
+
+    def render_context(self, method: Optional[str], prompt: str, context: Optional[Dict] = None) -> str:
+        """
+        把上下文信息附加到提示词之前，空值和已内嵌在提示词中的内容被跳过
+
+        Args:
+            method: 服务方法名 (用于统计)
+            prompt: 基础提示词
+            context: 上下文信息
+
+        Returns:
+            完整的提示词
+        """
+        lines = []
+        saved = 0
+        for key, value in (context or {}).items():
+            text, legacy_tokens = self._render_value(value)
+            legacy_tokens += estimate_tokens(f"{key}: \n")
+            if not text or text in prompt:
+                saved += legacy_tokens
+                continue
+            line = f"{key}: {text}"
+            lines.append(line)
+            saved += legacy_tokens - estimate_tokens(line)
+        if context:
+            self._add(method, saved_tokens=saved)
+        if not lines:
+            return prompt
+        return "上下文信息:\n" + "\n".join(lines) + "\n\n" + prompt
+
+    def record(self, method: Optional[str], prompt_tokens: int):
+        """记录一次实际发送的提示词的 token 数"""
+        self._add(method, calls=1, prompt_tokens=prompt_tokens)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按服务方法汇总的 token 报告
+
+        Returns:
+            {method: {calls, prompt_tokens, avg_prompt_tokens, saved_tokens, legacy_tokens, reduction}}
+        """
+        with self._lock:
+            methods = {m: dict(s) for m, s in self._methods.items()}
+        for stats in methods.values():
+            calls = stats["calls"]
+            stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / calls, 1) if calls else 0
+            stats["legacy_tokens"] = stats["prompt_tokens"] + stats["saved_tokens"]
+            stats["reduction"] = (
+                round(stats["saved_tokens"] / stats["legacy_tokens"], 4) if stats["legacy_tokens"] else 0.0
+            )
+        return methods
+
+    @staticmethod
+    def _render_value(value: Any) -> tuple:
+        """
+        Returns:
+            (渲染后的文本, 旧格式下的 token 数)
+        """
+        if value is None:
+            return "", 0
+        if isinstance(value, (dict, list, tuple)):
+            cleaned = clean_value(_plain(value))
+            text = "" if cleaned in _EMPTY else json.dumps(cleaned, ensure_ascii=False, separators=(",", ":"))
+            return text, estimate_tokens(_legacy_json(value))
+        text = str(value)
+        return text, estimate_tokens(text)
+
+    def _add(self, method: Optional[str], **counters: Union[int, float]):
+        with self._lock:
+            stats = self._methods.setdefault(method or "unknown", {"calls": 0, "prompt_tokens": 0, "saved_tokens": 0})
+            for name, amount in counters.items():
+                stats[name] += amount
@@ -0,0 +1,288 @@
+"""
+各服务方法的提示词模板
+占位符写作 $name，由 PromptRenderer 填充 (结构化数据会被紧凑序列化)
+"""
+
+from src.services.prompt_renderer import PromptTemplate
+
+
+# 职业目标清晰度分析
+ANALYZE_CAREER_GOAL_CLARITY = PromptTemplate("""
+作为一名专业的职业规划顾问，请分析用户的职业目标是否明确。
+
+用户请求: $user_request
+
+请从以下几个维度进行分析：
+1. 目标职位是否具体明确
+2. 行业方向是否清晰
+3. 时间规划是否合理
+4. 个人能力与目标的匹配度
+
+请以JSON格式返回分析结果：
+{
+    "is_goal_clear": true/false,
+    "clarity_score": 0-100,
+    "reason": "分析原因",
+    "missing_info": ["缺失的关键信息"],
+    "suggestions": ["改进建议"]
+}
+""")
+
+
+# 职业分析策略
+CREATE_ANALYSIS_STRATEGY = PromptTemplate("""
+作为职业规划专家，请为用户制定一个详细的职业分析策略。
+
+请考虑以下因素：
+1. 用户的教育背景和工作经验
+2. 用户的技能和兴趣
+3. 目标行业的发展趋势
+4. 市场需求和竞争情况
+
+请以JSON格式返回策略：
+{
+    "strategy_overview": "策略概述",
+    "analysis_priorities": ["分析重点"],
+    "data_sources": ["数据来源"],
+    "timeline": "分析时间线",
+    "expected_outcomes": ["预期结果"]
+}
+""")
+
+
+# 个人画像分析
+ANALYZE_USER_PROFILE = PromptTemplate("""
+作为职业测评专家，请基于提供的用户信息，对用户进行全面的个人能力画像分析。
+
+用户信息如下：
+$user_profile
+
+请从以下维度进行分析：
+1. 核心技能评估
+2. 性格特质分析
+3. 职业兴趣匹配
+4. 发展潜力评估
+5. 优势与劣势识别
+
+请严格以JSON格式返回分析结果，不要包含任何解释性文字或Markdown代码块标记以外的内容：
+{
+    "strengths": ["核心优势"],
+    "weaknesses": ["需要改进的方面"],
+    "personality_traits": ["性格特质"],
+    "skill_assessment": {
+        "technical_skills": ["技术技能"],
+        "soft_skills": ["软技能"],
+        "skill_gaps": ["技能缺口"]
+    },
+    "career_interests": ["职业兴趣"],
+    "development_potential": "发展潜力评估",
+    "recommendations": ["个人发展建议"]
+}
+""")
+
+
+# 行业趋势研究
+RESEARCH_INDUSTRY_TRENDS = PromptTemplate("""
+作为行业研究专家，请对"$target_industry"行业进行深入分析。
+
+请从以下角度进行研究：
+1. 行业发展现状
+2. 未来发展趋势
+3. 主要驱动因素
+4. 面临的挑战
+5. 薪资水平分析
+6. 就业前景评估
+$references
+请严格以JSON格式返回研究结果，不要包含任何解释性文字：
+{
+    "industry_overview": "行业概述",
+    "current_status": "发展现状",
+    "future_trends": ["未来趋势"],
+    "growth_drivers": ["增长驱动因素"],
+    "challenges": ["面临挑战"],
+    "salary_analysis": {
+        "entry_level": "入门级薪资",
+        "mid_level": "中级薪资",
+        "senior_level": "高级薪资"
+    },
+    "job_prospects": "就业前景",
+    "key_companies": ["重点企业"],
+    "recommendations": ["行业建议"]
+}
+""")
+
+
+# 职业机会分析
+ANALYZE_CAREER_OPPORTUNITIES = PromptTemplate("""
+作为职业发展顾问，请分析"$target_career"这个职业方向的机会和要求。
+
+用户信息如下：
+$user_profile
+
+请从以下方面进行分析：
+1. 职位职责和要求
+2. 技能要求分析
+3. 职业发展路径
+4. 市场需求情况
+5. AI替代风险评估
+6. 与用户背景的匹配度
+$references
+请严格以JSON格式返回分析结果，不要包含任何解释性文字：
+{
+    "job_description": "职位描述",
+    "key_responsibilities": ["主要职责"],
+    "required_skills": {
+        "must_have": ["必备技能"],
+        "nice_to_have": ["加分技能"]
+    },
+    "career_path": ["职业发展路径"],
+    "market_demand": "市场需求分析",
+    "ai_replacement_risk": {
+        "risk_level": "低/中/高",
+        "risk_factors": ["风险因素"],
+        "mitigation_strategies": ["应对策略"]
+    },
+    "user_match_score": 0-100,
+    "gap_analysis": ["技能缺口"],
+    "recommendations": ["职业建议"]
+}
+""")
+
+
+# 综合报告
+GENERATE_INTEGRATED_REPORT = PromptTemplate("""
+作为资深职业规划顾问，请基于以下分析结果，为用户生成一份综合的职业规划报告。
+
+分析结果如下：
+$analysis_results
+
+报告应该包括：
+1. 执行摘要
+2. 个人能力分析总结
+3. 行业机会分析
+4. 职业匹配度评估
+5. 发展建议和行动计划
+6. 风险提示
+
+请严格以JSON格式返回报告，不要包含任何解释性文字：
+{
+    "executive_summary": "执行摘要",
+    "personal_analysis": "个人分析总结",
+    "industry_opportunities": "行业机会分析",
+    "career_match": {
+        "match_score": "整数类型，取值范围 0-100（例如 95，不要使用小数）",
+        "match_reasons": ["匹配原因"],
+        "concerns": ["关注点"]
+    },
+    "development_plan": {
+        "short_term": ["短期建议"],
+        "medium_term": ["中期建议"],
+        "long_term": ["长期建议"]
+    },
+    "action_items": ["具体行动项"],
+    "risk_warnings": ["风险提示"],
+    "next_steps": ["下一步行动"]
+}
+""")
+
+
+# 职业目标拆分
+DECOMPOSE_CAREER_GOALS = PromptTemplate("""
+作为职业规划专家，请将用户的职业目标拆分为具体的、可执行的阶段性目标。
+
+职业方向: $career_direction
+
+用户信息如下：
+$user_profile
+
+请按照SMART原则（具体、可衡量、可达成、相关性、时限性）制定目标：
+
+请以JSON格式返回目标拆分：
+{
+    "long_term_goals": [
+        {
+            "title": "目标标题",
+            "description": "详细描述",
+            "timeline": "3-5年",
+            "success_criteria": ["成功标准"],
+            "required_skills": ["所需技能"],
+            "milestones": ["关键里程碑"]
+        }
+    ],
+    "medium_term_goals": [
+        {
+            "title": "目标标题",
+            "description": "详细描述",
+            "timeline": "1-3年",
+            "success_criteria": ["成功标准"],
+            "required_skills": ["所需技能"],
+            "milestones": ["关键里程碑"]
+        }
+    ],
+    "short_term_goals": [
+        {
+            "title": "目标标题",
+            "description": "详细描述",
+            "timeline": "3-12个月",
+            "success_criteria": ["成功标准"],
+            "required_skills": ["所需技能"],
+            "milestones": ["关键里程碑"]
+        }
+    ]
+}
+""")
+
+
+# 行动计划
+CREATE_ACTION_SCHEDULE = PromptTemplate("""
+作为时间管理和职业规划专家，请基于用户的职业目标，制定详细的行动计划。
+
+职业目标如下：
+$career_goals
+
+用户约束条件如下：
+$user_constraints
+请考虑用户的时间约束和实际情况，制定一个为期 8 周的可执行计划。
+
+硬性执行标准：
+
+覆盖周期：weekly_schedule 数组必须精确包含 8 个对象（Week 1 至 Week 8），严禁合并或省略任何一周。
+
+周内多任务制：每周的 tasks 数组必须包含 2到4 个具体的子任务，这些任务应共同支撑该周的 focus_area。
+
+请考虑用户的时间约束和实际情况，制定可执行的计划：
+
+请以JSON格式返回行动计划：
+{
+    "schedule_overview": "计划概述",
+    "weekly_schedule": [
+        {
+            "week": 1,
+            "focus_area": "重点领域",
+            "tasks": [
+                {
+                    "task": "具体任务",
+                    "duration": "所需时间",
+                    "priority": "优先级",
+                    "resources": ["所需资源"]
+                }
+            ]
+        }
+    ],
+    "monthly_milestones": [
+        {
+            "month": 1,
+            "milestone": "月度里程碑",
+            "deliverables": ["交付成果"],
+            "success_metrics": ["成功指标"]
+        }
+    ],
+    "learning_plan": {
+        "courses": ["推荐课程"],
+        "books": ["推荐书籍"],
+        "certifications": ["推荐认证"]
+    },
+    "networking_plan": ["人脉建设建议"],
+    "progress_tracking": ["进度跟踪方法"]
+}
+""")
@@ -0,0 +1,259 @@
+"""
+LLM 调用全局限流
+请求数 (每秒) 和 token 数 (每分钟) 两个令牌桶，加上最大并发数限制；
+等待中的调用按会话轮转放行，避免某个会话的并行节点占满配额
+"""
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, TYPE_CHECKING
+
+from src.utils.logger import llm_logger
+from src.services.llm_context import get_session_id
+
+if TYPE_CHECKING:
+    from src.services.cancellation import CancellationToken
+
+
+class TokenBucket:
+    """令牌桶 (调用方负责加锁)"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量 (允许的突发量)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """取出 amount 个令牌还需等待的秒数，0 表示可以立即取出"""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # 超过容量的请求按满桶计，避免永远等待
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> float:
+        """取出令牌，返回实际扣除的数量 (超过容量的请求按满桶扣除)"""
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        return amount
+
+    def give_back(self, amount: float):
+        """归还 (或在 amount 为负时追扣) 令牌"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Waiter:
+    """一个等待放行的调用，同步调用方用 Event 等待，异步调用方用所在事件循环的 Future 等待"""
+
+    def __init__(self, session: str, tokens: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.session = session
+        self.tokens = tokens
+        self.charged = 0.0  # 放行时实际从 token 桶扣除的数量
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+        self._loop = loop
+        self._event = threading.Event() if loop is None else None
+        self._future = loop.create_future() if loop is not None else None
+
+    def grant(self):
+        self.granted = True
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+class LLMRateLimiter:
+    """请求/秒 + token/分钟 + 最大并发 的全局限流器，按会话公平排队"""
+
+    def __init__(self, requests_per_second: float = 4.0, burst: int = 8,
+                 tokens_per_minute: int = 120000, max_concurrency: int = 8,
+                 enabled: bool = True):
+        """
+        初始化限流器
+
+        Args:
+            requests_per_second: 每秒请求数，<=0 表示不限制
+            burst: 请求数令牌桶容量
+            tokens_per_minute: 每分钟 token 数，<=0 表示不限制
+            max_concurrency: 同时进行的上游请求数上限
+            enabled: 限流总开关
+        """
+        self.enabled = enabled
+        self.max_concurrency = max(1, max_concurrency)
+        self._request_bucket = TokenBucket(requests_per_second, max(1, burst)) if requests_per_second > 0 else None
+        self._token_bucket = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute) if tokens_per_minute > 0 else None
+
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stats = {"granted": 0, "queued": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    def acquire(self, tokens: int = 0, session: Optional[str] = None,
+                cancel_token: Optional["CancellationToken"] = None) -> Optional[_Waiter]:
+        """
+        同步获取调用许可，阻塞直到放行或运行被取消
+
+        Args:
+            tokens: 本次调用预计消耗的 token 数
+            session: 会话ID，默认取当前调用上下文中的会话
+            cancel_token: 运行的取消令牌，取消时放弃等待
+
+        Returns:
+            许可，调用结束后需传给 release；未启用限流时返回 None
+
+        Raises:
+            WorkflowCancelled: 等待期间或放行时运行已被取消 (许可已归还)
+        """
+        if not self.enabled:
+            return None
+        waiter = _Waiter(session or get_session_id(), tokens)
+        self._enqueue(waiter)
+        if cancel_token is None:
+            waiter._event.wait()
+            return waiter
+        cancel_token.add_callback(waiter._event.set)
+        try:
+            waiter._event.wait()
+        finally:
+            cancel_token.remove_callback(waiter._event.set)
+        return self._check_cancelled(waiter, cancel_token)
+
+    async def aacquire(self, tokens: int = 0, session: Optional[str] = None,
+                       cancel_token: Optional["CancellationToken"] = None) -> Optional[_Waiter]:
+        """acquire 的异步版本，等待期间不阻塞事件循环"""
+        if not self.enabled:
+            return None
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(session or get_session_id(), tokens, loop)
+        self._enqueue(waiter)
+        wake = lambda: loop.call_soon_threadsafe(waiter._wake)
+        if cancel_token is not None:
+            cancel_token.add_callback(wake)
+        try:
+            await waiter._future
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(wake)
+        return self._check_cancelled(waiter, cancel_token)
+
+    def _check_cancelled(self, waiter: _Waiter, cancel_token: Optional["CancellationToken"]) -> _Waiter:
+        """放行后再检查一次取消令牌，已取消时归还许可并抛出 WorkflowCancelled"""
+        if cancel_token is not None and cancel_token.cancelled:
+            self._abandon(waiter)
+            cancel_token.raise_if_cancelled()
+        return waiter
+
+    def release(self, permit: Optional[_Waiter], used_tokens: Optional[int] = None):
+        """
+        归还调用许可
+
+        Args:
+            permit: acquire 返回的许可
+            used_tokens: 实际消耗的 token 数，用于校正预估值
+        """
+        if permit is None:
+            return
+        with self._lock:
+            self._active -= 1
+            if self._token_bucket is not None and used_tokens is not None:
+                # 按放行时实际扣除的数量结算，超出部分最多追扣到一个满桶
+                used = min(used_tokens, self._token_bucket.capacity)
+                self._token_bucket.give_back(permit.charged - used)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取限流统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active"] = self._active
+            stats["waiting"] = sum(len(q) for q in self._queues.values())
+            stats["waiting_sessions"] = len(self._queues)
+        stats["total_wait"] = round(stats["total_wait"], 3)
+        stats["max_wait"] = round(stats["max_wait"], 3)
+        return stats
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._lock:
+            self._queues.setdefault(waiter.session, deque()).append(waiter)
+            self._stats["queued"] += 1
+            self._dispatch()
+
+    def _abandon(self, waiter: _Waiter):
+        """调用方放弃等待 (被取消)"""
+        with self._lock:
+            if waiter.granted:
+                self._active -= 1
+                if self._token_bucket is not None:
+                    self._token_bucket.give_back(waiter.charged)
+            else:
+                queue = self._queues.get(waiter.session)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[waiter.session]
+            self._dispatch()
+
+    def _dispatch(self):
+        """按会话轮转放行等待者 (需持有锁)"""
+        now = time.monotonic()
+        while self._queues and self._active < self.max_concurrency:
+            session, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            wait = max(
+                self._request_bucket.wait_time(1, now) if self._request_bucket else 0.0,
+                self._token_bucket.wait_time(waiter.tokens, now) if self._token_bucket else 0.0
+            )
+            if wait > 0:
+                # 令牌不足时由定时器稍后再次放行，队首不被后来者插队
+                self._schedule(wait)
+                return
+            if self._request_bucket:
+                self._request_bucket.take(1)
+            if self._token_bucket:
+                waiter.charged = self._token_bucket.take(waiter.tokens)
+            queue.popleft()
+            if queue:
+                self._queues.move_to_end(session)
+            else:
+                del self._queues[session]
+            self._active += 1
+            waited = now - waiter.enqueued_at
+            self._stats["granted"] += 1
+            self._stats["total_wait"] += waited
+            self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+            if waited > 1.0:
+                llm_logger.info(f"⏳ LLM调用排队 {waited:.1f}s 后放行: session={session}")
+            waiter.grant()
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
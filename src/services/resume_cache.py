@@ -0,0 +1,137 @@
+"""
+简历解析结果缓存
+两级内容寻址: 文件字节的哈希 -> OCR 文本，OCR 文本的哈希 -> 用户画像；
+重复上传同一文件时跳过 OCR 和 LLM 解析，文件不同但识别出的文本相同时仍可跳过 LLM 解析，
+存储层复用 LLMResponseCache (进程内 LRU + 可选 SQLite，均有条目上限)
+"""
+
+import json
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, Any, Optional
+
+from config.config import BaseConfig
+from src.services.llm_cache import LLMResponseCache
+
+
+class ResumeCache:
+    """简历 OCR 文本与解析结果缓存"""
+
+    def __init__(self, max_entries: int = 256, ttl: int = 30 * 24 * 3600,
+                 sqlite_path: Optional[str] = None, sqlite_max_entries: int = 2000,
+                 enabled: bool = True):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 进程内 LRU 最大条目数
+            ttl: 过期时间(秒)
+            sqlite_path: SQLite 缓存文件路径，为空则只使用进程内缓存
+            sqlite_max_entries: SQLite 层最大条目数，0 表示不限制
+            enabled: 缓存总开关
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self._store = LLMResponseCache(max_entries=max_entries, default_ttl=ttl, sqlite_path=sqlite_path,
+                                       enabled=enabled, sqlite_max_entries=sqlite_max_entries)
+        self._lock = threading.Lock()
+        self._stats = {"text_hits": 0, "text_misses": 0, "profile_hits": 0, "profile_misses": 0}
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """分块计算文件内容的 sha256"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """归一化 OCR 文本: 全角转半角、合并空白"""
+        return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+    @staticmethod
+    def _key(kind: str, digest: str) -> str:
+        raw = json.dumps(["resume", kind, digest])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _text_key(self, text: str) -> str:
+        normalized = self.normalize_text(text)
+        return self._key("text", hashlib.sha256(normalized.encode("utf-8")).hexdigest())
+
+    def get_text(self, file_hash: str) -> Optional[str]:
+        """
+        读取文件对应的 OCR 文本
+
+        Args:
+            file_hash: file_hash() 的结果
+
+        Returns:
+            OCR 文本，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        value = self._store.get(self._key("file", file_hash))
+        self._count("text", value is not None)
+        return value["ocr_text"] if value is not None else None
+
+    def set_text(self, file_hash: str, ocr_text: str):
+        """写入文件对应的 OCR 文本 (空文本不缓存)"""
+        if self.enabled and ocr_text:
+            self._store.set(self._key("file", file_hash), {"ocr_text": ocr_text}, self.ttl)
+
+    def get_profile(self, ocr_text: str) -> Optional[Dict[str, Any]]:
+        """
+        读取 OCR 文本对应的用户画像
+
+        Args:
+            ocr_text: OCR 文本
+
+        Returns:
+            用户画像字典，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        value = self._store.get(self._text_key(ocr_text))
+        self._count("profile", value is not None)
+        return value["profile"] if value is not None else None
+
+    def set_profile(self, ocr_text: str, profile: Dict[str, Any]):
+        """写入 OCR 文本对应的用户画像 (空结果不缓存)"""
+        if self.enabled and profile:
+            self._store.set(self._text_key(ocr_text), {"profile": profile}, self.ttl)
+
+    def clear(self):
+        """清空所有缓存层"""
+        self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+        for layer in ("text", "profile"):
+            lookups = stats[f"{layer}_hits"] + stats[f"{layer}_misses"]
+            stats[f"{layer}_hit_rate"] = round(stats[f"{layer}_hits"] / lookups, 4) if lookups else 0.0
+        store = self._store.stats()
+        stats["memory_entries"] = store["memory_entries"]
+        stats["evictions"] = store["evictions"]
+        stats["sqlite_hits"] = store["sqlite_hits"]
+        stats["sqlite_evictions"] = store["sqlite_evictions"]
+        stats["sqlite_enabled"] = store["sqlite_enabled"]
+        return stats
+
+    def _count(self, layer: str, hit: bool):
+        with self._lock:
+            self._stats[f"{layer}_{'hits' if hit else 'misses'}"] += 1
+
+
+# 全局缓存
+resume_cache = ResumeCache(
+    max_entries=BaseConfig.RESUME_CACHE_MAX_ENTRIES,
+    ttl=BaseConfig.RESUME_CACHE_TTL,
+    sqlite_path=BaseConfig.RESUME_CACHE_SQLITE_PATH,
+    sqlite_max_entries=BaseConfig.RESUME_CACHE_SQLITE_MAX_ENTRIES,
+    enabled=BaseConfig.RESUME_CACHE_ENABLED
+)
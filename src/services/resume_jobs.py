@@ -0,0 +1,174 @@
+"""
+简历解析任务
+上传接口只保存文件并返回任务ID，OCR 和 LLM 解析在后台线程池中执行；
+任务按阶段记录进度 (saved -> ocr -> ocr_done -> parsing -> done / failed)，供轮询或 SSE 订阅
+"""
+
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+
+from config.config import BaseConfig
+from src.utils.logger import workflow_logger
+
+# 任务的终止阶段
+DONE = "done"
+FAILED = "failed"
+
+
+class ResumeJobError(Exception):
+    """任务失败且错误信息可直接展示给用户"""
+
+    def __init__(self, message: str, status_code: int = 422):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JobQueueFull(RuntimeError):
+    """排队中的任务数已达上限"""
+
+
+class ResumeJob:
+    """一个简历解析任务"""
+
+    def __init__(self, filename: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.filename = filename
+        self.stage = "saved"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.created = time.time()
+        self.updated = self.created
+        self.events: List[Dict[str, Any]] = []
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+        self.progress("saved")
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in (DONE, FAILED)
+
+    def progress(self, stage: str, detail: Optional[Dict[str, Any]] = None):
+        """进入新的阶段，通知等待中的订阅者"""
+        with self._cond:
+            self.stage = stage
+            self.updated = time.time()
+            self.events.append({
+                "stage": stage,
+                "elapsed": round(time.monotonic() - self._started, 3),
+                **(detail or {}),
+            })
+            self._cond.notify_all()
+
+    def wait_events(self, since: int, timeout: float) -> List[Dict[str, Any]]:
+        """
+        等待第 since 个之后的进度事件
+
+        Args:
+            since: 已收到的事件数
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            新的事件，超时为空列表
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > since, timeout)
+            return list(self.events[since:])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """任务状态 (完成后包含解析结果)"""
+        with self._cond:
+            return {
+                "job_id": self.id,
+                "filename": self.filename,
+                "stage": self.stage,
+                "finished": self.finished,
+                "progress": list(self.events),
+                "result": self.result,
+                "error": self.error,
+                "status_code": self.status_code,
+            }
+
+
+class ResumeJobManager:
+    """在后台线程池中执行简历解析任务"""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, ttl: float = 3600):
+        """
+        Args:
+            max_workers: 同时执行的任务数
+            max_pending: 未完成任务数上限，超出时拒绝新任务
+            ttl: 完成的任务保留多久(秒)
+        """
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resume-job")
+        self._jobs: Dict[str, ResumeJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Dict[str, Any]], *args: Any,
+               filename: Optional[str] = None) -> ResumeJob:
+        """
+        创建任务并提交到线程池
+
+        Args:
+            func: 任务函数，最后一个参数为进度回调 progress(stage, detail=None)，返回解析结果
+            *args: 任务函数的参数
+            filename: 上传的文件名
+
+        Returns:
+            新建的任务
+
+        Raises:
+            JobQueueFull: 未完成任务数已达上限
+        """
+        job = ResumeJob(filename)
+        with self._lock:
+            self._purge()
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"简历解析任务排队已达上限 ({self.max_pending})，请稍后重试")
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[ResumeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            stages: Dict[str, int] = {}
+            for job in self._jobs.values():
+                stages[job.stage] = stages.get(job.stage, 0) + 1
+        return {"jobs": sum(stages.values()), "stages": stages, "max_pending": self.max_pending}
+
+    def _run(self, job: ResumeJob, func: Callable[..., Dict[str, Any]], args: tuple):
+        try:
+            job.result = func(*args, job.progress)
+            job.progress(DONE)
+        except ResumeJobError as e:
+            job.error, job.status_code = str(e), e.status_code
+            job.progress(FAILED, {"error": job.error})
+        except Exception as e:
+            workflow_logger.error(f"简历解析任务 {job.id} 失败: {str(e)}", exc_info=True)
+            job.error, job.status_code = f"解析失败: {str(e)}", 500
+            job.progress(FAILED, {"error": job.error})
+
+    def _purge(self):
+        """移除过期的已完成任务 (调用方持有锁)"""
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.updated < cutoff]:
+            del self._jobs[job_id]
+
+
+# 全局任务管理器
+resume_jobs = ResumeJobManager(
+    max_workers=BaseConfig.RESUME_JOB_WORKERS,
+    max_pending=BaseConfig.RESUME_JOB_MAX_PENDING,
+    ttl=BaseConfig.RESUME_JOB_TTL
+)
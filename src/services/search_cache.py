@@ -0,0 +1,112 @@
+"""
+外部搜索结果缓存
+以 (API名称, 归一化后的查询语句) 为键缓存 Tavily 搜索结果，
+存储层复用 LLMResponseCache (进程内 LRU + 可选 SQLite)，失败结果只做短时间的负缓存
+"""
+
+import json
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, Any, Optional
+
+from src.services.llm_cache import LLMResponseCache
+
+
+class SearchResultCache:
+    """搜索结果缓存 (TTL + LRU，可选 SQLite 持久层，失败结果负缓存)"""
+
+    def __init__(self, max_entries: int = 256, ttl: int = 6 * 3600, negative_ttl: int = 60,
+                 sqlite_path: Optional[str] = None, enabled: bool = True):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 进程内 LRU 最大条目数
+            ttl: 成功结果的过期时间(秒)
+            negative_ttl: 失败结果的过期时间(秒)，0 表示不缓存失败结果
+            sqlite_path: SQLite 缓存文件路径，为空则只使用进程内缓存
+            enabled: 缓存总开关
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._store = LLMResponseCache(max_entries=max_entries, default_ttl=ttl,
+                                       sqlite_path=sqlite_path, enabled=enabled)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "sets": 0, "negative_sets": 0}
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """归一化查询语句: 全角转半角、转小写、合并空白"""
+        return " ".join(unicodedata.normalize("NFKC", query or "").lower().split())
+
+    @classmethod
+    def make_key(cls, api_name: str, query: str) -> str:
+        """计算缓存键"""
+        raw = json.dumps(["search", api_name, cls.normalize_query(query)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_failure(value: Dict[str, Any]) -> bool:
+        """调用失败或搜索工具返回了错误文本而不是结果列表"""
+        return "error" in value or not isinstance(value.get("search_results"), list)
+
+    def get(self, api_name: str, query: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            api_name: 外部API名称
+            query: 搜索查询语句
+
+        Returns:
+            缓存的结果 (可能是负缓存的失败结果)，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        value = self._store.get(self.make_key(api_name, query))
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+            elif self.is_failure(value):
+                self._stats["negative_hits"] += 1
+            else:
+                self._stats["hits"] += 1
+        return value
+
+    def set(self, api_name: str, query: str, value: Dict[str, Any]):
+        """
+        写入缓存，失败结果使用 negative_ttl
+
+        Args:
+            api_name: 外部API名称
+            query: 搜索查询语句
+            value: call_mcp_api 的返回结果
+        """
+        if not self.enabled:
+            return
+        failed = self.is_failure(value)
+        ttl = self.negative_ttl if failed else self.ttl
+        if ttl <= 0:
+            return
+        self._store.set(self.make_key(api_name, query), value, ttl)
+        with self._lock:
+            self._stats["negative_sets" if failed else "sets"] += 1
+
+    def clear(self):
+        """清空所有缓存层"""
+        self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+        store = self._store.stats()
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = store["memory_entries"]
+        stats["evictions"] = store["evictions"]
+        stats["sqlite_hits"] = store["sqlite_hits"]
+        stats["sqlite_enabled"] = store["sqlite_enabled"]
+        return stats
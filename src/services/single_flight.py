@@ -0,0 +1,191 @@
+"""
+LLM 请求单飞 (single-flight) 合并
+相同请求键的并发调用只向上游发送一次请求，流式分块扇出给所有调用方的回调，
+所有调用方拿到同一份最终结果；发起者的会话运行被取消时，取消结果不会交给跟随者，
+跟随者改为独立请求 (已收到部分分块时不再重复流式输出)
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+from typing import Dict, Any, Callable, Optional, Awaitable
+
+from src.utils.logger import llm_logger
+
+
+class LeaderCancelled(Exception):
+    """发起者的会话运行已取消，跟随者需要自行发起请求"""
+
+
+class _Flight:
+    """一次进行中的上游请求"""
+
+    def __init__(self):
+        self.chunks = []
+        self.callbacks = []
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self._lock = threading.Lock()
+
+    def attach(self, callback: Optional[Callable]):
+        """
+        订阅流式分块，先补发已产生的分块再接收后续分块
+
+        Args:
+            callback: 调用方的 stream_callback
+        """
+        if callback is None:
+            return
+        # 补发与登记在同一把锁内完成，保证每个分块按顺序且只送达一次
+        with self._lock:
+            for chunk in self.chunks:
+                self._deliver(callback, chunk)
+            self.callbacks.append(callback)
+
+    def detach(self, callback: Optional[Callable]):
+        """取消订阅流式分块"""
+        with self._lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def fallback_callback(self, callback: Optional[Callable]) -> Callable:
+        """
+        跟随者改为独立请求时使用的分块回调: 已收到过发起者的部分分块时不再流式输出，
+        避免同一份内容在调用方那里重复出现，调用方只拿到最终结果
+
+        Args:
+            callback: 调用方的 stream_callback
+        """
+        self.detach(callback)
+        with self._lock:
+            delivered = bool(self.chunks)
+        if callback is None or delivered:
+            return lambda chunk: None
+        return callback
+
+    def emit(self, chunk: str):
+        """把上游分块扇出给所有订阅者"""
+        with self._lock:
+            self.chunks.append(chunk)
+            for callback in self.callbacks:
+                self._deliver(callback, chunk)
+
+    @staticmethod
+    def _deliver(callback: Callable, chunk: str):
+        try:
+            callback(chunk)
+        except Exception as e:
+            # 单个订阅者回调出错不能影响上游请求和其他订阅者
+            llm_logger.warning(f"single-flight 分块回调失败: {str(e)}")
+
+
+class SingleFlight:
+    """按请求键合并并发的相同 LLM 请求"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def _join(self, key: str, stream_callback: Optional[Callable]):
+        """加入或发起请求，返回 (flight, 是否为发起者)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._stats["leaders"] += 1
+            else:
+                self._stats["followers"] += 1
+        flight.attach(stream_callback)
+        if not is_leader:
+            llm_logger.info(f"🔗 合并到进行中的相同LLM请求: key={key[:12]}")
+        return flight, is_leader
+
+    def _complete(self, key: str, flight: _Flight, result: Any = None, error: BaseException = None):
+        if error is None and isinstance(result, dict) and result.get("cancelled"):
+            # 取消结果只属于发起者所在的会话 (其上游响应也已被该会话关闭)
+            error = LeaderCancelled(result.get("error"))
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(result)
+
+    @staticmethod
+    def _follower_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict(result)
+        result["coalesced"] = True
+        return result
+
+    def do(self, key: str, fn: Callable[[Callable], Dict[str, Any]],
+           stream_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        同步执行请求，相同键的并发调用共享一次执行
+
+        Args:
+            key: 请求键
+            fn: 实际请求函数，参数为扇出用的分块回调
+            stream_callback: 当前调用方的流式回调
+
+        Returns:
+            请求结果字典
+        """
+        flight, is_leader = self._join(key, stream_callback)
+        if not is_leader:
+            try:
+                return self._follower_result(flight.future.result())
+            except (Exception, asyncio.CancelledError) as e:
+                # 发起者异常或被取消时，跟随者自行发起请求，不受其他会话影响
+                llm_logger.warning(f"合并的LLM请求异常，改为独立请求: {str(e)}")
+                return fn(flight.fallback_callback(stream_callback))
+
+        try:
+            result = fn(flight.emit)
+        except BaseException as e:
+            self._complete(key, flight, error=e)
+            raise
+        self._complete(key, flight, result)
+        return result
+
+    async def ado(self, key: str, afn: Callable[[Callable], Awaitable[Dict[str, Any]]],
+                  stream_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        异步执行请求，可与同步调用方 (do) 互相合并
+
+        Args:
+            key: 请求键
+            afn: 实际请求协程函数，参数为扇出用的分块回调
+            stream_callback: 当前调用方的流式回调
+
+        Returns:
+            请求结果字典
+        """
+        flight, is_leader = self._join(key, stream_callback)
+        if not is_leader:
+            try:
+                return self._follower_result(await asyncio.shield(asyncio.wrap_future(flight.future)))
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                llm_logger.warning("合并的LLM请求被发起者取消，改为独立请求")
+            except Exception as e:
+                llm_logger.warning(f"合并的LLM请求异常，改为独立请求: {str(e)}")
+            return await afn(flight.fallback_callback(stream_callback))
+
+        try:
+            result = await afn(flight.emit)
+        except BaseException as e:
+            self._complete(key, flight, error=e)
+            raise
+        self._complete(key, flight, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        return stats
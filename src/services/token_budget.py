@@ -0,0 +1,136 @@
+"""
+LLM 请求的 token 预算
+发送前离线估算输入 token，把 max_tokens 调整到模型上下文窗口以内；
+提示词超出预算时按配置压缩或直接拒绝，并按服务方法记录输入/输出 token 直方图
+"""
+
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from src.utils.histogram import Histogram, TOKEN_BUCKETS
+from src.utils.logger import llm_logger
+from src.utils.token_estimator import estimate_message_tokens, estimate_tokens, truncate_to_tokens
+
+
+class PromptBudgetExceeded(ValueError):
+    """提示词超出 token 预算且无法压缩 (或配置为直接拒绝)"""
+
+    def __init__(self, prompt_tokens: int, limit: int):
+        super().__init__(f"提示词约 {prompt_tokens} tokens，超出预算 {limit} tokens")
+        self.prompt_tokens = prompt_tokens
+        self.limit = limit
+
+
+class TokenBudget:
+    """按模型上下文窗口和提示词预算检查、调整请求体"""
+
+    def __init__(self, context_windows: Optional[Dict[str, int]] = None,
+                 max_output_tokens: Optional[Dict[str, int]] = None,
+                 default_window: int = 8192, prompt_budget: int = 0,
+                 overflow_action: str = "compact", min_output_tokens: int = 1024,
+                 safety_margin: int = 64, log_every: int = 50):
+        """
+        Args:
+            context_windows: 各模型的上下文窗口 (输入 + 输出 token)
+            max_output_tokens: 各模型允许的 max_tokens 上限
+            default_window: 未配置的模型使用的上下文窗口
+            prompt_budget: 提示词 token 上限，0 表示只受上下文窗口限制
+            overflow_action: 超出预算时的处理方式，compact (压缩提示词) 或 reject (拒绝请求)
+            min_output_tokens: 为输出保留的最少 token 数
+            safety_margin: 估算误差的余量
+            log_every: 每个方法每记录多少次输出一次直方图日志，0 表示不输出
+        """
+        self.context_windows = dict(context_windows or {})
+        self.max_output_tokens = dict(max_output_tokens or {})
+        self.default_window = default_window
+        self.prompt_budget = prompt_budget
+        self.overflow_action = overflow_action
+        self.min_output_tokens = min_output_tokens
+        self.safety_margin = safety_margin
+        self.log_every = log_every
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._stats = {"max_tokens_adjusted": 0, "compacted": 0, "rejected": 0}
+
+    def window_for(self, model: str) -> int:
+        """模型的上下文窗口"""
+        return int(self.context_windows.get(model, self.default_window))
+
+    def prompt_limit(self, model: str) -> int:
+        """提示词允许的最大 token 数"""
+        limit = self.window_for(model) - self.min_output_tokens - self.safety_margin
+        return min(limit, self.prompt_budget) if self.prompt_budget else limit
+
+    def fit(self, body: Dict[str, Any], method: Optional[str] = None,
+            kind: str = "input") -> Tuple[Dict[str, Any], int]:
+        """
+        检查并调整请求体 (原地修改)
+
+        Args:
+            body: chat/completions 请求体
+            method: 服务方法名
+            kind: 记录到哪个直方图 (续写请求单独记录)
+
+        Returns:
+            (请求体, 估算的输入 token 数)
+
+        Raises:
+            PromptBudgetExceeded: 超出预算且配置为拒绝，或压缩后仍超出
+        """
+        model = body["model"]
+        limit = self.prompt_limit(model)
+        prompt_tokens = estimate_message_tokens(body["messages"])
+
+        if prompt_tokens > limit:
+            if self.overflow_action != "compact":
+                self._count("rejected")
+                raise PromptBudgetExceeded(prompt_tokens, limit)
+            last = body["messages"][-1]
+            others = prompt_tokens - estimate_tokens(last["content"])
+            last["content"] = truncate_to_tokens(last["content"], max(0, limit - others))
+            compacted_tokens = estimate_message_tokens(body["messages"])
+            if compacted_tokens > limit:
+                self._count("rejected")
+                raise PromptBudgetExceeded(prompt_tokens, limit)
+            llm_logger.warning(f"提示词超出预算已压缩 [{method}]: {prompt_tokens} -> {compacted_tokens} tokens (上限 {limit})")
+            self._count("compacted")
+            prompt_tokens = compacted_tokens
+
+        available = self.window_for(model) - prompt_tokens - self.safety_margin
+        cap = min(available, int(self.max_output_tokens.get(model, available)))
+        if body["max_tokens"] > cap:
+            llm_logger.info(f"max_tokens 调整 [{method}] {model}: {body['max_tokens']} -> {cap} (输入约 {prompt_tokens} tokens)")
+            body["max_tokens"] = cap
+            self._count("max_tokens_adjusted")
+
+        self._observe(method, kind, prompt_tokens)
+        return body, prompt_tokens
+
+    def record_usage(self, method: Optional[str], usage: Optional[Dict[str, Any]]):
+        """记录上游返回的实际输出 token 数"""
+        completion_tokens = (usage or {}).get("completion_tokens")
+        if completion_tokens:
+            self._observe(method, "output", int(completion_tokens))
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息和各方法的 token 直方图"""
+        with self._lock:
+            stats = dict(self._stats)
+            histograms = {m: dict(h) for m, h in self._histograms.items()}
+        stats["methods"] = {
+            method: {kind: hist.snapshot() for kind, hist in kinds.items()}
+            for method, kinds in histograms.items()
+        }
+        return stats
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _observe(self, method: Optional[str], kind: str, tokens: int):
+        method = method or "unknown"
+        with self._lock:
+            hist = self._histograms.setdefault(method, {}).setdefault(kind, Histogram(TOKEN_BUCKETS))
+        hist.observe(tokens)
+        if self.log_every and hist.count % self.log_every == 0:
+            llm_logger.info(f"token直方图 [{method}] {kind}: {hist.snapshot()}")
@@ -0,0 +1,88 @@
+"""
+CareerNavigator 异步运行时
+提供一个在守护线程中常驻的共享事件循环，供 Flask 同步视图提交协程使用
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundEventLoop:
+    """在后台守护线程中运行的共享事件循环"""
+
+    def __init__(self, name: str = "career-async-runtime"):
+        """
+        初始化后台事件循环 (首次提交任务时才真正启动线程)
+
+        Args:
+            name: 后台线程名称
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """获取事件循环，未启动时自动启动"""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        """启动后台线程并等待事件循环就绪"""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """
+        将协程提交到共享事件循环
+
+        Args:
+            coro: 待执行的协程
+
+        Returns:
+            可在任意线程等待的 concurrent.futures.Future
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        在共享事件循环中执行协程并阻塞等待结果
+
+        Args:
+            coro: 待执行的协程
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            协程返回值
+        """
+        return self.submit(coro).result(timeout=timeout)
+
+    def stop(self):
+        """停止事件循环"""
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                if self._thread is not None:
+                    self._thread.join(timeout=5)
+                self._loop = None
+                self._thread = None
+
+
+# 全局共享异步运行时
+async_runtime = BackgroundEventLoop()
@@ -0,0 +1,76 @@
+"""
+直方图统计
+固定分桶计数，并保留最近的样本用于计算分位数 (p50/p95)
+"""
+
+import bisect
+import threading
+from collections import deque
+from typing import Dict, Any, Sequence, Optional
+
+# token 数常用分桶
+TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# 耗时(秒)常用分桶
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+# 流式分块间隔(秒)常用分桶
+GAP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+
+# 输出速度 (tokens/秒) 常用分桶
+RATE_BUCKETS = (5, 10, 20, 40, 80, 160, 320)
+
+
+class Histogram:
+    """线程安全的直方图"""
+
+    def __init__(self, bounds: Sequence[float], sample_size: int = 1024):
+        """
+        Args:
+            bounds: 递增的桶上界，超过最后一个上界的值计入 +Inf 桶
+            sample_size: 保留最近多少个样本用于计算分位数
+        """
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._samples = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        """记录一个样本"""
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, value)] += 1
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """最近样本的分位数 (q 取 0-100)，没有样本时返回 None"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(q / 100 * (len(samples) - 1)))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取统计快照"""
+        with self._lock:
+            counts = list(self._counts)
+            count, total, low, high = self.count, self.total, self.min, self.max
+        buckets = {f"<={bound:g}": n for bound, n in zip(self.bounds, counts)}
+        buckets["+Inf"] = counts[-1]
+        return {
+            "count": count,
+            "avg": round(total / count, 3) if count else None,
+            "min": low,
+            "max": high,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": buckets,
+        }
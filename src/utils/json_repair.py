@@ -0,0 +1,410 @@
+"""
+LLM JSON 输出修复
+单遍线性扫描，同时完成去除代码块标记、补齐截断的字符串/数组/对象、
+补充缺失的逗号、删除多余逗号等修复，并记录实际应用了哪些修复
+"""
+
+import re
+import json
+from typing import Any, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURE = re.compile(r'["\\{}\[\]]')
+_BARE_WORD = re.compile(r'[^\s,:\[\]{}"`]+')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CONTAINER_START = re.compile(r'[{\[]')
+# 作为 JSON 根容器的 [ 后面紧跟的字符 (排除说明文字中的 [1]、[见下文] 等)
+_ARRAY_FIRST_CHARS = '{["]'
+
+# 修复项名称
+STRIP_FENCE = "strip_fence"                       # 去除 ```json 代码块标记
+STRIP_PREFIX = "strip_prefix"                     # 去除 JSON 之前的说明文字
+STRIP_SUFFIX = "strip_suffix"                     # 去除 JSON 之后的多余文本
+CLOSE_STRING = "close_string"                     # 补齐被截断的字符串
+CLOSE_ARRAY = "close_array"                       # 补齐未闭合的数组
+CLOSE_OBJECT = "close_object"                     # 补齐未闭合的对象
+CLOSE_ARRAY_BEFORE_KEY = "close_array_before_key" # 数组未闭合就写了下一个键
+INSERT_COMMA = "insert_comma"                     # 补充缺失的逗号
+INSERT_COLON = "insert_colon"                     # 补充缺失的冒号
+REMOVE_TRAILING_COMMA = "remove_trailing_comma"   # 删除 ] 或 } 前的多余逗号
+REMOVE_EXTRA_COMMA = "remove_extra_comma"         # 删除连续或开头的多余逗号
+DROP_INCOMPLETE_MEMBER = "drop_incomplete_member" # 丢弃截断后只剩键或半个字面量的成员
+DROP_UNEXPECTED = "drop_unexpected"               # 丢弃无法归位的字符
+QUOTE_BARE_WORD = "quote_bare_word"               # 为未加引号的键或值加引号
+PYTHON_LITERAL = "python_literal"                 # True/False/None 转为 JSON 字面量
+
+
+def find_json_start(text: str) -> int:
+    """
+    找到 JSON 根容器的起始位置
+
+    { 总是可以作为起点；[ 只有后面紧跟对象、数组、字符串或 ] 时才作为起点，
+    避免说明文字中的 "[1]" 被当成 JSON 而丢掉后面真正的对象
+
+    Returns:
+        起始位置，没有找到返回 -1
+    """
+    fallback = -1
+    for match in _CONTAINER_START.finditer(text):
+        pos = match.start()
+        if text[pos] == "{":
+            return pos
+        rest = text[pos + 1:pos + 64].lstrip(_WHITESPACE)
+        if not rest or rest[0] in _ARRAY_FIRST_CHARS:
+            return pos
+        if fallback == -1:
+            fallback = pos
+    return fallback
+
+
+class _Frame:
+    """一个未闭合的对象或数组"""
+
+    __slots__ = ("kind", "state", "member_out")
+
+    def __init__(self, kind: str, member_out: int):
+        self.kind = kind                # "object" 或 "array"
+        # object: key -> colon -> value -> comma；array: value -> comma
+        self.state = "key" if kind == "object" else "value"
+        self.member_out = member_out    # 当前成员在输出中的起始位置 (含其前面的逗号)
+
+
+class _Repairer:
+    """单遍修复器，扫描过程中直接写出修复后的 JSON 文本"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.out: List[str] = []
+        self.stack: List[_Frame] = []
+        # 栈中各类容器的数量，括号不匹配时据此判断外层是否有对应的容器
+        self.open_counts = {"object": 0, "array": 0}
+        self.repairs: List[str] = []
+
+    def note(self, repair: str):
+        if repair not in self.repairs:
+            self.repairs.append(repair)
+
+    def run(self) -> str:
+        text = self.text
+        n = len(text)
+        start = find_json_start(text)
+        if start == -1:
+            raise ValueError("未找到JSON对象或数组")
+        prefix = text[:start]
+        if "```" in prefix:
+            self.note(STRIP_FENCE)
+        elif prefix.strip():
+            self.note(STRIP_PREFIX)
+
+        i = start
+        while i < n:
+            if not self.stack and self.out:
+                # 根容器已闭合，后面的内容全部忽略
+                rest = text[i:].strip()
+                if rest:
+                    self.note(STRIP_FENCE if rest.startswith("```") else STRIP_SUFFIX)
+                break
+
+            ch = text[i]
+            if ch in _WHITESPACE:
+                i += 1
+            elif ch == '"':
+                i = self._string(i)
+            elif ch in "{[":
+                if self._begin_value():
+                    kind = "object" if ch == "{" else "array"
+                    self.out.append(ch)
+                    self.stack.append(_Frame(kind, len(self.out)))
+                    self.open_counts[kind] += 1
+                else:
+                    self.note(DROP_UNEXPECTED)
+                i += 1
+            elif ch in "}]":
+                if self._close(ch):
+                    i += 1
+            elif ch == ":":
+                top = self.stack[-1]
+                if top.kind == "object" and top.state == "colon":
+                    self.out.append(":")
+                    top.state = "value"
+                else:
+                    self.note(DROP_UNEXPECTED)
+                i += 1
+            elif ch == ",":
+                self._comma()
+                i += 1
+            elif ch == "`":
+                # 截断的 JSON 后直接跟着代码块结束标记
+                self.note(STRIP_FENCE)
+                break
+            else:
+                i = self._bare_word(i)
+
+        self._finish()
+        return "".join(self.out)
+
+    # --- 值的位置 ---
+
+    def _begin_value(self) -> bool:
+        """在当前位置开始写一个值，必要时补逗号/冒号；返回该位置能否放值"""
+        if not self.stack:
+            return not self.out
+        top = self.stack[-1]
+        if top.kind == "array":
+            if top.state == "comma":
+                self.note(INSERT_COMMA)
+                top.member_out = len(self.out)
+                self.out.append(",")
+            elif not self.out[-1] == ",":
+                top.member_out = len(self.out)
+            top.state = "comma"
+            return True
+        if top.state == "colon":
+            self.note(INSERT_COLON)
+            self.out.append(":")
+            top.state = "value"
+        if top.state == "value":
+            top.state = "comma"
+            return True
+        return False
+
+    def _begin_key(self):
+        """在对象中开始写一个键，必要时补逗号"""
+        top = self.stack[-1]
+        if top.state == "comma":
+            self.note(INSERT_COMMA)
+            top.member_out = len(self.out)
+            self.out.append(",")
+        elif not (self.out and self.out[-1] == ","):
+            top.member_out = len(self.out)
+        top.state = "colon"
+
+    def _value_completed(self):
+        """子容器闭合后，父容器进入等待逗号状态"""
+        if self.stack:
+            self.stack[-1].state = "comma"
+
+    # --- 各类记号 ---
+
+    def _string(self, i: int) -> int:
+        literal, end, closed = self._read_string(i)
+        top = self.stack[-1]
+        if top.kind == "array" and self._next_char(end) == ":":
+            # "key": ["a", "b" \n "next_key": ... 数组没有闭合就开始了下一个键
+            parent = self.stack[-2] if len(self.stack) > 1 else None
+            if parent is not None and parent.kind == "object":
+                self.note(CLOSE_ARRAY_BEFORE_KEY)
+                self._close_top()
+                return i
+        if not closed:
+            self.note(CLOSE_STRING)
+        if top.kind == "object" and top.state in ("key", "comma"):
+            if not closed:
+                # 截断在键名中间，该成员无法补全
+                self._begin_key()
+                top.state = "dangling"
+                return end
+            self._begin_key()
+            self.out.append(literal)
+            return end
+        if self._begin_value():
+            self.out.append(literal)
+        else:
+            self.note(DROP_UNEXPECTED)
+        return end
+
+    def _read_string(self, i: int) -> Tuple[str, int, bool]:
+        """读取从 i 开始的字符串，返回 (JSON 字符串字面量, 结束位置, 是否正常闭合)"""
+        text = self.text
+        j = i + 1
+        while True:
+            match = _STRING_SPECIAL.search(text, j)
+            if match is None:
+                break
+            j = match.start()
+            if text[j] == '"':
+                return text[i:j + 1], j + 1, True
+            j += 2  # 跳过转义字符
+        body = text[i + 1:]
+        # 去掉末尾被截断的转义序列 (如单独的 \ 或不完整的 \u4e)
+        body = re.sub(r'(?<!\\)(\\\\)*\\(u[0-9a-fA-F]{0,3})?$', lambda m: m.group(1) or "", body)
+        return '"' + body + '"', len(text), False
+
+    def _bare_word(self, i: int) -> int:
+        match = _BARE_WORD.match(self.text, i)
+        if match is None:
+            self.note(DROP_UNEXPECTED)
+            return i + 1
+        word, end = match.group(0), match.end()
+        top = self.stack[-1]
+        truncated = end >= len(self.text)
+
+        if top.kind == "object" and top.state in ("key", "comma"):
+            if truncated:
+                self._begin_key()
+                top.state = "dangling"
+                return end
+            self.note(QUOTE_BARE_WORD)
+            self._begin_key()
+            self.out.append(json.dumps(word, ensure_ascii=False))
+            return end
+
+        if word in _PYTHON_LITERALS:
+            self.note(PYTHON_LITERAL)
+            literal = _PYTHON_LITERALS[word]
+        elif word in ("true", "false", "null") or _NUMBER.fullmatch(word):
+            literal = word
+        elif truncated:
+            # 截断在字面量中间 (如 "tru" 或 "12.")，丢弃该成员
+            if self._begin_value():
+                self.stack[-1].state = "dangling"
+            return end
+        else:
+            self.note(QUOTE_BARE_WORD)
+            literal = json.dumps(word, ensure_ascii=False)
+
+        if self._begin_value():
+            self.out.append(literal)
+        else:
+            self.note(DROP_UNEXPECTED)
+        return end
+
+    def _comma(self):
+        top = self.stack[-1]
+        if top.state == "comma":
+            top.member_out = len(self.out)
+            self.out.append(",")
+            top.state = "key" if top.kind == "object" else "value"
+        else:
+            self.note(REMOVE_EXTRA_COMMA)
+
+    def _close(self, ch: str) -> bool:
+        """处理 } 或 ]，返回是否消费了该字符"""
+        if not self.stack:
+            return True
+        top = self.stack[-1]
+        expected = "}" if top.kind == "object" else "]"
+        if ch != expected:
+            # 括号不匹配: 先补齐内层容器，再由外层处理该字符
+            if self.open_counts["object" if ch == "}" else "array"]:
+                self.note(CLOSE_OBJECT if top.kind == "object" else CLOSE_ARRAY)
+                self._close_top()
+                return False
+            self.note(DROP_UNEXPECTED)
+            return True
+        self._close_top()
+        return True
+
+    def _close_top(self):
+        """补全并闭合栈顶容器"""
+        top = self.stack.pop()
+        self.open_counts[top.kind] -= 1
+        if top.state == "dangling" or (top.kind == "object" and top.state in ("colon", "value")):
+            # 只写了键、冒号或半个值，丢弃整个成员
+            self.note(DROP_INCOMPLETE_MEMBER)
+            del self.out[top.member_out:]
+        if self.out and self.out[-1] == ",":
+            self.note(REMOVE_TRAILING_COMMA)
+            self.out.pop()
+        self.out.append("}" if top.kind == "object" else "]")
+        self._value_completed()
+
+    def _finish(self):
+        """输入结束: 补齐所有未闭合的容器"""
+        while self.stack:
+            self.note(CLOSE_OBJECT if self.stack[-1].kind == "object" else CLOSE_ARRAY)
+            self._close_top()
+
+    def _next_char(self, i: int) -> str:
+        text = self.text
+        n = len(text)
+        while i < n and text[i] in _WHITESPACE:
+            i += 1
+        return text[i] if i < n else ""
+
+
+def repair_json(text: str) -> Tuple[str, List[str]]:
+    """
+    修复 LLM 输出的 JSON 文本
+
+    Args:
+        text: LLM 原始输出
+
+    Returns:
+        (修复后的 JSON 文本, 应用的修复项列表)
+
+    Raises:
+        ValueError: 文本中没有 JSON 对象或数组
+    """
+    repairer = _Repairer(text)
+    return repairer.run(), repairer.repairs
+
+
+def parse_json_with_repairs(text: str) -> Tuple[Any, List[str]]:
+    """
+    解析 LLM 输出的 JSON，格式正确时直接解析，否则修复后解析
+
+    Args:
+        text: LLM 原始输出
+
+    Returns:
+        (解析结果, 应用的修复项列表)
+
+    Raises:
+        json.JSONDecodeError: 修复后仍无法解析 (包括嵌套过深)
+    """
+    try:
+        return _loads(text), []
+    except json.JSONDecodeError:
+        pass
+    try:
+        repaired, repairs = repair_json(text)
+    except ValueError as e:
+        raise json.JSONDecodeError(str(e), text, 0)
+    return _loads(repaired), repairs
+
+
+def _loads(text: str) -> Any:
+    """json.loads，嵌套过深导致的 RecursionError 按解析失败处理"""
+    try:
+        return json.loads(text, strict=False)
+    except RecursionError:
+        raise json.JSONDecodeError("JSON嵌套层数过深", text, 0)
+
+
+def is_json_truncated(text: str) -> bool:
+    """
+    判断文本中的 JSON 是否被截断 (根容器未闭合或停在字符串中间)
+
+    Args:
+        text: LLM 输出
+
+    Returns:
+        找到了 JSON 起始括号但直到文本结束都没有闭合时返回 True
+    """
+    start = find_json_start(text)
+    if start == -1:
+        return False
+    depth = 0
+    in_string = False
+    escaped_at = -1
+    for match in _STRUCTURE.finditer(text, start):
+        pos, ch = match.start(), match.group(0)
+        if pos == escaped_at:
+            continue
+        if in_string:
+            if ch == "\\":
+                escaped_at = pos + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth <= 0:
+                return False
+    return True
@@ -0,0 +1,176 @@
+"""
+流式JSON增量解析
+逐块接收 LLM 输出，在顶层字段或数组元素闭合时立即产出结构化事件，
+无需等待完整响应。容忍 JSON 之前的说明文字和 markdown 代码块标记。
+"""
+
+import json
+from typing import Dict, Any, List
+
+# 无法解析的片段 (LLM 输出的不规范 JSON)，跳过不产出事件
+_INVALID = object()
+
+
+class _Frame:
+    """一个未闭合的对象或数组"""
+
+    __slots__ = ("kind", "path", "key", "key_start", "expect_key", "value_start", "index")
+
+    def __init__(self, kind: str, path: List):
+        self.kind = kind            # "object" 或 "array"
+        self.path = path            # 从根到该容器的路径
+        self.key = None             # 对象: 当前成员的键
+        self.key_start = None       # 对象: 正在读取的键字符串的起始位置
+        self.expect_key = True      # 对象: 下一个字符串是否为键
+        self.value_start = None     # 当前成员/元素值的起始位置
+        self.index = 0              # 数组: 当前元素下标
+
+
+class StreamingJSONParser:
+    """
+    增量 JSON 解析器
+
+    事件格式:
+        {"type": "field", "path": ["executive_summary"], "value": ...}  顶层字段完成
+        {"type": "item", "path": ["weekly_schedule", 0], "value": ...}  数组元素完成
+
+    用法:
+        parser = StreamingJSONParser()
+        for chunk in chunks:
+            for event in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self, item_depth: int = 2):
+        """
+        Args:
+            item_depth: 产出数组元素事件的最大数组深度 (顶层字段的数组深度为 1，
+                        如 career_match.paths 这种嵌套一层的数组深度为 2)
+        """
+        self.item_depth = item_depth
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        输入一个分块
+
+        Args:
+            chunk: LLM 输出的文本分块
+
+        Returns:
+            本分块触发的事件列表
+        """
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        events: List[Dict[str, Any]] = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            self._step(text, self._pos, events)
+            self._pos += 1
+        return events
+
+    def _step(self, text: str, pos: int, events: List[Dict[str, Any]]):
+        ch = text[pos]
+
+        if not self._started:
+            # 跳过 JSON 之前的说明文字、```json 等，直到遇到根容器
+            if ch in "{[":
+                self._started = True
+                self._stack.append(_Frame("object" if ch == "{" else "array", []))
+            return
+
+        frame = self._stack[-1]
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if frame.kind == "object" and frame.key_start is not None:
+                    key = self._loads(text[frame.key_start:pos + 1])
+                    frame.key = None if key is _INVALID else key
+                    frame.key_start = None
+            return
+
+        if ch in " \t\r\n":
+            return
+
+        if frame.kind == "object":
+            if frame.expect_key:
+                if ch == '"':
+                    self._in_string = True
+                    frame.key_start = pos
+                elif ch == ":":
+                    frame.expect_key = False
+                elif ch == "}":
+                    self._close()
+                return
+            if ch == ",":
+                self._complete_member(frame, text, pos, events)
+                frame.expect_key = True
+                return
+            if ch == "}":
+                self._complete_member(frame, text, pos, events)
+                self._close()
+                return
+        else:
+            if ch == ",":
+                self._complete_member(frame, text, pos, events)
+                frame.index += 1
+                return
+            if ch == "]":
+                self._complete_member(frame, text, pos, events)
+                self._close()
+                return
+
+        # 值的第一个有效字符
+        if frame.value_start is None:
+            frame.value_start = pos
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            child_key = frame.key if frame.kind == "object" else frame.index
+            self._stack.append(_Frame("object" if ch == "{" else "array", frame.path + [child_key]))
+
+    def _complete_member(self, frame: _Frame, text: str, pos: int, events: List[Dict[str, Any]]):
+        """容器中的一个成员/元素在 pos 处结束"""
+        if frame.value_start is None:
+            return
+        raw = text[frame.value_start:pos]
+        frame.value_start = None
+
+        if frame.kind == "object":
+            if frame.path or frame.key is None:
+                return  # 只对顶层字段产出事件
+            event = {"type": "field", "path": [frame.key]}
+        else:
+            if len(frame.path) > self.item_depth:
+                return
+            event = {"type": "item", "path": frame.path + [frame.index]}
+
+        value = self._loads(raw)
+        if value is _INVALID:
+            return
+        event["value"] = value
+        events.append(event)
+
+    def _close(self):
+        self._stack.pop()
+        if not self._stack:
+            self.done = True
+
+    @staticmethod
+    def _loads(raw: str):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return _INVALID
@@ -0,0 +1,82 @@
+"""
+Token 数量估算
+不依赖具体模型的分词器: 中日韩字符及全角符号按每字一个 token 计，
+其余字符按每 4 个字符一个 token 计，对中文为主的提示词略微偏高 (保守估计)
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+_WIDE_CHARS = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def estimate_json_tokens(value: Any, indent: Optional[int] = None) -> int:
+    """
+    估算数据序列化为 JSON 后的 token 数
+
+    Args:
+        value: 可 JSON 序列化的数据 (无法序列化的对象按 str 处理)
+        indent: 缩进，为空时按紧凑格式序列化
+
+    Returns:
+        估算的 token 数
+    """
+    separators = None if indent is not None else (",", ":")
+    return estimate_tokens(json.dumps(value, ensure_ascii=False, indent=indent, separators=separators, default=str))
+
+
+def estimate_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """
+    估算 chat 消息列表的 token 数 (每条消息额外计入角色标记的开销)
+
+    Args:
+        messages: [{"role": ..., "content": ...}]
+
+    Returns:
+        估算的 token 数
+    """
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages) + 2
+
+
+def truncate_to_tokens(text: str, max_tokens: int, min_line_chars: int = 40) -> str:
+    """
+    把文本压缩到 token 上限以内: 每次截短当前最长的一行，
+    指令和 JSON 示例这类短行保持不变，长的数据行 (如内嵌的 JSON) 被截断
+
+    Args:
+        text: 文本
+        max_tokens: token 上限
+        min_line_chars: 每行至少保留的字符数
+
+    Returns:
+        压缩后的文本 (所有行都已截到最短仍超出时，返回尽力压缩后的结果)
+    """
+    lines = text.split("\n")
+    tokens = estimate_tokens(text)
+    while tokens > max_tokens:
+        index = max(range(len(lines)), key=lambda i: len(lines[i]))
+        line = lines[index]
+        if len(line) <= min_line_chars + 1:
+            break
+        line_tokens = estimate_tokens(line)
+        keep = max(min_line_chars, int(len(line) * max(0.0, 1 - (tokens - max_tokens) / line_tokens)) - 1)
+        lines[index] = line[:keep] + "…"
+        tokens = estimate_tokens("\n".join(lines))
+    return "\n".join(lines)
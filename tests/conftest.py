@@ -0,0 +1,10 @@
+"""
+pytest 公共配置: 把项目根目录加入 sys.path，测试可直接导入 src、config、mcp_app
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,101 @@
+"""
+综合报告上下文打包与 token 估算测试
+"""
+
+import json
+
+from src.services.context_packer import ContextPacker
+from src.utils.token_estimator import (
+    estimate_tokens, estimate_json_tokens, estimate_message_tokens, truncate_to_tokens
+)
+
+
+def _search_results(count):
+    return [{"title": f"标题{i}", "content": f"内容 {i} " * 40, "score": i / 10} for i in range(count)]
+
+
+def _sections():
+    return {
+        "profile_analysis": {"strengths": ["Python", "Go"], "raw_response": "x" * 500, "notes": ""},
+        "industry_research": {
+            "industry_overview": "AI 行业增长快",
+            "market_data": {"search_results": _search_results(6), "query": "AI"},
+        },
+        "career_analysis": {"career_matches": [{"title": "算法工程师"}]},
+    }
+
+
+def test_estimate_tokens_counts_wide_chars_individually():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("中文") == 2
+    assert estimate_tokens("中文ab") == 3
+
+
+def test_estimate_json_and_message_tokens():
+    value = {"a": [1, 2]}
+    assert estimate_json_tokens(value) == estimate_tokens('{"a":[1,2]}')
+    assert estimate_json_tokens(value, indent=2) > estimate_json_tokens(value)
+    messages = [{"role": "system", "content": "abcd"}, {"role": "user", "content": None}]
+    assert estimate_message_tokens(messages) == 1 + 4 + 0 + 4 + 2
+
+
+def test_truncate_to_tokens_shortens_longest_line_only():
+    text = "指令保持不变\n" + "x" * 400
+    result = truncate_to_tokens(text, 50)
+    assert estimate_tokens(result) <= 50
+    lines = result.split("\n")
+    assert lines[0] == "指令保持不变"
+    assert lines[1].endswith("…")
+
+
+def test_truncate_to_tokens_keeps_short_text():
+    assert truncate_to_tokens("short", 10) == "short"
+
+
+def test_pack_strips_noise_and_keeps_top_snippets():
+    packer = ContextPacker(token_budget=10000, max_snippets=2, snippet_chars=30)
+    text, report = packer.pack(_sections())
+    packed = json.loads(text)
+    assert "raw_response" not in packed["profile_analysis"]
+    assert "notes" not in packed["profile_analysis"]
+    snippets = packed["industry_research"]["market_data"]
+    assert [s["title"] for s in snippets] == ["标题5", "标题4"]
+    assert all(len(s["content"]) <= 30 for s in snippets)
+    assert report["level"] == 0
+    assert report["dropped"] == []
+    assert report["saved_tokens"] == report["original_tokens"] - report["packed_tokens"] > 0
+
+
+def test_pack_escalates_levels_to_fit_budget():
+    sections = _sections()
+    sections["career_analysis"]["detail"] = "很长的分析" * 200
+    packer = ContextPacker(token_budget=400)
+    text, report = packer.pack(sections)
+    assert report["level"] > 0
+    assert report["packed_tokens"] <= 400
+    assert estimate_tokens(text) == report["packed_tokens"]
+
+
+def test_pack_drops_lowest_priority_sections_last_resort():
+    sections = {
+        "career_analysis": {"summary": "保留"},
+        "industry_research": {"items": ["行业" * 100] * 5},
+        "extra": {"items": ["其他" * 100] * 5},
+    }
+    packer = ContextPacker(token_budget=30)
+    text, report = packer.pack(sections)
+    # 未列出优先级的部分最先丢弃，最重要的部分始终保留
+    assert report["dropped"][0] == "extra"
+    assert "career_analysis" in json.loads(text)
+
+
+def test_pack_accumulates_stats():
+    packer = ContextPacker(token_budget=10000)
+    packer.pack(_sections())
+    packer.pack(_sections())
+    stats = packer.stats()
+    assert stats["calls"] == 2
+    assert stats["over_budget"] == 0
+    assert stats["saved_tokens"] == stats["original_tokens"] - stats["packed_tokens"]
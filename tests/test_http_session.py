@@ -0,0 +1,80 @@
+"""
+LLM HTTP 连接池测试
+"""
+
+import json
+import socket
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.llm_service import llm_service, _KeepAliveHTTPAdapter
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """使用独立 HTTP 会话的 llm_service，测试结束后关闭"""
+    monkeypatch.setattr(llm_service, "_http_session", None)
+    yield llm_service
+    llm_service.close()
+
+
+def test_http_session_is_shared_across_threads(service):
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(service.http_session)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(1)
+    assert len(sessions) == 8
+    assert all(session is sessions[0] for session in sessions)
+
+
+def test_http_session_uses_keep_alive_pool(service):
+    session = service.http_session
+    adapter = session.get_adapter(service.api_url)
+    assert isinstance(adapter, _KeepAliveHTTPAdapter)
+    assert adapter._pool_maxsize == service.pool_maxsize
+    assert adapter.max_retries.total == 0
+    options = adapter.poolmanager.connection_pool_kw.get("socket_options") or []
+    assert ((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options) is service.keep_alive
+    assert session.headers["Connection"] == ("keep-alive" if service.keep_alive else "close")
+    # 会话在线程间共享，不保存 Cookie
+    assert session.cookies.get_policy().allowed_domains() == ()
+
+
+def test_close_releases_the_session(service):
+    first = service.http_session
+    service.close()
+    assert service.http_session is not first
+
+
+def test_stream_is_read_to_the_end_after_done(service, monkeypatch):
+    consumed = []
+
+    def iter_lines():
+        lines = [
+            "data: " + json.dumps({"id": "r1", "choices": [{"delta": {"content": "你好"}}]}),
+            "data: [DONE]",
+            "",
+            ": trailing",
+        ]
+        for line in lines:
+            consumed.append(line)
+            yield line.encode("utf-8")
+
+    response = SimpleNamespace(status_code=200, iter_lines=iter_lines)
+    posts = []
+    fake_session = SimpleNamespace(post=lambda **kwargs: posts.append(kwargs) or response, close=lambda: None)
+    monkeypatch.setattr(service, "_http_session", fake_session)
+    received = []
+
+    result, retryable, _ = service._send_request({"stream": True}, received.append, None, lambda r: None)
+
+    assert result["content"] == "你好"
+    assert received == ["你好"]
+    assert not retryable
+    # [DONE] 之后的剩余字节也被读完，连接才能归还连接池
+    assert consumed[-1] == ": trailing"
+    assert posts[0]["timeout"] == service.timeout
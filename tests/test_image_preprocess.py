@@ -0,0 +1,80 @@
+"""
+OCR 图片预处理测试
+"""
+
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+from mcp_app.image_preprocess import ImagePreprocessor, PreprocessResult
+
+
+def _save(tmp_path, image, name="photo.jpg", **kwargs):
+    path = tmp_path / name
+    image.save(path, **kwargs)
+    return str(path)
+
+
+def _text_lines(width=600, height=400):
+    """白底上的若干条黑色横线，模拟文本行"""
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for y in range(40, height - 40, 30):
+        draw.rectangle((40, y, width - 40, y + 6), fill=0)
+    return image
+
+
+def test_large_photo_is_downscaled_to_grayscale_copy(tmp_path):
+    source = _save(tmp_path, Image.new("RGB", (4000, 1000), (200, 30, 30)))
+    result = ImagePreprocessor(max_dimension=2000).process(source)
+
+    assert result.changed
+    assert result.steps == ["downscale", "grayscale"]
+    assert (result.original_size, result.size) == ((4000, 1000), (2000, 500))
+    assert os.path.dirname(result.path) == os.path.dirname(source)
+    with Image.open(result.path) as output:
+        assert output.mode == "L" and output.size == (2000, 500)
+    result.cleanup()
+    assert not os.path.exists(result.path)
+    assert os.path.exists(source)
+
+
+def test_exif_orientation_is_applied(tmp_path):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 顺时针旋转 90 度拍摄
+    source = _save(tmp_path, Image.new("L", (300, 100), 255), exif=exif)
+    result = ImagePreprocessor().process(source)
+    assert result.steps == ["exif"]
+    assert result.size == (100, 300)
+    result.cleanup()
+
+
+@pytest.mark.parametrize("name, preprocessor", [
+    ("small.png", ImagePreprocessor()),
+    ("resume.pdf", ImagePreprocessor()),
+    ("photo.jpg", ImagePreprocessor(enabled=False)),
+])
+def test_unchanged_input_is_passed_through(tmp_path, name, preprocessor):
+    path = tmp_path / name
+    Image.new("L", (100, 100), 255).save(path, format="PNG")
+    result = preprocessor.process(str(path))
+    assert isinstance(result, PreprocessResult)
+    assert result.path == str(path)
+    assert not result.changed
+    result.cleanup()
+    assert path.exists()
+
+
+def test_skew_is_detected_and_corrected(tmp_path):
+    skewed = _text_lines().rotate(3, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    preprocessor = ImagePreprocessor(deskew=True, max_skew=5)
+    assert preprocessor.detect_skew(skewed) == pytest.approx(-3, abs=0.3)
+    assert preprocessor.detect_skew(_text_lines()) == 0.0
+
+    result = preprocessor.process(_save(tmp_path, skewed, "skewed.png"))
+    assert "deskew" in result.steps
+    assert result.angle == pytest.approx(-3, abs=0.3)
+    result.cleanup()
@@ -0,0 +1,131 @@
+"""
+LLM JSON 输出修复测试
+"""
+
+import json
+import time
+
+import pytest
+
+from src.utils.json_repair import (
+    find_json_start, repair_json, parse_json_with_repairs, is_json_truncated,
+    STRIP_FENCE, STRIP_PREFIX, STRIP_SUFFIX, CLOSE_STRING, CLOSE_ARRAY, CLOSE_OBJECT,
+    REMOVE_TRAILING_COMMA, INSERT_COMMA, PYTHON_LITERAL, DROP_UNEXPECTED,
+)
+
+
+def test_valid_json_needs_no_repairs():
+    assert parse_json_with_repairs('{"a": [1, 2], "b": "x"}') == ({"a": [1, 2], "b": "x"}, [])
+
+
+def test_code_fence_is_stripped():
+    data, repairs = parse_json_with_repairs('```json\n{"a": 1}\n```')
+    assert data == {"a": 1}
+    assert repairs == [STRIP_FENCE]
+
+
+def test_prose_prefix_and_suffix_are_stripped():
+    data, repairs = parse_json_with_repairs('分析结果如下：\n{"a": 1}\n以上仅供参考')
+    assert data == {"a": 1}
+    assert STRIP_PREFIX in repairs and STRIP_SUFFIX in repairs
+
+
+@pytest.mark.parametrize("text", [
+    'Note [1]: see {"a": {"b": [1, 2]}}',
+    '参考 [见下文] 的结果 {"a": {"b": [1, 2]}}',
+    '[注] {"a": {"b": [1, 2]}}',
+])
+def test_bracketed_prose_does_not_hide_the_object(text):
+    data, repairs = parse_json_with_repairs(text)
+    assert data == {"a": {"b": [1, 2]}}
+    assert STRIP_PREFIX in repairs
+
+
+def test_bracketed_prose_before_truncated_object():
+    text = 'Note [1]: see {"a": {"b": [1, 2'
+    data, repairs = parse_json_with_repairs(text)
+    assert data == {"a": {"b": [1, 2]}}
+    assert CLOSE_ARRAY in repairs and CLOSE_OBJECT in repairs
+    assert is_json_truncated(text)
+
+
+def test_top_level_array_is_kept():
+    data, _ = parse_json_with_repairs('结果：\n[{"a": 1}, {"b": 2}]')
+    assert data == [{"a": 1}, {"b": 2}]
+    assert find_json_start('x [ {"a": 1}]') == 2
+    assert find_json_start('x []') == 2
+
+
+def test_find_json_start_falls_back_to_first_bracket():
+    assert find_json_start("no json here") == -1
+    assert find_json_start("values [1, 2]") == 7
+
+
+def test_truncated_string_is_closed():
+    data, repairs = parse_json_with_repairs('{"summary": "适合转向算法')
+    assert data == {"summary": "适合转向算法"}
+    assert CLOSE_STRING in repairs and CLOSE_OBJECT in repairs
+
+
+def test_truncation_inside_key_drops_member():
+    data, _ = parse_json_with_repairs('{"a": 1, "b')
+    assert data == {"a": 1}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2,], }', {"a": [1, 2]}),
+    ('[1, 2, ]', [1, 2]),
+])
+def test_trailing_commas_are_removed(text, expected):
+    data, repairs = parse_json_with_repairs(text)
+    assert data == expected
+    assert REMOVE_TRAILING_COMMA in repairs
+
+
+def test_missing_comma_is_inserted():
+    data, repairs = parse_json_with_repairs('{"a": 1\n "b": 2}')
+    assert data == {"a": 1, "b": 2}
+    assert INSERT_COMMA in repairs
+
+
+def test_python_literals_are_converted():
+    data, repairs = parse_json_with_repairs('{"a": True, "b": None}')
+    assert data == {"a": True, "b": None}
+    assert PYTHON_LITERAL in repairs
+
+
+def test_repair_json_output_is_valid_json():
+    repaired, repairs = repair_json('```json\n{"items": [{"name": "x", "tags": ["a", "b"')
+    assert json.loads(repaired) == {"items": [{"name": "x", "tags": ["a", "b"]}]}
+    assert repairs
+
+
+def test_repair_json_without_container_raises():
+    with pytest.raises(ValueError):
+        repair_json("完全没有 JSON")
+
+
+@pytest.mark.parametrize("text, truncated", [
+    ('{"a": 1}', False),
+    ('{"a": [1, 2', True),
+    ('{"a": "unterminated', True),
+    ('{"a": "}"}', False),
+    ("纯文本", False),
+])
+def test_is_json_truncated(text, truncated):
+    assert is_json_truncated(text) is truncated
+
+
+def test_mismatched_closers_scale_linearly():
+    text = "[" * 10000 + "}" * 10000
+    started = time.monotonic()
+    repaired, repairs = repair_json(text)
+    assert time.monotonic() - started < 1
+    assert repaired == "[" * 10000 + "]" * 10000
+    assert DROP_UNEXPECTED in repairs and CLOSE_ARRAY in repairs
+
+
+@pytest.mark.parametrize("text", ["[" * 100000 + "]" * 100000, '{"a": ' * 100000])
+def test_deep_nesting_raises_decode_error(text):
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_with_repairs(text)
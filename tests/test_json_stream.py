@@ -0,0 +1,75 @@
+"""
+流式JSON增量解析测试
+"""
+
+import json
+
+from src.utils.json_stream import StreamingJSONParser
+
+_DOCUMENT = {
+    "executive_summary": "适合转向算法岗位",
+    "career_match": {"score": 0.8, "paths": [{"title": "算法工程师"}, {"title": "数据科学家"}]},
+    "weekly_schedule": [{"day": "周一", "task": "刷题"}, {"day": "周二", "task": "读论文"}],
+}
+
+
+def _feed_all(parser, text, size):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+def test_events_do_not_depend_on_chunk_size():
+    text = "```json\n" + json.dumps(_DOCUMENT, ensure_ascii=False, indent=2) + "\n```"
+    expected = _feed_all(StreamingJSONParser(), text, len(text))
+    for size in (1, 3, 17):
+        assert _feed_all(StreamingJSONParser(), text, size) == expected
+
+
+def test_fields_and_items_are_emitted_in_order():
+    parser = StreamingJSONParser()
+    events = parser.feed("说明文字\n" + json.dumps(_DOCUMENT, ensure_ascii=False))
+    assert parser.done
+    assert [(e["type"], e["path"]) for e in events] == [
+        ("field", ["executive_summary"]),
+        ("item", ["career_match", "paths", 0]),
+        ("item", ["career_match", "paths", 1]),
+        ("field", ["career_match"]),
+        ("item", ["weekly_schedule", 0]),
+        ("item", ["weekly_schedule", 1]),
+        ("field", ["weekly_schedule"]),
+    ]
+    assert events[0]["value"] == "适合转向算法岗位"
+    assert events[-1]["value"] == _DOCUMENT["weekly_schedule"]
+
+
+def test_item_is_emitted_before_the_array_closes():
+    parser = StreamingJSONParser()
+    events = parser.feed('{"weekly_schedule": [{"day": "周一"}, {"day"')
+    assert events == [{"type": "item", "path": ["weekly_schedule", 0], "value": {"day": "周一"}}]
+
+
+def test_item_depth_limits_nested_arrays():
+    parser = StreamingJSONParser(item_depth=1)
+    events = parser.feed('{"a": {"b": [1, 2]}, "c": [3]}')
+    assert [e["path"] for e in events] == [["a"], ["c", 0], ["c"]]
+
+
+def test_strings_with_structural_characters():
+    parser = StreamingJSONParser()
+    events = parser.feed('{"a": "x, } ] \\" y", "b": 1}')
+    assert [e["value"] for e in events] == ['x, } ] " y', 1]
+
+
+def test_invalid_values_are_skipped():
+    parser = StreamingJSONParser()
+    events = parser.feed('{"a": undefined, "b": 2}')
+    assert events == [{"type": "field", "path": ["b"], "value": 2}]
+
+
+def test_input_after_root_is_ignored():
+    parser = StreamingJSONParser()
+    parser.feed('{"a": 1}')
+    assert parser.done
+    assert parser.feed('{"b": 2}') == []
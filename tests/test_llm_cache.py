@@ -0,0 +1,105 @@
+"""
+LLM 响应缓存测试
+"""
+
+import time
+
+from src.services.llm_cache import LLMResponseCache
+from src.services.llm_service import llm_service
+
+
+def test_key_depends_on_every_request_parameter():
+    key = LLMResponseCache.make_key("m", 0.7, 100, "p")
+    assert key == LLMResponseCache.make_key("m", 0.7, 100, "p")
+    assert len({key,
+                LLMResponseCache.make_key("m2", 0.7, 100, "p"),
+                LLMResponseCache.make_key("m", 0.0, 100, "p"),
+                LLMResponseCache.make_key("m", 0.7, 200, "p"),
+                LLMResponseCache.make_key("m", 0.7, 100, "p2")}) == 5
+
+
+def test_ttl_respects_method_overrides_and_switches():
+    cache = LLMResponseCache(default_ttl=60, method_ttls={"a": 10, "b": 0}, disabled_methods=["c"])
+    assert [cache.ttl_for(m) for m in ("a", "b", "c", "d")] == [10, 0, 0, 60]
+    assert LLMResponseCache(enabled=False).ttl_for("d") == 0
+
+
+def test_get_returns_copy_until_expiry():
+    cache = LLMResponseCache()
+    cache.set("k", {"content": "x"}, ttl=60)
+    hit = cache.get("k")
+    hit["content"] = "changed"
+    assert cache.get("k") == {"content": "x"}
+    cache.set("gone", {"content": "y"}, ttl=0)
+    assert cache.get("gone") is None
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LLMResponseCache(max_entries=2)
+    cache.set("a", {"v": 1}, 60)
+    cache.set("b", {"v": 2}, 60)
+    cache.get("a")
+    cache.set("c", {"v": 3}, 60)
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stale_entry_is_only_served_by_get_stale(monkeypatch):
+    cache = LLMResponseCache(stale_grace=60)
+    cache.set("k", {"v": 1}, ttl=1)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert cache.get("k") is None
+    assert cache.get_stale("k") == {"v": 1}
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get_stale("k") is None
+
+
+def test_sqlite_layer_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache" / "llm.db")
+    LLMResponseCache(sqlite_path=path).set("k", {"content": "中文"}, 60)
+    other = LLMResponseCache(sqlite_path=path)
+    assert other.get("k") == {"content": "中文"}
+    assert other.stats()["sqlite_hits"] == 1
+    # SQLite 命中后回填进程内缓存
+    assert other.get("k") == {"content": "中文"}
+    assert other.stats()["memory_hits"] == 1
+
+
+def test_sqlite_layer_is_bounded(tmp_path):
+    cache = LLMResponseCache(sqlite_path=str(tmp_path / "llm.db"), sqlite_max_entries=2, max_entries=1)
+    for i, ttl in enumerate((10, 30, 20)):
+        cache.set(f"k{i}", {"v": i}, ttl)
+    fresh = LLMResponseCache(sqlite_path=str(tmp_path / "llm.db"))
+    # 超出容量时淘汰最早过期的条目
+    assert fresh.get("k0") is None
+    assert fresh.get("k1") == {"v": 1} and fresh.get("k2") == {"v": 2}
+    assert cache.stats()["sqlite_evictions"] == 1
+
+
+def test_service_serves_repeated_prompt_from_cache(monkeypatch):
+    calls = []
+
+    def fake_request(body, emit, method):
+        calls.append(body)
+        if emit:
+            emit("答案")
+        return {"success": True, "content": "答案", "finish_reason": "stop"}
+
+    monkeypatch.setattr(llm_service, "response_cache", LLMResponseCache(default_ttl=60))
+    monkeypatch.setattr(llm_service, "_request_with_retries", fake_request)
+    first = llm_service.call_llm("相同的提示词", method="cache_test")
+    received = []
+    second = llm_service.call_llm("相同的提示词", method="cache_test", stream_callback=received.append)
+    uncached = llm_service.call_llm("相同的提示词", method="cache_test", use_cache=False)
+
+    assert len(calls) == 2
+    assert not first.get("cached")
+    assert second["cached"] and second["content"] == "答案"
+    # 命中缓存时通过回调回放文本
+    assert "".join(received) == "答案"
+    assert not uncached.get("cached")
@@ -0,0 +1,100 @@
+"""
+模型级联测试
+"""
+
+import json
+
+import pytest
+
+from src.services.llm_cascade import (
+    schema_problem, CascadeStats, REQUEST_FAILED, TRUNCATED, PARSE_ERROR, MISSING_KEYS
+)
+from src.services.llm_service import llm_service
+from src.services.single_flight import SingleFlight
+
+
+def _ok(content, **extra):
+    return {"success": True, "content": content, **extra}
+
+
+@pytest.mark.parametrize("result, problem", [
+    (_ok('{"goals": [1]}'), None),
+    (_ok('```json\n{"goals": [1]}\n```'), None),
+    (_ok('结果如下：{"goals": [1]}'), None),
+    ({"success": False, "error": "x"}, REQUEST_FAILED),
+    (_ok('{"goals": [1]}', finish_reason="length"), TRUNCATED),
+    (_ok('{"goals": [1]}', truncated=True), TRUNCATED),
+    (_ok('{"goals": [1, 2'), TRUNCATED),
+    (_ok('{"goals": "unterminated'), TRUNCATED),
+    (_ok('{"goals": [1,],}'), PARSE_ERROR),
+    (_ok('{"goals": True}'), PARSE_ERROR),
+    (_ok('[{"goals": [1]}]'), PARSE_ERROR),
+    (_ok("没有 JSON"), PARSE_ERROR),
+    (_ok('{"goals": []}'), MISSING_KEYS),
+    (_ok('{"other": 1}'), MISSING_KEYS),
+])
+def test_schema_problem(result, problem):
+    assert schema_problem(result, ["goals"]) == problem
+
+
+def test_cascade_stats():
+    stats = CascadeStats()
+    stats.record("m", 0.5)
+    stats.record("m", 2.0, TRUNCATED)
+    summary = stats.stats()["m"]
+    assert (summary["calls"], summary["accepted"], summary["escalated"]) == (2, 1, 1)
+    assert summary["reasons"] == {TRUNCATED: 1}
+    assert summary["escalation_rate"] == 0.5
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """按模型返回预设输出的上游，流式分块逐个推送"""
+    monkeypatch.setattr(llm_service, "single_flight", SingleFlight())
+    outputs = {}
+    requests = []
+
+    def fake_request(body, stream_callback=None, method=None):
+        requests.append((body["model"], body["stream"]))
+        chunks = outputs[body["model"]]
+        if stream_callback:
+            for chunk in chunks:
+                stream_callback(chunk)
+        return {"success": True, "content": "".join(chunks), "finish_reason": "stop"}
+
+    monkeypatch.setattr(llm_service, "_request_with_retries", fake_request)
+    return outputs, requests
+
+
+def _cascade_call(stream_callback):
+    return llm_service.call_llm("拆解目标", method="decompose_career_goals", use_cache=False,
+                                stream_callback=stream_callback, required_keys=["short_term_goals"])
+
+
+def test_accepted_fast_output_is_streamed_from_buffer(fake_upstream):
+    outputs, requests = fake_upstream
+    fast_model = llm_service.model_router.tier_params("fast")["model"]
+    outputs[fast_model] = ['{"short_term_goals"', ': ["学习"]}']
+    received = []
+
+    result = _cascade_call(received.append)
+
+    assert result["escalated"] is False
+    assert received == outputs[fast_model]
+    assert requests == [(fast_model, True)]
+
+
+def test_rejected_fast_output_is_never_streamed(fake_upstream):
+    outputs, requests = fake_upstream
+    fast_model = llm_service.model_router.tier_params("fast")["model"]
+    strong_model = llm_service.model_router.resolve("decompose_career_goals", None)["model"]
+    outputs[fast_model] = ['{"short_term_goals": [']
+    outputs[strong_model] = [json.dumps({"short_term_goals": ["学习"]}, ensure_ascii=False)]
+    received = []
+
+    result = _cascade_call(received.append)
+
+    assert result["escalated"] is True
+    assert result["escalation_reason"] == TRUNCATED
+    assert received == outputs[strong_model]
+    assert [model for model, _ in requests][-1] == strong_model
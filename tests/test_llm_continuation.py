@@ -0,0 +1,65 @@
+"""
+截断输出续写测试
+"""
+
+import json
+
+from src.services.llm_cache import LLMResponseCache
+from src.services.llm_service import llm_service, _ContinuationStitcher, CONTINUATION_PROMPT
+
+
+def test_offset_skips_fence_and_overlap():
+    partial = '{"summary": "适合转向算法岗位，建议先'
+    assert _ContinuationStitcher.offset(partial, "补充数学基础\"}") == 0
+    assert _ContinuationStitcher.offset(partial, "```json\n补充") == len("```json\n")
+    overlap = "适合转向算法岗位，建议先"
+    assert _ContinuationStitcher.offset(partial, overlap + "补充") == len(overlap)
+
+
+def test_stitcher_emits_one_continuous_stream():
+    received = []
+    stitcher = _ContinuationStitcher("前半段内容，已经输出了", received.append)
+    for chunk in ["```json\n", "前半段内容，已经输出了", "后半段"]:
+        stitcher.feed(chunk)
+    stitcher.flush()
+    stitcher.feed("结束")
+    assert received == ["后半段", "结束"]
+
+
+def test_merge_keeps_partial_when_continuation_fails():
+    merged = llm_service._merge_continuation({"success": True, "content": "{\"a\": "},
+                                             {"success": False, "error": "503"})
+    assert merged["content"] == "{\"a\": "
+    assert merged["truncated"] is True
+
+
+def test_truncated_output_is_continued_and_stitched(monkeypatch):
+    answers = [
+        {"success": True, "content": '{"summary": "适合转向算法工程师方向，建议', "finish_reason": "length",
+         "usage": {"completion_tokens": 5}},
+        {"success": True, "content": '算法工程师方向，建议补充数学基础"}', "finish_reason": "stop",
+         "usage": {"completion_tokens": 4}},
+    ]
+    bodies = []
+
+    def fake_request(body, emit, method):
+        bodies.append(body)
+        result = answers[len(bodies) - 1]
+        if emit:
+            emit(result["content"])
+        return result
+
+    monkeypatch.setattr(llm_service, "response_cache", LLMResponseCache(enabled=False))
+    monkeypatch.setattr(llm_service, "_request_with_retries", fake_request)
+    received = []
+    result = llm_service.call_llm("生成报告", method="continuation_test", stream_callback=received.append)
+
+    assert json.loads(result["content"]) == {"summary": "适合转向算法工程师方向，建议补充数学基础"}
+    assert "".join(received) == result["content"]
+    assert result["continuations"] == 1
+    assert result["usage"]["completion_tokens"] == 9
+    # 续写请求带上已生成的内容，要求从截断处继续
+    assert bodies[1]["messages"][-2:] == [
+        {"role": "assistant", "content": '{"summary": "适合转向算法工程师方向，建议'},
+        {"role": "user", "content": CONTINUATION_PROMPT},
+    ]
@@ -0,0 +1,113 @@
+"""
+LLM 请求对冲测试
+"""
+
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.llm_hedging import HedgePolicy, HedgeRace, HedgeLost, PRIMARY, HEDGE
+from src.services.llm_service import llm_service
+
+_HEDGE_URL = "http://hedge.example"
+_DELAY = 0.05
+_BODY = {"stream": True, "model": "x", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    policy = HedgePolicy(enabled=True, min_samples=1, min_delay=_DELAY, max_delay=_DELAY,
+                         max_ratio=1, url=_HEDGE_URL)
+    policy.record("m", SimpleNamespace(winner=PRIMARY, ttft=_DELAY))
+    monkeypatch.setattr(llm_service, "hedging", policy)
+    return policy
+
+
+class _RecordingExecutor:
+    """记录提交次数的对冲线程池替身"""
+
+    def __init__(self, executor):
+        self.submitted = 0
+        self._executor = executor
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return self._executor.submit(*args, **kwargs)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = _RecordingExecutor(llm_service._hedge_executor)
+    monkeypatch.setattr(llm_service, "_hedge_executor", executor)
+    return executor
+
+
+def test_race_gives_callback_to_first_lane():
+    received = []
+    race = HedgeRace(received.append)
+    race.emitter(HEDGE)("h")
+    with pytest.raises(HedgeLost):
+        race.emitter(PRIMARY)("p")
+    assert received == ["h"]
+    assert race.winner == HEDGE
+
+
+def test_no_hedge_after_hedging_stopped():
+    race = HedgeRace()
+    race.stop_hedging()
+    assert not race.begin_hedge(lambda: True)
+
+
+def test_slow_primary_is_hedged(policy, executor, monkeypatch):
+    primary_closed = threading.Event()
+
+    def fake_attempt(body, stream_callback, url=None, on_response=None, method=None):
+        if url == _HEDGE_URL:
+            stream_callback("hedge")
+            return {"success": True, "content": "hedge"}, False, None
+        on_response(SimpleNamespace(close=primary_closed.set))
+        primary_closed.wait(2)
+        return {"success": False, "error": "closed"}, True, None
+
+    monkeypatch.setattr(llm_service, "_attempt_request", fake_attempt)
+    received = []
+    result, _, _ = llm_service._hedged_attempt(_BODY, received.append, "m")
+    assert result["content"] == "hedge"
+    assert received == ["hedge"]
+    assert primary_closed.is_set()
+    assert executor.submitted == 1
+    assert policy.stats()["methods"]["m"]["hedge_won"] == 1
+
+
+def test_fast_primary_does_not_use_hedge_pool(policy, executor, monkeypatch):
+    def fake_attempt(body, stream_callback, url=None, on_response=None, method=None):
+        stream_callback("primary")
+        return {"success": True, "content": "primary"}, False, None
+
+    monkeypatch.setattr(llm_service, "_attempt_request", fake_attempt)
+    result, _, _ = llm_service._hedged_attempt(_BODY, None, "m")
+    time.sleep(_DELAY * 2)
+    assert result["content"] == "primary"
+    # 对冲延迟内主请求已完成，等待期间不占用对冲线程池
+    assert executor.submitted == 0
+    assert policy.stats()["methods"]["m"]["hedged"] == 0
+
+
+def test_async_slow_primary_is_hedged(policy, monkeypatch):
+    async def fake_attempt(body, stream_callback, url=None, method=None):
+        if url == _HEDGE_URL:
+            stream_callback("hedge")
+            return {"success": True, "content": "hedge"}, False, None
+        await asyncio.sleep(2)
+        return {"success": False, "error": "slow"}, True, None
+
+    monkeypatch.setattr(llm_service, "_aattempt_request", fake_attempt)
+    received = []
+    started = time.monotonic()
+    result, _, _ = asyncio.run(llm_service._ahedged_attempt(_BODY, received.append, "m"))
+    assert time.monotonic() - started < 1
+    assert result["content"] == "hedge"
+    assert received == ["hedge"]
@@ -0,0 +1,84 @@
+"""
+LLM 调用指标与指标接口测试
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from src.routes.career import career_bp
+from src.services.llm_context import llm_call_context
+from src.services import llm_metrics
+from src.services.llm_metrics import CallTimer, LLMCallMetrics
+
+
+def _client(admin_token):
+    app = Flask(__name__)
+    app.config["ADMIN_TOKEN"] = admin_token
+    app.register_blueprint(career_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/llm-calls"])
+def test_metrics_disabled_without_admin_token(path):
+    assert _client("").get(path).status_code == 403
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/llm-calls"])
+@pytest.mark.parametrize("header, status", [({}, 401), ({"X-Admin-Token": "wrong"}, 401),
+                                            ({"X-Admin-Token": "secret"}, 200)])
+def test_metrics_require_admin_token(path, header, status):
+    assert _client("secret").get(path, headers=header).status_code == status
+
+
+def _finished_timer(monkeypatch, ticks, chunks=("a", "b", "c")):
+    """按给定的时间点依次完成连接、收到各分块和结束，返回计时器和转发的分块"""
+    clock = iter(ticks)
+    monkeypatch.setattr(llm_metrics, "time", SimpleNamespace(monotonic=lambda: next(clock)))
+    forwarded = []
+    timer = CallTimer(forwarded.append)
+    timer.connected()
+    for chunk in chunks:
+        timer.feed(chunk)
+    return timer.finish(), forwarded
+
+
+def test_timer_measures_ttft_and_gaps(monkeypatch):
+    timer, forwarded = _finished_timer(monkeypatch, [0.0, 0.2, 1.0, 1.1, 1.4, 2.0])
+    assert forwarded == ["a", "b", "c"]
+    assert timer.connect == pytest.approx(0.2)
+    assert timer.ttft == pytest.approx(1.0)
+    assert timer.gaps == pytest.approx([0.1, 0.3])
+    assert timer.duration == pytest.approx(2.0)
+    assert timer.chunks == 3
+
+
+def test_record_tags_and_groups_calls(monkeypatch):
+    timer, _ = _finished_timer(monkeypatch, [0.0, 0.2, 1.0, 1.1, 1.4, 2.0])
+    metrics = LLMCallMetrics(log_enabled=False)
+    body = {"model": "lite", "stream": True}
+    with llm_call_context("s1", "planner"):
+        entry = metrics.record(timer, body, {"success": True, "content": "x", "usage": {"completion_tokens": 50}},
+                               method="create_analysis_strategy")
+    metrics.record(timer, body, {"success": False}, method="create_analysis_strategy")
+
+    assert entry["session_id"] == "s1" and entry["node"] == "planner"
+    assert entry["gap_max"] == 0.3
+    # 输出速度按首个分块之后的生成时间计算
+    assert entry["tokens_per_sec"] == 50.0
+    stats = metrics.stats()
+    assert stats["model:lite"]["calls"] == 2 and stats["model:lite"]["errors"] == 1
+    assert stats["node:planner"]["calls"] == 1
+    assert stats["method:create_analysis_strategy"]["gap"]["count"] == 4
+
+
+def test_recent_is_newest_first_and_filtered_by_session():
+    metrics = LLMCallMetrics(recent_size=2, log_enabled=False)
+    for session in ("s1", "s2", "s1"):
+        with llm_call_context(session, "n"):
+            metrics.record(CallTimer().finish(), {"model": "m"}, {"success": True, "content": session})
+    recent = metrics.recent()
+    assert [e["session_id"] for e in recent] == ["s1", "s2"]
+    assert [e["session_id"] for e in metrics.recent("s2")] == ["s2"]
+    assert len(metrics.recent(limit=1)) == 1
@@ -0,0 +1,95 @@
+"""
+重试策略与熔断器测试
+"""
+
+import time
+from email.utils import formatdate
+
+from src.services.llm_resilience import RetryPolicy, CircuitBreaker
+
+
+def test_retryable_status_and_exceptions():
+    policy = RetryPolicy()
+    assert policy.is_retryable_status(503)
+    assert policy.is_retryable_status(429)
+    assert not policy.is_retryable_status(400)
+    assert not policy.is_retryable_status(None)
+    assert policy.is_retryable_exception(TimeoutError())
+    assert not policy.is_retryable_exception(ValueError())
+
+
+def test_compute_delay_uses_capped_full_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    for attempt in range(6):
+        ceiling = min(5.0, 2 ** attempt)
+        assert all(0 <= policy.compute_delay(attempt) <= ceiling for _ in range(50))
+
+
+def test_compute_delay_honours_retry_after_up_to_limit():
+    policy = RetryPolicy(max_retry_after=10)
+    assert policy.compute_delay(0, retry_after=3) == 3
+    assert policy.compute_delay(0, retry_after=100) == 10
+    assert policy.compute_delay(0, retry_after=-1) == 0
+
+
+def test_parse_retry_after():
+    assert RetryPolicy.parse_retry_after("2.5") == 2.5
+    assert RetryPolicy.parse_retry_after(None) is None
+    assert RetryPolicy.parse_retry_after("soon") is None
+    seconds = RetryPolicy.parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 <= seconds <= 31
+
+
+def _breaker(**kwargs):
+    options = dict(failure_threshold=0.5, min_calls=4, window_seconds=60, recovery_timeout=0.05)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def test_breaker_opens_after_failure_rate_exceeded():
+    breaker = _breaker()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_needs_min_calls():
+    breaker = _breaker(min_calls=10)
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_success_closes():
+    breaker = _breaker(min_calls=1)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # 只放行一个探测请求
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["window_failures"] == 0
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = _breaker(min_calls=1)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_old_outcomes_leave_the_window():
+    breaker = _breaker(min_calls=2, window_seconds=0.01)
+    breaker.record_failure()
+    time.sleep(0.03)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["window_calls"] == 1
@@ -0,0 +1,85 @@
+"""
+模型路由参数与 /model-routes 管理接口测试
+"""
+
+import os
+import json
+
+import pytest
+from flask import Flask
+
+from src.routes.career import career_bp
+from src.services.llm_service import llm_service
+from src.services.model_router import ModelRouter
+
+
+def _client(admin_token):
+    app = Flask(__name__)
+    app.config["ADMIN_TOKEN"] = admin_token
+    app.register_blueprint(career_bp)
+    return app.test_client()
+
+
+def test_zero_temperature_is_kept():
+    body = llm_service._build_request_body("p", "m", 0.0, None, False)
+    assert body["temperature"] == 0.0
+    assert llm_service._build_request_body("p", "m", None, None, False)["temperature"] == llm_service.default_temperature
+
+
+def test_route_temperature_zero_reaches_request_body(monkeypatch):
+    route = dict(llm_service.model_router.resolve(None, None), temperature=0)
+    monkeypatch.setattr(llm_service.model_router, "resolve", lambda method, node: route)
+    body = llm_service._prepare_body("p", None, None, None, None, False, "m")
+    assert body["temperature"] == 0
+
+
+def test_model_routes_disabled_without_admin_token():
+    client = _client("")
+    assert client.get("/model-routes").status_code == 403
+    assert client.put("/model-routes", json={"routes": {}}).status_code == 403
+
+
+@pytest.mark.parametrize("header, status", [({}, 401), ({"X-Admin-Token": "wrong"}, 401),
+                                            ({"X-Admin-Token": "秘密"}, 401), ({"X-Admin-Token": "secret"}, 200)])
+def test_model_routes_require_admin_token(header, status):
+    assert _client("secret").get("/model-routes", headers=header).status_code == status
+
+
+def _file_router(tmp_path, content):
+    path = tmp_path / "routes.json"
+    path.write_text(content, encoding="utf-8")
+    router = ModelRouter({"model": "default", "temperature": 0.7, "max_tokens": 100},
+                         tiers={"fast": {"model": "lite"}}, routes={"base": {"tier": "fast"}},
+                         routes_file=str(path), reload_interval=0)
+    return router, path
+
+
+def _rewrite(path, content):
+    """写入新内容并推进修改时间 (部分文件系统的 mtime 精度较低)"""
+    mtime = os.path.getmtime(path)
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (mtime + 1, mtime + 1))
+
+
+def test_routes_file_reload_replaces_previous_file_routes(tmp_path):
+    router, path = _file_router(tmp_path, json.dumps({"a": {"tier": "fast"}, "b": {"model": "x"}}))
+    assert set(router.routes()["routes"]) == {"base", "a", "b"}
+    _rewrite(path, json.dumps({"b": {"model": "y"}}))
+    router.resolve()
+    routes = router.routes()["routes"]
+    assert set(routes) == {"base", "b"}
+    assert routes["b"] == {"model": "y"}
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", '{"a": {"temperature": null}}', '{"a": {"tier": "missing"}}', "{bad"])
+def test_invalid_routes_file_keeps_routes_and_retries(tmp_path, content):
+    router, path = _file_router(tmp_path, json.dumps({"a": {"tier": "fast"}}))
+    _rewrite(path, content)
+    router.resolve()
+    assert set(router.routes()["routes"]) == {"base", "a"}
+    # 文件修正后重新加载，即使修改时间没有再变化
+    mtime = os.path.getmtime(path)
+    path.write_text(json.dumps({"c": {"model": "z"}}), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    router.resolve()
+    assert set(router.routes()["routes"]) == {"base", "c"}
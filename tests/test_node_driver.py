@@ -0,0 +1,226 @@
+"""
+节点驱动器测试: 同一份节点步骤分别由 _run_node (同步) 和 _arun_node (异步) 驱动，得到的状态更新应一致
+"""
+
+import re
+import json
+import time
+import asyncio
+from concurrent.futures import Future
+from datetime import datetime
+
+import pytest
+
+from src.models.career_state import create_initial_state
+from src.services import career_nodes
+from src.services.career_nodes import (
+    _run_node, _arun_node, _LLMCall, _BlockingCall, _BackgroundCall, _AwaitCall
+)
+
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?")
+
+# 各服务方法的模拟输出
+_RESPONSES = {
+    "create_analysis_strategy": {"strategy_overview": "先分析技能，再研究行业"},
+    "analyze_user_profile": {"strengths": ["Python"], "weaknesses": ["沟通"]},
+    "research_industry_trends": {"industry_overview": "AI 行业增长快"},
+    "analyze_career_opportunities": {"career_matches": [{"title": "算法工程师"}]},
+    "generate_integrated_report": {"executive_summary": "适合转向算法岗位"},
+    "decompose_career_goals": {"short_term_goals": [{"goal": "学习深度学习"}]},
+    "create_action_schedule": {"weekly_schedule": [{"day": "周一", "task": "刷题"}]},
+}
+
+
+class StubLLMService:
+    """按方法名返回固定结果的 llm_service 替身，同步和 a 前缀的异步方法返回相同内容"""
+
+    def __init__(self):
+        self.calls = []
+
+    def _respond(self, method, kwargs):
+        self.calls.append(method)
+        callback = kwargs.get("stream_callback")
+        content = json.dumps(_RESPONSES[method], ensure_ascii=False)
+        if callback:
+            callback(content)
+        return {"success": True, "content": content}
+
+    def __getattr__(self, name):
+        if name in _RESPONSES:
+            return lambda *args, **kwargs: self._respond(name, kwargs)
+        if name.startswith("a") and name[1:] in _RESPONSES:
+            async def call(*args, **kwargs):
+                await asyncio.sleep(0)
+                return self._respond(name[1:], kwargs)
+            return call
+        raise AttributeError(name)
+
+
+def _fake_mcp_api(api_name, params):
+    return {"success": True, "api_name": api_name, "search_results": [{"title": "示例", "content": "内容"}]}
+
+
+def _normalize(value):
+    """去掉时间戳和随机ID，便于比较两次运行的结果"""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, datetime):
+        return "<datetime>"
+    if isinstance(value, str):
+        return _TIMESTAMP.sub("<datetime>", _UUID.sub("<uuid>", value))
+    if hasattr(value, "value") and not isinstance(value, (int, float)):
+        return getattr(value, "value")
+    return value
+
+
+@pytest.fixture
+def stub_service(monkeypatch):
+    service = StubLLMService()
+    monkeypatch.setattr(career_nodes, "llm_service", service)
+    monkeypatch.setattr(career_nodes, "call_mcp_api", _fake_mcp_api)
+    return service
+
+
+@pytest.fixture
+def analysis_state(stub_service):
+    """已由 supervisor 分发好分析任务的状态"""
+    state = create_initial_state({
+        "user_id": "u1", "age": 28, "education_level": "本科", "work_experience": 5,
+        "current_position": "后端工程师", "industry": "互联网", "skills": ["Python", "Go"],
+        "interests": ["AI"], "career_goals": "转型算法工程师", "location": "北京",
+        "salary_expectation": "30k", "additional_info": {}
+    }, "session-1")
+    state.update(_run_node(career_nodes._supervisor_steps, state))
+    state["integrated_report"] = {"career_match": {"recommended_career": "算法工程师"}}
+    # reporter 需要三个分析节点的结果
+    for steps, key in ((career_nodes._user_profiler_steps, "self_insight_result"),
+                       (career_nodes._industry_researcher_steps, "industry_research_result"),
+                       (career_nodes._job_analyzer_steps, "career_analysis_result")):
+        state[key] = _run_node(steps, state)[key]
+    stub_service.calls.clear()
+    return state
+
+
+@pytest.mark.parametrize("steps", [
+    career_nodes._planner_steps,
+    career_nodes._user_profiler_steps,
+    career_nodes._industry_researcher_steps,
+    career_nodes._job_analyzer_steps,
+    career_nodes._reporter_steps,
+    career_nodes._goal_decomposer_steps,
+    career_nodes._scheduler_steps,
+], ids=lambda steps: steps.__name__)
+def test_sync_and_async_drivers_agree(stub_service, analysis_state, steps):
+    sync_events, async_events = [], []
+    sync_result = _run_node(steps, analysis_state, {"configurable": {"stream_callback": sync_events.append}})
+    sync_calls = list(stub_service.calls)
+    stub_service.calls.clear()
+
+    async_result = asyncio.run(
+        _arun_node(steps, analysis_state, {"configurable": {"stream_callback": async_events.append}})
+    )
+
+    assert sync_calls, "节点应至少调用一次 LLM"
+    assert stub_service.calls == sync_calls
+    assert _normalize(async_result) == _normalize(sync_result)
+    assert async_events == sync_events
+
+
+def _probe_steps(state, config=None):
+    """覆盖所有请求类型的测试节点"""
+    blocking = yield _BlockingCall(lambda x: x * 2, 21)
+    handle = yield _BackgroundCall(time.sleep, 0.5)
+    timed_out = yield _AwaitCall(handle, timeout=0.01)
+    fast = yield _BackgroundCall(lambda: "done")
+    finished = yield _AwaitCall(fast)
+    try:
+        yield _LLMCall("missing_method")
+    except AttributeError:
+        error = "raised"
+    else:
+        error = "not raised"
+    return {"blocking": blocking, "timed_out": timed_out, "finished": finished, "error": error}
+
+
+def test_drivers_handle_every_request_type(stub_service):
+    expected = {"blocking": 42, "timed_out": None, "finished": "done", "error": "raised"}
+    assert _run_node(_probe_steps, {}) == expected
+    assert asyncio.run(_arun_node(_probe_steps, {})) == expected
+
+
+def test_drivers_await_prefetched_future(stub_service):
+    prefetched = Future()
+    prefetched.set_result({"search_results": []})
+
+    def steps(state, config=None):
+        return (yield _AwaitCall(prefetched))
+
+    assert _run_node(steps, {}) == {"search_results": []}
+    assert asyncio.run(_arun_node(steps, {})) == {"search_results": []}
+
+
+def test_plain_function_steps_are_returned_directly():
+    def steps(state, config=None):
+        return {"value": 1}
+
+    assert _run_node(steps, {}) == {"value": 1}
+    assert asyncio.run(_arun_node(steps, {})) == {"value": 1}
+
+
+class _SlowResearchService(StubLLMService):
+    """行业研究调用耗时 0.3s，并记录收到的参考资料"""
+
+    def __init__(self):
+        super().__init__()
+        self.snippets = []
+
+    def research_industry_trends(self, target_industry, stream_callback=None, reference_snippets=None):
+        self.snippets.append(reference_snippets)
+        time.sleep(0.3)
+        return self._respond("research_industry_trends", {"stream_callback": stream_callback})
+
+
+def _slow_search(api_name, params):
+    time.sleep(0.3)
+    return _fake_mcp_api(api_name, params)
+
+
+def test_retrieval_runs_while_llm_generates(analysis_state, monkeypatch):
+    service = _SlowResearchService()
+    monkeypatch.setattr(career_nodes, "llm_service", service)
+    monkeypatch.setattr(career_nodes, "call_mcp_api", _slow_search)
+    monkeypatch.setattr(career_nodes.BaseConfig, "RETRIEVAL_INJECT_SNIPPETS", False)
+
+    started = time.monotonic()
+    result = _run_node(career_nodes._industry_researcher_steps, analysis_state)
+
+    # 检索与 LLM 调用并发，总耗时接近两者中较慢的一个而不是两者之和
+    assert time.monotonic() - started < 0.55
+    assert result["industry_research_result"]["market_data"]["search_results"][0]["title"] == "示例"
+    assert service.snippets == [None]
+
+
+@pytest.mark.parametrize("deadline, expected", [(1.0, [{"title": "示例", "content": "内容"}]), (0.01, None)])
+def test_search_results_are_injected_within_deadline(analysis_state, monkeypatch, deadline, expected):
+    service = _SlowResearchService()
+    monkeypatch.setattr(career_nodes, "llm_service", service)
+    monkeypatch.setattr(career_nodes, "call_mcp_api", _slow_search)
+    monkeypatch.setattr(career_nodes.BaseConfig, "RETRIEVAL_INJECT_SNIPPETS", True)
+    monkeypatch.setattr(career_nodes.BaseConfig, "RETRIEVAL_INJECT_DEADLINE", deadline)
+
+    result = _run_node(career_nodes._industry_researcher_steps, analysis_state)
+
+    assert service.snippets == [expected]
+    # 超过截止时间时 LLM 不带参考资料，但检索结果仍然写入市场数据
+    assert result["industry_research_result"]["market_data"]["search_results"]
+
+
+def test_reference_section_formats_snippets():
+    section = career_nodes.llm_service._reference_section(
+        [{"content": "AI  岗位\n需求增长", "url": "https://a"}, {"content": ""}, "bad"]
+    )
+    assert section == "\n以下是最新检索到的资料，可作为分析参考：\n- AI 岗位 需求增长 (来源: https://a)\n"
+    assert career_nodes.llm_service._reference_section(None) == ""
@@ -0,0 +1,143 @@
+"""
+OCR 工作进程池与多页 PDF 分页识别测试 (用模拟的 MCP 会话代替 PaddleOCR 服务)
+"""
+
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_app import paddle_ocr_client, pdf_pages
+from mcp_app.image_preprocess import ImagePreprocessor
+from mcp_app.ocr_pool import OCRWorkerPool
+from mcp_app.paddle_ocr_client import PaddleOCRClient, PAGE_FAILED_MARKER
+from src.utils.async_runtime import BackgroundEventLoop
+
+
+class FakeSession:
+    """每次识别耗时 delay 秒，记录正在读取和已读完的文件"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.reading = set()
+        self.finished = []
+
+    async def call_tool(self, tool, arguments):
+        path = arguments["input_data"]
+        self.reading.add(path)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.reading.discard(path)
+        self.finished.append(path)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"text of {os.path.basename(path)}")])
+
+
+@pytest.fixture
+def pool_with_session():
+    runtime = BackgroundEventLoop("test-ocr-pool")
+    pool = OCRWorkerPool(size=1, job_timeout=5, health_interval=30, runtime=runtime)
+    pool._queue = asyncio.Queue()
+    pool._ready = 1
+
+    def serve(delay):
+        session = FakeSession(delay)
+        pool._workers = [runtime.submit(pool._serve(session, "OCR", "input_data"))]
+        return session
+
+    yield pool, serve
+    for worker in pool._workers:
+        worker.cancel()
+    runtime.run(asyncio.sleep(0.05))  # 等工作协程处理完取消
+    runtime.stop()
+
+
+def test_timeout_does_not_include_queue_time(pool_with_session):
+    pool, serve = pool_with_session
+    serve(0.2)
+
+    async def main():
+        return await asyncio.gather(*(pool.call(f"/tmp/p{i}.jpg", timeout=0.3) for i in range(3)))
+
+    results = asyncio.run(main())
+    # 第三个请求排队约 0.4s，但从开始处理计时只用了 0.2s
+    assert [r.content[0].text for r in results] == ["text of p0.jpg", "text of p1.jpg", "text of p2.jpg"]
+
+
+def test_processing_timeout_fails_the_job(pool_with_session):
+    pool, serve = pool_with_session
+    serve(1.0)
+    with pytest.raises(TimeoutError):
+        asyncio.run(pool.call("/tmp/slow.jpg", timeout=0.05))
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_cancelled_call_waits_for_the_running_job(pool_with_session):
+    pool, serve = pool_with_session
+    session = serve(0.3)
+
+    async def main():
+        running = asyncio.ensure_future(pool.call("/tmp/running.jpg"))
+        queued = asyncio.ensure_future(pool.call("/tmp/queued.jpg"))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        queued.cancel()
+        for task in (running, queued):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        # 取消传给调用方时工作进程已不再读取文件，调用方可以安全删除
+        return set(session.reading)
+
+    assert asyncio.run(main()) == set()
+    assert session.finished == ["/tmp/running.jpg"]
+    time.sleep(0.1)
+    # 排队中被取消的请求不再处理
+    assert session.finished == ["/tmp/running.jpg"]
+
+
+def test_failed_pdf_page_leaves_a_marker(tmp_path, monkeypatch):
+    pages = []
+    for number in (1, 2, 3):
+        page = tmp_path / f"page{number}.jpg"
+        page.write_bytes(b"jpg")
+        pages.append(str(page))
+
+    async def fake_call(path, timeout=None):
+        if path.endswith("page2.jpg"):
+            raise TimeoutError("slow")
+        return SimpleNamespace(content=[SimpleNamespace(text=os.path.basename(path))])
+
+    monkeypatch.setattr(pdf_pages, "render_pages", lambda *args, **kwargs: list(pages))
+    monkeypatch.setattr(paddle_ocr_client, "ocr_pool", SimpleNamespace(size=2, call=fake_call))
+    client = PaddleOCRClient(preprocessor=ImagePreprocessor(enabled=False))
+
+    text = asyncio.run(client._extract_pdf_pages(str(tmp_path / "resume.pdf")))
+
+    assert text == "\n\n".join(["page1.jpg", PAGE_FAILED_MARKER.format(page=2), "page3.jpg"])
+    assert client.timings["failed_pages"] == [2]
+    assert not any(os.path.exists(page) for page in pages)
+
+
+def test_page_preprocess_failure_uses_raw_page(tmp_path, monkeypatch):
+    page = tmp_path / "page1.jpg"
+    page.write_bytes(b"jpg")
+    called = []
+
+    async def fake_call(path, timeout=None):
+        called.append(path)
+        return SimpleNamespace(content=[SimpleNamespace(text="raw")])
+
+    class BrokenPreprocessor(ImagePreprocessor):
+        def process(self, path):
+            raise OSError("cannot identify image file")
+
+    monkeypatch.setattr(pdf_pages, "render_pages", lambda *args, **kwargs: [str(page)])
+    monkeypatch.setattr(paddle_ocr_client, "ocr_pool", SimpleNamespace(size=1, call=fake_call))
+    client = PaddleOCRClient(preprocessor=BrokenPreprocessor(enabled=True))
+
+    assert asyncio.run(client._extract_pdf_pages(str(tmp_path / "resume.pdf"))) == "raw"
+    assert called == [str(page)]
+    assert client.timings["failed_pages"] == []
+    assert not page.exists()
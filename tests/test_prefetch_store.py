@@ -0,0 +1,67 @@
+"""
+会话级预取任务存储测试
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+from src.routes import career
+from src.services.prefetch_store import PrefetchStore
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_take_returns_submitted_future_once(executor):
+    store = PrefetchStore(executor)
+    future = store.submit("s1", "k", lambda: 42)
+    assert store.submit("s1", "k", lambda: 0) is future
+    assert store.take("s1", "k").result(1) == 42
+    assert store.take("s1", "k") is None
+    assert store.stats() == {"submitted": 1, "taken": 1, "expired": 0, "pending": 0}
+
+
+def test_disabled_store_does_not_submit(executor):
+    store = PrefetchStore(executor, enabled=False)
+    assert store.submit("s1", "k", lambda: 42) is None
+    assert store.take("s1", "k") is None
+
+
+def test_expired_future_is_not_returned(executor):
+    store = PrefetchStore(executor, ttl=0)
+    store.submit("s1", "k", lambda: 42)
+    assert store.take("s1", "k") is None
+    assert store.stats()["expired"] == 1
+
+
+def test_discard_drops_only_that_session(executor):
+    store = PrefetchStore(executor)
+    release = threading.Event()
+    store.submit("s1", "running", release.wait, 1)
+    queued = store.submit("s1", "queued", lambda: 1)
+    store.submit("s2", "k", lambda: 2)
+    store.discard("s1")
+    release.set()
+    # 排队中的任务被取消，其他会话不受影响
+    assert queued.cancelled()
+    assert store.take("s1", "running") is None
+    assert store.take("s2", "k").result(1) == 2
+
+
+def test_cancel_route_discards_prefetch(executor, monkeypatch):
+    store = PrefetchStore(executor)
+    store.submit("s1", "k", lambda: 1)
+    monkeypatch.setattr(career, "prefetch_store", store)
+    monkeypatch.setitem(career.session_store, "s1", {})
+    app = Flask(__name__)
+    app.register_blueprint(career.career_bp)
+    response = app.test_client().post("/cancel/s1")
+    assert response.status_code == 409
+    assert store.take("s1", "k") is None
@@ -0,0 +1,78 @@
+"""
+提示词渲染测试
+"""
+
+from enum import Enum
+
+from src.services.prompt_renderer import PromptTemplate, PromptRenderer, clean_value
+
+
+class _Level(Enum):
+    HIGH = "high"
+
+
+def test_clean_value_drops_empty_and_duplicate_items():
+    value = {"a": " x ", "b": None, "c": [], "d": [1, 1, {"k": ""}, {"k": 2}, {"k": 2}], "e": {"f": ""}}
+    assert clean_value(value) == {"a": "x", "d": [1, {"k": 2}]}
+
+
+def test_template_keeps_json_braces_literal():
+    template = PromptTemplate('用户: $profile\n输出格式: {"goal": "..."}\n目标: $goal')
+    assert template.fields == ["profile", "goal"]
+    assert template.render({"profile": "P", "goal": "G"}) == '用户: P\n输出格式: {"goal": "..."}\n目标: G'
+
+
+def test_render_serializes_structures_compactly():
+    renderer = PromptRenderer()
+    template = PromptTemplate("数据: $data 级别: $level 备注: $note")
+    prompt = renderer.render("m", template, data={"skills": ["Python", "Python"], "empty": ""},
+                             level=_Level.HIGH.value, note=None)
+    assert prompt == '数据: {"skills":["Python"]} 级别: high 备注: '
+
+
+def test_render_handles_enums_inside_structures():
+    renderer = PromptRenderer()
+    prompt = renderer.render("m", PromptTemplate("$data"), data={"level": _Level.HIGH})
+    assert prompt == '{"level":"high"}'
+
+
+def test_render_records_saved_tokens():
+    renderer = PromptRenderer()
+    data = {"items": [{"name": "x", "desc": ""}] * 10}
+    prompt = renderer.render("m", PromptTemplate("$data"), data=data)
+    renderer.record("m", 10)
+    stats = renderer.report()["m"]
+    assert prompt == '{"items":[{"name":"x"}]}'
+    assert stats["calls"] == 1
+    assert stats["saved_tokens"] > 0
+    assert stats["legacy_tokens"] == stats["prompt_tokens"] + stats["saved_tokens"]
+    assert 0 < stats["reduction"] < 1
+
+
+def test_render_context_skips_empty_and_embedded_values():
+    renderer = PromptRenderer()
+    prompt = '分析用户 {"name":"张三"}'
+    result = renderer.render_context("m", prompt, {
+        "user": {"name": "张三"},
+        "empty": {},
+        "goal": "转型",
+    })
+    assert result == "上下文信息:\ngoal: 转型\n\n" + prompt
+
+
+def test_render_context_without_context_returns_prompt():
+    renderer = PromptRenderer()
+    assert renderer.render_context("m", "p", None) == "p"
+    assert renderer.render_context("m", "p", {"a": None}) == "p"
+    stats = renderer.report()["m"]
+    assert stats["calls"] == 0
+    assert stats["avg_prompt_tokens"] == 0
+
+
+def test_record_without_method_is_grouped_as_unknown():
+    renderer = PromptRenderer()
+    renderer.record(None, 20)
+    renderer.record(None, 40)
+    stats = renderer.report()["unknown"]
+    assert stats["calls"] == 2
+    assert stats["avg_prompt_tokens"] == 30
@@ -0,0 +1,126 @@
+"""
+LLMRateLimiter / TokenBucket 测试
+"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.services.cancellation import CancellationToken, WorkflowCancelled
+from src.services.rate_limiter import LLMRateLimiter, TokenBucket
+
+
+def _limiter(**kwargs):
+    options = dict(requests_per_second=0, tokens_per_minute=0, max_concurrency=8)
+    options.update(kwargs)
+    return LLMRateLimiter(**options)
+
+
+def test_bucket_take_is_capped_at_capacity():
+    bucket = TokenBucket(rate=1.0, capacity=60)
+    assert bucket.take(100) == 60
+    assert bucket.tokens == 0
+    bucket.give_back(1000)
+    assert bucket.tokens == 60
+
+
+def test_release_refunds_only_what_was_charged():
+    limiter = _limiter(tokens_per_minute=60)  # 容量 60，每秒补充 1
+    permit = limiter.acquire(tokens=100, session="s")
+    assert permit.charged == 60
+    limiter.release(permit, used_tokens=10)
+    # 实际扣除 60、使用 10，只能退回 50 (而不是按预估的 100 退回 90)
+    assert limiter._token_bucket.tokens == pytest.approx(50, abs=1)
+
+
+def test_release_never_exceeds_capacity():
+    limiter = _limiter(tokens_per_minute=60)
+    permit = limiter.acquire(tokens=10, session="s")
+    limiter.release(permit, used_tokens=0)
+    assert limiter._token_bucket.tokens <= 60
+
+
+def test_release_debits_underestimated_usage():
+    limiter = _limiter(tokens_per_minute=60)
+    permit = limiter.acquire(tokens=10, session="s")
+    limiter.release(permit, used_tokens=30)
+    assert limiter._token_bucket.tokens == pytest.approx(30, abs=1)
+
+
+def test_sessions_are_served_round_robin():
+    limiter = _limiter(max_concurrency=1)
+    holder = limiter.acquire(session="busy")
+    order = []
+
+    def call(session):
+        permit = limiter.acquire(session=session)
+        order.append(session)
+        limiter.release(permit)
+
+    threads = [threading.Thread(target=call, args=(s,)) for s in ("a", "a", "b")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    limiter.release(holder)
+    for thread in threads:
+        thread.join(1)
+    assert order == ["a", "b", "a"]
+
+
+def test_acquire_gives_up_when_cancelled_while_waiting():
+    limiter = _limiter(max_concurrency=1)
+    holder = limiter.acquire(session="other")
+    token = CancellationToken("s")
+    errors = []
+
+    def wait():
+        try:
+            limiter.acquire(session="s", cancel_token=token)
+        except WorkflowCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    time.sleep(0.05)
+    token.cancel("client_disconnected")
+    thread.join(1)
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    assert limiter.stats()["waiting"] == 0
+    limiter.release(holder)
+    assert limiter.stats()["active"] == 0
+
+
+def test_acquire_rechecks_token_after_grant():
+    limiter = _limiter(tokens_per_minute=60)
+    token = CancellationToken("s")
+    token.cancel()
+    with pytest.raises(WorkflowCancelled):
+        limiter.acquire(tokens=20, session="s", cancel_token=token)
+    stats = limiter.stats()
+    assert stats["active"] == 0
+    assert limiter._token_bucket.tokens == pytest.approx(60, abs=1)
+
+
+def test_aacquire_gives_up_when_cancelled_while_waiting():
+    limiter = _limiter(max_concurrency=1)
+    holder = limiter.acquire(session="other")
+    token = CancellationToken("s")
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        with pytest.raises(WorkflowCancelled):
+            await asyncio.wait_for(limiter.aacquire(session="s", cancel_token=token), 1)
+
+    asyncio.run(main())
+    assert limiter.stats()["waiting"] == 0
+    limiter.release(holder)
+    assert limiter.stats()["active"] == 0
+
+
+def test_disabled_limiter_returns_no_permit():
+    limiter = LLMRateLimiter(enabled=False)
+    assert limiter.acquire(tokens=10) is None
+    limiter.release(None)
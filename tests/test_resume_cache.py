@@ -0,0 +1,64 @@
+"""
+简历解析结果缓存测试
+"""
+
+from src.services.resume_cache import ResumeCache
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_file_hash_depends_only_on_content(tmp_path):
+    a = _write(tmp_path / "a.pdf", b"resume")
+    b = _write(tmp_path / "b.pdf", b"resume")
+    c = _write(tmp_path / "c.pdf", b"other")
+    assert ResumeCache.file_hash(a) == ResumeCache.file_hash(b) != ResumeCache.file_hash(c)
+
+
+def test_normalize_text_folds_width_and_whitespace():
+    assert ResumeCache.normalize_text("张三\n  Ｐｙｔｈｏｎ　工程师 ") == "张三 Python 工程师"
+    assert ResumeCache.normalize_text(None) == ""
+
+
+def test_text_and_profile_layers():
+    cache = ResumeCache()
+    assert cache.get_text("h1") is None
+    cache.set_text("h1", "张三 Python")
+    assert cache.get_text("h1") == "张三 Python"
+
+    cache.set_profile("张三 Python", {"skills": ["Python"]})
+    # OCR 文本只有空白或全角差异时仍命中画像缓存
+    assert cache.get_profile("张三\nＰｙｔｈｏｎ") == {"skills": ["Python"]}
+    assert cache.get_profile("李四") is None
+
+    stats = cache.stats()
+    assert (stats["text_hits"], stats["text_misses"]) == (1, 1)
+    assert (stats["profile_hits"], stats["profile_misses"]) == (1, 1)
+    assert stats["text_hit_rate"] == 0.5
+
+
+def test_empty_values_are_not_cached():
+    cache = ResumeCache()
+    cache.set_text("h1", "")
+    cache.set_profile("text", {})
+    assert cache.get_text("h1") is None
+    assert cache.get_profile("text") is None
+
+
+def test_disabled_cache_never_hits():
+    cache = ResumeCache(enabled=False)
+    cache.set_text("h1", "text")
+    assert cache.get_text("h1") is None
+    assert cache.stats()["text_misses"] == 0
+
+
+def test_sqlite_layer_survives_restart(tmp_path):
+    path = str(tmp_path / "resume.sqlite3")
+    ResumeCache(sqlite_path=path).set_text("h1", "张三")
+    restarted = ResumeCache(sqlite_path=path)
+    assert restarted.get_text("h1") == "张三"
+    assert restarted.stats()["sqlite_hits"] == 1
+    restarted.clear()
+    assert ResumeCache(sqlite_path=path).get_text("h1") is None
@@ -0,0 +1,40 @@
+"""
+简历解析任务的 OCR 超时测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.routes import career
+from src.services.resume_jobs import ResumeJobError
+
+
+class _SlowOCRClient:
+    cancelled = False
+    timings = {}
+
+    async def extract_text_from_file(self, file_path):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            _SlowOCRClient.cancelled = True
+            raise
+        return "text"
+
+
+def test_ocr_timeout_fails_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(career, "PaddleOCRClient", _SlowOCRClient)
+    monkeypatch.setattr(career.resume_cache, "get_text", lambda file_hash: None)
+    upload = tmp_path / "resume.png"
+    upload.write_bytes(b"image")
+    stages = []
+
+    with pytest.raises(ResumeJobError) as excinfo:
+        career._process_resume(str(upload), 0.05, lambda stage, detail=None: stages.append(stage))
+
+    assert excinfo.value.status_code == 504
+    assert stages == ["ocr"]
+    # 超时后 OCR 协程已被取消，上传文件随后才被删除
+    assert _SlowOCRClient.cancelled
+    assert not upload.exists()
@@ -0,0 +1,58 @@
+"""
+外部搜索结果缓存测试
+"""
+
+import pytest
+
+from src.services import llm_service as llm_service_module
+from src.services.search_cache import SearchResultCache
+
+
+def test_query_normalization_merges_equivalent_queries():
+    assert SearchResultCache.normalize_query("  ＡＩ　行业\n趋势 ") == "ai 行业 趋势"
+    assert SearchResultCache.make_key("industry_data", "AI  行业") == SearchResultCache.make_key("industry_data", "ai 行业")
+    assert SearchResultCache.make_key("industry_data", "AI") != SearchResultCache.make_key("job_market", "AI")
+
+
+def test_successful_results_are_cached():
+    cache = SearchResultCache()
+    cache.set("job_market", "q", {"search_results": [{"title": "t"}]})
+    assert cache.get("job_market", "Q") == {"search_results": [{"title": "t"}]}
+    assert cache.get("job_market", "other") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (1, 1, 1)
+
+
+@pytest.mark.parametrize("failure", [{"error": "timeout"}, {"search_results": "HTTPError 432"}])
+def test_failures_are_negatively_cached(failure):
+    cache = SearchResultCache(negative_ttl=60)
+    cache.set("job_market", "q", failure)
+    assert cache.get("job_market", "q") == failure
+    assert cache.stats()["negative_hits"] == 1
+    disabled = SearchResultCache(negative_ttl=0)
+    disabled.set("job_market", "q", failure)
+    assert disabled.get("job_market", "q") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SearchResultCache(enabled=False)
+    cache.set("job_market", "q", {"search_results": []})
+    assert cache.get("job_market", "q") is None
+
+
+def test_call_mcp_api_reuses_cached_search(monkeypatch):
+    queries = []
+
+    class FakeTavily:
+        def invoke(self, payload):
+            queries.append(payload["query"])
+            return [{"title": "t", "url": "https://a"}]
+
+    monkeypatch.setattr(llm_service_module, "tavily_tool", FakeTavily())
+    monkeypatch.setattr(llm_service_module, "search_cache", SearchResultCache())
+    first = llm_service_module.call_mcp_api("job_market", {"target_career": "算法工程师"})
+    second = llm_service_module.call_mcp_api("job_market", {"target_career": "算法工程师"})
+
+    assert len(queries) == 1
+    assert first == second == {"search_results": [{"title": "t", "url": "https://a"}], "data_sources": ["https://a"]}
+    assert llm_service_module.call_mcp_api("unknown", {}) == {"error": "未知的API: unknown"}
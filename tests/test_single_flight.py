@@ -0,0 +1,248 @@
+"""
+LLM 请求单飞合并测试
+"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.services.cancellation import CancellationToken
+from src.services.llm_context import current_cancel_token, llm_call_context
+from src.services.single_flight import SingleFlight
+
+
+def _run_concurrently(flights, key, fn, callbacks):
+    """每个调用方在各自的线程中调用 do"""
+    results = [None] * len(callbacks)
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, flights.do(key, fn, callbacks[i])))
+        for i in range(len(callbacks))
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_request():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    received = [[], [], []]
+
+    def fn(emit):
+        calls.append(1)
+        emit("a")
+        release.wait(1)
+        emit("b")
+        return {"success": True, "content": "ab"}
+
+    threads, results = _run_concurrently(flights, "k", fn, [r.append for r in received])
+    while flights.stats()["followers"] < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(1)
+
+    assert len(calls) == 1
+    assert received == [["a", "b"]] * 3
+    assert sorted(bool(r.get("coalesced")) for r in results) == [False, True, True]
+    assert all(r["content"] == "ab" for r in results)
+    assert flights.stats() == {"leaders": 1, "followers": 2, "in_flight": 0}
+
+
+def test_different_keys_are_not_merged():
+    flights = SingleFlight()
+    assert flights.do("a", lambda emit: {"v": 1}) == {"v": 1}
+    assert flights.do("b", lambda emit: {"v": 2}) == {"v": 2}
+    assert flights.stats()["leaders"] == 2
+
+
+def test_failing_subscriber_callback_does_not_break_the_flight():
+    flights = SingleFlight()
+
+    def broken(chunk):
+        raise RuntimeError("boom")
+
+    def fn(emit):
+        emit("x")
+        return {"success": True}
+
+    assert flights.do("k", fn, broken) == {"success": True}
+
+
+def test_follower_retries_when_leader_raises():
+    flights = SingleFlight()
+    joined = threading.Event()
+    outcomes = []
+
+    def leader_fn(emit):
+        joined.wait(1)
+        raise RuntimeError("upstream")
+
+    def leader():
+        with pytest.raises(RuntimeError):
+            flights.do("k", leader_fn)
+        outcomes.append("leader")
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    while flights.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+
+    def follower_fn(emit):
+        return {"success": True, "own": True}
+
+    waiter = threading.Thread(target=lambda: outcomes.append(flights.do("k", follower_fn)))
+    waiter.start()
+    while flights.stats()["followers"] == 0:
+        time.sleep(0.001)
+    joined.set()
+    thread.join(1)
+    waiter.join(1)
+    assert {"success": True, "own": True} in outcomes
+
+
+def test_async_and_sync_callers_merge():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    async def afn(emit):
+        emit("a")
+        await asyncio.get_running_loop().run_in_executor(None, release.wait, 1)
+        return {"success": True, "content": "a"}
+
+    sync_result = []
+
+    async def main():
+        task = asyncio.create_task(flights.ado("k", afn))
+        await asyncio.sleep(0.01)
+        thread = threading.Thread(target=lambda: sync_result.append(flights.do("k", lambda emit: {"own": True})))
+        thread.start()
+        while flights.stats()["followers"] == 0:
+            await asyncio.sleep(0.001)
+        release.set()
+        leader_result = await task
+        await asyncio.get_running_loop().run_in_executor(None, thread.join, 1)
+        return leader_result
+
+    assert asyncio.run(main()) == {"success": True, "content": "a"}
+    assert sync_result == [{"success": True, "content": "a", "coalesced": True}]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    from src.services.llm_service import llm_service
+    monkeypatch.setattr(llm_service, "single_flight", SingleFlight())
+    monkeypatch.setattr(llm_service, "single_flight_enabled", True)
+    return llm_service
+
+
+def test_cancelled_leader_result_is_not_shared(service, monkeypatch):
+    """两个会话发起相同请求，发起者的会话被取消后，跟随者自行请求而不是拿到取消结果"""
+    leader_token = CancellationToken("leader")
+    follower_token = CancellationToken("follower")
+    requests = []
+
+    def fake_request(body, stream_callback=None, method=None):
+        token = current_cancel_token.get()
+        requests.append(token.session_id)
+        if token is leader_token:
+            while service.single_flight.stats()["followers"] == 0:
+                time.sleep(0.001)
+            token.cancel("client_disconnected")
+            return service._cancelled_result(token)
+        return {"success": True, "content": "{}"}
+
+    monkeypatch.setattr(service, "_request_with_retries", fake_request)
+    results = {}
+
+    def call(name, token):
+        with llm_call_context(session_id=name, cancel_token=token):
+            results[name] = service._call_llm("同一个提示词", None, None, None, None, False,
+                                              None, "m", False)
+
+    leader = threading.Thread(target=call, args=("leader", leader_token))
+    leader.start()
+    while service.single_flight.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    follower = threading.Thread(target=call, args=("follower", follower_token))
+    follower.start()
+    leader.join(2)
+    follower.join(2)
+
+    assert results["leader"]["cancelled"]
+    assert results["follower"] == {"success": True, "content": "{}"}
+    assert requests == ["leader", "follower"]
+    assert not follower_token.cancelled
+
+
+def test_async_follower_retries_after_leader_cancelled():
+    flights = SingleFlight()
+
+    async def leader_fn(emit):
+        while flights.stats()["followers"] == 0:
+            await asyncio.sleep(0.001)
+        return {"success": False, "cancelled": True, "error": "LLM调用已取消"}
+
+    async def follower_fn(emit):
+        return {"success": True}
+
+    async def main():
+        leader = asyncio.create_task(flights.ado("k", leader_fn))
+        await asyncio.sleep(0)
+        follower = await flights.ado("k", follower_fn)
+        return await leader, follower
+
+    leader_result, follower_result = asyncio.run(main())
+    assert leader_result["cancelled"]
+    assert follower_result == {"success": True}
+
+
+def _leader_fails_after(flights, chunks):
+    """发起者先流式输出 chunks 再失败，跟随者加入后返回跟随者收到的分块和结果"""
+    joined = threading.Event()
+
+    def leader_fn(emit):
+        for chunk in chunks:
+            emit(chunk)
+        joined.wait(1)
+        raise RuntimeError("upstream")
+
+    def leader():
+        with pytest.raises(RuntimeError):
+            flights.do("k", leader_fn)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    while flights.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+
+    def follower_fn(emit):
+        emit("full ")
+        emit("answer")
+        return {"success": True, "content": "full answer"}
+
+    received, outcome = [], []
+    waiter = threading.Thread(target=lambda: outcome.append(flights.do("k", follower_fn, received.append)))
+    waiter.start()
+    while flights.stats()["followers"] == 0:
+        time.sleep(0.001)
+    joined.set()
+    thread.join(1)
+    waiter.join(1)
+    return received, outcome[0]
+
+
+def test_fallback_after_partial_stream_does_not_stream_again():
+    received, result = _leader_fails_after(SingleFlight(), ["par", "tial"])
+    # 已收到发起者的部分分块，独立请求只返回最终结果，不再重复推送
+    assert received == ["par", "tial"]
+    assert result["content"] == "full answer"
+
+
+def test_fallback_without_partial_stream_streams_normally():
+    received, result = _leader_fails_after(SingleFlight(), [])
+    assert received == ["full ", "answer"]
+    assert result["content"] == "full answer"
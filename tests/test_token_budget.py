@@ -0,0 +1,87 @@
+"""
+token 预算与直方图测试
+"""
+
+import pytest
+
+from src.services.token_budget import TokenBudget, PromptBudgetExceeded
+from src.utils.histogram import Histogram
+
+
+def _body(content, max_tokens=4000, model="m"):
+    return {"model": model, "max_tokens": max_tokens,
+            "messages": [{"role": "system", "content": "sys"}, {"role": "user", "content": content}]}
+
+
+def test_histogram_buckets_and_percentiles():
+    hist = Histogram((1, 10), sample_size=100)
+    for value in (0.5, 1, 5, 20, 30):
+        hist.observe(value)
+    snapshot = hist.snapshot()
+    assert snapshot["buckets"] == {"<=1": 2, "<=10": 1, "+Inf": 2}
+    assert snapshot["count"] == 5
+    assert snapshot["min"] == 0.5 and snapshot["max"] == 30
+    assert snapshot["avg"] == pytest.approx(56.5 / 5)
+    assert snapshot["p50"] == 5
+    assert snapshot["p95"] == 30
+
+
+def test_histogram_empty_snapshot():
+    snapshot = Histogram((1,)).snapshot()
+    assert snapshot["count"] == 0
+    assert snapshot["avg"] is None and snapshot["p50"] is None
+
+
+def test_histogram_percentile_uses_recent_samples():
+    hist = Histogram((1,), sample_size=2)
+    for value in (100, 1, 2):
+        hist.observe(value)
+    assert hist.percentile(100) == 2
+    assert hist.max == 100
+
+
+def test_prompt_limit_respects_window_and_budget():
+    budget = TokenBudget(context_windows={"m": 8000}, min_output_tokens=1000, safety_margin=0)
+    assert budget.window_for("m") == 8000
+    assert budget.window_for("other") == 8192
+    assert budget.prompt_limit("m") == 7000
+    budget.prompt_budget = 500
+    assert budget.prompt_limit("m") == 500
+
+
+def test_fit_caps_max_tokens_to_remaining_window():
+    budget = TokenBudget(context_windows={"m": 2000}, max_output_tokens={"m": 1500},
+                         min_output_tokens=100, safety_margin=0, log_every=0)
+    body, prompt_tokens = budget.fit(_body("hello", max_tokens=4000), method="x")
+    assert body["max_tokens"] == 1500
+    body, prompt_tokens = budget.fit(_body("x" * 4000, max_tokens=4000), method="x")
+    assert body["max_tokens"] == 2000 - prompt_tokens
+    assert budget.stats()["max_tokens_adjusted"] == 2
+
+
+def test_fit_compacts_oversized_prompt():
+    budget = TokenBudget(context_windows={"m": 600}, min_output_tokens=100, safety_margin=0, log_every=0)
+    body, prompt_tokens = budget.fit(_body("短指令\n" + "x" * 8000, max_tokens=100), method="x")
+    assert prompt_tokens <= 500
+    assert body["messages"][-1]["content"].startswith("短指令\n")
+    assert budget.stats()["compacted"] == 1
+
+
+def test_fit_rejects_when_configured():
+    budget = TokenBudget(context_windows={"m": 600}, min_output_tokens=100, safety_margin=0,
+                         overflow_action="reject", log_every=0)
+    with pytest.raises(PromptBudgetExceeded) as excinfo:
+        budget.fit(_body("x" * 8000), method="x")
+    assert excinfo.value.limit == 500
+    assert budget.stats()["rejected"] == 1
+
+
+def test_usage_is_recorded_per_method():
+    budget = TokenBudget(log_every=0)
+    budget.fit(_body("hello", max_tokens=10), method="a")
+    budget.record_usage("a", {"completion_tokens": 300})
+    budget.record_usage("a", None)
+    methods = budget.stats()["methods"]
+    assert methods["a"]["input"]["count"] == 1
+    assert methods["a"]["output"]["count"] == 1
+    assert methods["a"]["output"]["max"] == 300
@@ -0,0 +1,89 @@
+"""
+工作流取消测试: 节点执行中途被取消时，检查点不应保存该节点的输出
+"""
+
+import json
+import asyncio
+
+import pytest
+
+from src.models.career_state import create_initial_state
+from src.services import career_nodes
+from src.services.cancellation import CancellationToken
+from src.services.career_graph import CareerNavigatorGraph
+from src.services.llm_context import current_cancel_token
+
+
+class CancellingLLMService:
+    """目标分析正常返回 (目标不明确，进入 planner)，制定策略时运行被取消"""
+
+    def __init__(self):
+        self.calls = []
+
+    def _respond(self, method):
+        self.calls.append(method)
+        if method == "analyze_career_goal_clarity":
+            content = json.dumps({"is_goal_clear": False}, ensure_ascii=False)
+            return {"success": True, "content": content}
+        token = current_cancel_token.get()
+        token.cancel("user")
+        return {"success": False, "error": "请求已取消", "cancelled": True}
+
+    def analyze_career_goal_clarity(self, *args, **kwargs):
+        return self._respond("analyze_career_goal_clarity")
+
+    def create_analysis_strategy(self, *args, **kwargs):
+        return self._respond("create_analysis_strategy")
+
+    async def aanalyze_career_goal_clarity(self, *args, **kwargs):
+        return self._respond("analyze_career_goal_clarity")
+
+    async def acreate_analysis_strategy(self, *args, **kwargs):
+        return self._respond("create_analysis_strategy")
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = CancellingLLMService()
+    monkeypatch.setattr(career_nodes, "llm_service", service)
+    return service
+
+
+def _initial_state(session_id):
+    return create_initial_state({
+        "user_id": "u1", "age": 28, "education_level": "本科", "work_experience": 5,
+        "current_position": "后端工程师", "industry": "互联网", "skills": ["Python"],
+        "interests": ["AI"], "career_goals": "不确定", "location": "北京",
+        "salary_expectation": "30k", "additional_info": {}
+    }, session_id)
+
+
+def _assert_planner_not_checkpointed(graph, session_id):
+    snapshot = graph.app.get_state(graph._build_run_config(session_id))
+    assert snapshot.values.get("planning_strategy") is None
+    assert snapshot.next == ("planner",)
+
+
+def test_cancel_during_node_skips_checkpoint(service):
+    graph = CareerNavigatorGraph()
+    token = CancellationToken("cancel-sync")
+    result = graph.run_workflow(_initial_state("cancel-sync"), cancel_token=token)
+    assert result["cancelled"] is True
+    assert service.calls == ["analyze_career_goal_clarity", "create_analysis_strategy"]
+    _assert_planner_not_checkpointed(graph, "cancel-sync")
+
+
+def test_async_cancel_during_node_skips_checkpoint(service):
+    graph = CareerNavigatorGraph()
+    token = CancellationToken("cancel-async")
+    result = asyncio.run(graph.arun_workflow(_initial_state("cancel-async"), cancel_token=token))
+    assert result["cancelled"] is True
+    assert service.calls == ["analyze_career_goal_clarity", "create_analysis_strategy"]
+    _assert_planner_not_checkpointed(graph, "cancel-async")
+
+
+def test_finished_run_discards_unused_prefetch(service):
+    graph = CareerNavigatorGraph()
+    career_nodes.prefetch_store.submit("cancel-prefetch", "k", lambda: 1)
+    graph.run_workflow(_initial_state("cancel-prefetch"), cancel_token=CancellationToken("cancel-prefetch"))
+    assert career_nodes.prefetch_store.take("cancel-prefetch", "k") is None